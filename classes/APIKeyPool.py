@@ -0,0 +1,122 @@
+# Pool of OpenWeatherMap API keys
+# Tracks per-key usage and remaining budget, rotates keys across concurrent requests and benches keys answering 401/429.
+import os
+import json
+import time
+import threading
+from classes.APIKey import APIKey
+
+class KeyPoolExhausted(Exception):     # Every key is benched or out of budget
+    pass
+
+class APIKeyPool:       # Thread-safe key rotation with per-key budgets
+    ENV_VAR = "OPENWEATHER_API_KEYS"    # Comma-separated keys
+    BENCH_STATUSES = (401, 429)
+
+    def __init__(self, keys, calls_per_minute=60, total_quota=None, bench_seconds=60, max_wait=None, window_seconds=60):
+        keys = [key.strip() for key in keys if key and key.strip()]
+        if not keys:
+            raise ValueError("Au moins une clé API est requise")
+        self.calls_per_minute = calls_per_minute    # Per-key rate budget (OpenWeatherMap free plan: 60/min)
+        self.total_quota = total_quota              # Optional per-key call budget for the lifetime of the pool
+        self.bench_seconds = bench_seconds          # How long a key answering 401/429 is set aside
+        self.max_wait = max_wait                    # Optional cap on how long acquire() waits, None waits for the next reset
+        self.window_seconds = window_seconds        # Length of the calls_per_minute window
+        self.condition = threading.Condition()
+        self.keys = {
+            key: {"used": 0, "window_start": 0.0, "window_used": 0, "in_flight": 0, "benched_until": 0.0, "bench_status": None,
+                  "rejections": 0}
+            for key in dict.fromkeys(keys)
+        }
+
+    @classmethod
+    def from_env(cls, config_path=None, environ=None, **options):     # Keys from OPENWEATHER_API_KEYS, a JSON config, or APIKey.key
+        environ = os.environ if environ is None else environ
+        if environ.get(cls.ENV_VAR):
+            return cls(environ[cls.ENV_VAR].split(","), **options)
+        if config_path and os.path.exists(config_path):
+            with open(config_path, "r") as f:
+                config = json.load(f)       # {"keys": [...], "calls_per_minute": 60, "total_quota": null}
+            keys = config.pop("keys")
+            return cls(keys, **{**config, **options})
+        return cls([APIKey.key], **options)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _remaining(self, state, now):       # Calls left for a key in the current minute (and overall quota)
+        window_used = state["window_used"] if now - state["window_start"] < self.window_seconds else 0
+        remaining = self.calls_per_minute - window_used - state["in_flight"]
+        if self.total_quota is not None:
+            remaining = min(remaining, self.total_quota - state["used"] - state["in_flight"])
+        return remaining
+
+    def _dead(self, state, now):        # Key that waiting will not bring back: quota spent or rejected as invalid (401)
+        if self.total_quota is not None and state["used"] >= self.total_quota:
+            return True
+        return state["benched_until"] > now and state["bench_status"] == 401
+
+    def _ready_at(self, state, now):        # When a key gets budget back, None if it only waits for in-flight calls
+        if state["benched_until"] > now:
+            return state["benched_until"]
+        if now - state["window_start"] < self.window_seconds and state["window_used"] >= self.calls_per_minute:
+            return state["window_start"] + self.window_seconds
+        return None
+
+    def acquire(self, block=True):      # Take the available key with the most remaining budget, waiting for the next window reset
+        # or bench expiry; with block=False, None when no key has budget right now (optional calls such as hedges)
+        deadline = time.monotonic() + self.max_wait if self.max_wait is not None else None
+        with self.condition:
+            while True:
+                now = time.monotonic()
+                candidates = [(self._remaining(state, now), key) for key, state in self.keys.items()
+                              if state["benched_until"] <= now]
+                candidates = [(remaining, key) for remaining, key in candidates if remaining > 0]
+                if candidates:
+                    _, key = max(candidates)
+                    state = self.keys[key]
+                    if now - state["window_start"] >= self.window_seconds:
+                        state["window_start"] = now
+                        state["window_used"] = 0
+                    state["in_flight"] += 1
+                    return key
+                if not block:
+                    return None
+                if self.total_quota is not None and all(s["used"] >= self.total_quota for s in self.keys.values()):
+                    raise KeyPoolExhausted("Quota épuisé pour toutes les clés API")
+                if all(self._dead(state, now) for state in self.keys.values()):
+                    raise KeyPoolExhausted("Toutes les clés API sont refusées (401)")
+                if deadline is not None and now >= deadline:
+                    raise KeyPoolExhausted("Aucune clé API disponible (toutes en pause ou hors budget)")
+                ready = [self._ready_at(state, now) for state in self.keys.values() if not self._dead(state, now)]
+                ready = [at for at in ready if at is not None]
+                timeout = min(ready) - now if ready else 1.0        # Releases also wake the wait up
+                if deadline is not None:
+                    timeout = min(timeout, deadline - now)
+                self.condition.wait(max(0.0, min(1.0, timeout)))
+
+    def release(self, key, status=None):        # Record the outcome of a request made with `key`
+        with self.condition:
+            state = self.keys[key]
+            state["in_flight"] -= 1
+            if status is not None:
+                state["used"] += 1
+                state["window_used"] += 1
+            if status in self.BENCH_STATUSES:
+                state["rejections"] += 1
+                state["benched_until"] = time.monotonic() + self.bench_seconds
+                state["bench_status"] = status
+            self.condition.notify_all()
+
+    def stats(self):        # Per-key usage, keys masked to their first and last 4 characters
+        now = time.monotonic()
+        with self.condition:
+            return {
+                f"{key[:4]}...{key[-4:]}": {
+                    "used": state["used"],
+                    "remaining_this_minute": max(0, self._remaining(state, now)),
+                    "rejections": state["rejections"],
+                    "benched": state["benched_until"] > now
+                }
+                for key, state in self.keys.items()
+            }
@@ -0,0 +1,242 @@
+# Streaming accumulators for forecast statistics
+# Each metric is an accumulator with update/merge/result, computed per day and per period in one pass over forecast_data["list"].
+from classes.Units import unit_system
+
+class Accumulator:      # Base accumulator: update with one entry, merge a partial result, read the result
+    def update(self, entry, previous):      # previous is the entry preceding this one in the full forecast list
+        raise NotImplementedError
+
+    def merge(self, other):
+        raise NotImplementedError
+
+    def result(self):
+        raise NotImplementedError
+
+class Sum(Accumulator):     # Sum of a value, None values ignored
+    def __init__(self, extract):
+        self.extract = extract
+        self.total = 0
+
+    def update(self, entry, previous):
+        value = self.extract(entry)
+        if value is not None:
+            self.total += value
+
+    def merge(self, other):
+        self.total += other.total
+
+    def result(self):
+        return round(self.total, 2)
+
+class Max(Accumulator):     # Maximum of a value, `empty` when nothing was seen
+    def __init__(self, extract, empty=None):
+        self.extract = extract
+        self.value = None
+        self.empty = empty
+
+    def update(self, entry, previous):
+        value = self.extract(entry)
+        if value is not None and (self.value is None or value > self.value):
+            self.value = value
+
+    def merge(self, other):
+        if other.value is not None and (self.value is None or other.value > self.value):
+            self.value = other.value
+
+    def result(self):
+        return self.empty if self.value is None else round(self.value, 2)
+
+class Min(Max):     # Minimum of a value, `empty` when nothing was seen
+    def update(self, entry, previous):
+        value = self.extract(entry)
+        if value is not None and (self.value is None or value < self.value):
+            self.value = value
+
+    def merge(self, other):
+        if other.value is not None and (self.value is None or other.value < self.value):
+            self.value = other.value
+
+class Mean(Accumulator):        # Arithmetic mean of a value
+    def __init__(self, extract):
+        self.extract = extract
+        self.total = 0
+        self.count = 0
+
+    def update(self, entry, previous):
+        value = self.extract(entry)
+        if value is not None:
+            self.total += value
+            self.count += 1
+
+    def merge(self, other):
+        self.total += other.total
+        self.count += other.count
+
+    def result(self):
+        return round(self.total / self.count, 2) if self.count else None
+
+class Trend(Accumulator):       # Last value minus first value, ordered by entry timestamp
+    def __init__(self, extract):
+        self.extract = extract
+        self.first = None       # (dt, value)
+        self.last = None
+
+    def update(self, entry, previous):
+        value = self.extract(entry)
+        if value is None:
+            return
+        point = (entry.get("dt", entry["dt_txt"]), value)
+        if self.first is None or point[0] < self.first[0]:
+            self.first = point
+        if self.last is None or point[0] >= self.last[0]:
+            self.last = point
+
+    def merge(self, other):
+        if other.first is not None and (self.first is None or other.first[0] < self.first[0]):
+            self.first = other.first
+        if other.last is not None and (self.last is None or other.last[0] >= self.last[0]):
+            self.last = other.last
+
+    def result(self):
+        return round(self.last[1] - self.first[1], 2) if self.first is not None else None
+
+class TransitionCount(Accumulator):     # Entries whose temperature moved by `threshold` or more since the previous entry
+    def __init__(self, threshold=3):
+        self.threshold = threshold      # In °C, i.e. 5.4 °F or 3 K once results are converted (see convert_results)
+        self.count = 0
+
+    def update(self, entry, previous):
+        if previous is not None and abs(entry["main"]["temp"] - previous["main"]["temp"]) >= self.threshold:
+            self.count += 1
+
+    def merge(self, other):
+        self.count += other.count
+
+    def result(self):
+        return self.count
+
+def precipitation(kind):        # 3h precipitation, only counted when the weather description mentions it
+    def extract(entry):
+        if kind in entry["weather"][0]["description"]:
+            return entry[kind]["3h"]
+        return 0
+    return extract
+
+class Metric:       # Registered metric: output keys per day and per period, and the accumulator factory
+    def __init__(self, day_key, period_key, factory, quantity=None):
+        self.day_key = day_key          # Key in each forecast_details entry, None for period-only metrics
+        self.period_key = period_key    # Key in the forecast summary, None for day-only metrics
+        self.factory = factory
+        self.quantity = quantity        # "temperature" or "speed" when the result depends on units
+
+METRICS = {
+    "rain": Metric("rain_cumul_mm", "total_rain_period_mm", lambda: Sum(precipitation("rain"))),
+    "snow": Metric("snow_cumul_mm", "total_snow_period_mm", lambda: Sum(precipitation("snow"))),
+    "transitions": Metric("major_transitions_count", None, lambda: TransitionCount()),
+    "humidity": Metric("max_humidity", "max_humidity_period", lambda: Max(lambda e: e["main"]["humidity"], empty=0)),
+    "temp_min": Metric("min_temp", "min_temp_period", lambda: Min(lambda e: e["main"]["temp"]), "temperature"),
+    "temp_max": Metric("max_temp", "max_temp_period", lambda: Max(lambda e: e["main"]["temp"]), "temperature"),
+    "temp_mean": Metric("mean_temp", "mean_temp_period", lambda: Mean(lambda e: e["main"]["temp"]), "temperature"),
+    "feels_like_min": Metric("min_feels_like", "min_feels_like_period", lambda: Min(lambda e: e["main"].get("feels_like")), "temperature"),
+    "feels_like_max": Metric("max_feels_like", "max_feels_like_period", lambda: Max(lambda e: e["main"].get("feels_like")), "temperature"),
+    "wind_max": Metric("max_wind_speed", "max_wind_speed_period", lambda: Max(lambda e: e.get("wind", {}).get("speed")), "speed"),
+    "pressure_trend": Metric("pressure_trend_hpa", "pressure_trend_period_hpa", lambda: Trend(lambda e: e["main"].get("pressure"))),
+    "pop_max": Metric("max_pop", "max_pop_period", lambda: Max(lambda e: e.get("pop"))),
+}
+
+DEFAULT_METRICS = ["rain", "snow", "transitions", "humidity", "temp_min", "temp_max"]
+
+QUANTITIES = {key: metric.quantity for metric in METRICS.values() for key in (metric.day_key, metric.period_key) if key}
+
+def convert_results(values, units):     # Metric results expressed in another unit system
+    # Min/max/mean are preserved by these monotonic linear conversions, and transition counts are unchanged
+    # because the threshold is converted along with the temperatures, so one metric pass serves every unit system.
+    units = unit_system(units) if isinstance(units, str) else units
+    if units.name == "metric":
+        return dict(values)
+    return {key: units.convert(QUANTITIES.get(key), value) for key, value in values.items()}
+
+class ForecastStats:        # Per-day and per-period accumulators for a selection of metrics, filled in a single pass
+    def __init__(self, metrics=None, previous=None):
+        self.metrics = list(metrics or DEFAULT_METRICS)
+        unknown = [name for name in self.metrics if name not in METRICS]
+        if unknown:
+            raise ValueError(f"Métriques inconnues : {', '.join(unknown)}")
+        self.previous = previous    # Entry preceding the first one, for chunks of a longer list
+        self.days = {}
+        self.period = self._accumulators("period_key")
+
+    def _accumulators(self, key):
+        return {name: METRICS[name].factory() for name in self.metrics if getattr(METRICS[name], key) is not None}
+
+    def update(self, entry):        # Feed one forecast entry
+        day = entry["dt_txt"][:10]
+        if day not in self.days:
+            self.days[day] = self._accumulators("day_key")
+        for accumulator in self.days[day].values():
+            accumulator.update(entry, self.previous)
+        for accumulator in self.period.values():
+            accumulator.update(entry, self.previous)
+        self.previous = entry
+
+    def update_all(self, entries):
+        for entry in entries:
+            self.update(entry)
+        return self
+
+    def iter_days(self, entries):       # Yield each day's summary as soon as the next day starts (entries in time order)
+        current = None
+        for entry in entries:
+            day = entry["dt_txt"][:10]
+            if current is not None and day != current:
+                yield self.day_result(current)
+                del self.days[current]      # Finished days are not kept
+            current = day
+            self.update(entry)
+        if current is not None:
+            yield self.day_result(current)
+            del self.days[current]
+
+    def merge(self, other):     # Combine with the stats of the entries following this chunk
+        for day, accumulators in other.days.items():
+            if day not in self.days:
+                self.days[day] = accumulators
+            else:
+                for name, accumulator in accumulators.items():
+                    self.days[day][name].merge(accumulator)
+        for name, accumulator in other.period.items():
+            self.period[name].merge(accumulator)
+        if other.previous is not None:
+            self.previous = other.previous
+        return self
+
+    def day_result(self, day):      # Summary of one day
+        detail = {"date_local": day}
+        for name, accumulator in self.days[day].items():
+            detail[METRICS[name].day_key] = accumulator.result()
+        return detail
+
+    def day_results(self):
+        return [self.day_result(day) for day in sorted(self.days)]
+
+    def period_results(self):
+        return {METRICS[name].period_key: accumulator.result() for name, accumulator in self.period.items()}
+
+class DailySummaries:       # Lazy iterator over daily summaries, period totals available once it is exhausted
+    def __init__(self, entries, metrics=None, units="metric"):
+        self.stats = ForecastStats(metrics)
+        self.metrics = self.stats.metrics
+        self.units = unit_system(units)
+        self.totals = None      # Period results, set when the last day has been yielded
+        self._days = self.stats.iter_days(entries)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return convert_results(next(self._days), self.units)
+        except StopIteration:
+            if self.totals is None:
+                self.totals = convert_results(self.stats.period_results(), self.units)
+            raise
@@ -0,0 +1,135 @@
+# Threshold alerts evaluated as forecasts are processed
+# Rules are compiled into sorted threshold lists indexed by scope and field, so a value finds its matching rules by bisection.
+import json
+import time
+import bisect
+import threading
+from classes.Accumulators import QUANTITIES
+from classes.LocationCanonicalizer import LocationCanonicalizer
+
+OPERATORS = (">=", ">", "<=", "<")
+
+class AlertRule:        # One threshold on a daily or period field, for a city, a region or every location
+    def __init__(self, rule_id, field, threshold, op=">=", city=None, region=None):
+        if field not in QUANTITIES:
+            raise ValueError(f"Champ d'alerte inconnu : {field}")
+        if op not in OPERATORS:
+            raise ValueError(f"Opérateur d'alerte inconnu : {op} (attendu : {', '.join(OPERATORS)})")
+        self.rule_id = rule_id
+        self.field = field
+        self.threshold = threshold
+        self.op = op
+        self.city = city        # "ville,code_pays", replaced by its location id once the rule joins an AlertEngine
+        self.region = region    # Region name from the region map, or a country code
+
+    @classmethod
+    def from_dict(cls, data, default_id=None):
+        return cls(data.get("id", default_id), data["field"], data["threshold"], data.get("op", ">="),
+                   data.get("city"), data.get("region"))
+
+    def scope(self):        # Index key: ("city", key), ("region", name) or ("global", None)
+        if self.city is not None:
+            return ("city", self.city)
+        if self.region is not None:
+            return ("region", self.region)
+        return ("global", None)
+
+class AlertEngine:      # Indexed rule set, usable as a BatchRunner consumer
+    def __init__(self, rules, region_map=None, callback=None, output_path=None, canonicalizer=None):
+        self.canonicalizer = canonicalizer or LocationCanonicalizer()      # The batch's own, so rule cities match its keys
+        self.region_map = self.canonicalizer.canonical_keys(region_map or {})    # Same format as RegionalRollup:
+                                                                                  # location id or "code_pays" -> region
+        self.callback = callback            # Called with each match
+        self.output_path = output_path      # Matches appended as JSON lines
+        self.lock = threading.Lock()
+        self.rules = [rule if isinstance(rule, AlertRule) else AlertRule.from_dict(rule, index) for index, rule in enumerate(rules)]
+        for rule in self.rules:
+            if rule.city is not None:
+                rule.city = self._canonical_city(rule)
+        self.index = self._compile(self.rules)
+        self.counters = {"forecasts": 0, "lookups": 0, "matches": 0, "evaluation_s": 0.0}
+
+    @classmethod
+    def from_file(cls, path, **options):       # JSON list of rules, or {"rules": [...]}
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["rules"] if isinstance(data, dict) else data, **options)
+
+    def _canonical_city(self, rule):       # "saint-étienne,fr" -> "saint-etienne_fr", whichever spelling the batch uses
+        try:
+            return self.canonicalizer.location_id(rule.city)
+        except ValueError as e:
+            raise ValueError(f"Ville invalide dans la règle d'alerte {rule.rule_id} : {e}") from e
+
+    @staticmethod
+    def _compile(rules):       # (scope, field, op) -> (ascending thresholds, rules in the same order)
+        grouped = {}
+        for rule in rules:
+            grouped.setdefault((rule.scope(), rule.field, rule.op), []).append(rule)
+        index = {}
+        for key, group in grouped.items():
+            group.sort(key=lambda rule: rule.threshold)
+            index.setdefault(key[1], {})[(key[0], key[2])] = ([rule.threshold for rule in group], group)
+        return index        # field -> {(scope, op): (thresholds, rules)}
+
+    @staticmethod
+    def _matching(thresholds, rules, op, value):       # Rules satisfied by value, found by bisection
+        if op == ">=":
+            return rules[:bisect.bisect_right(thresholds, value)]
+        if op == ">":
+            return rules[:bisect.bisect_left(thresholds, value)]
+        if op == "<=":
+            return rules[bisect.bisect_left(thresholds, value):]
+        return rules[bisect.bisect_right(thresholds, value):]
+
+    def region_for(self, location, country_code, result):
+        country = result.get("country_code") or country_code
+        return self.region_map.get(self.canonicalizer.city_key(location, country_code)) or self.region_map.get(country) or country
+
+    def evaluate(self, location, country_code, result):       # Matches for one processed forecast
+        key = f"{location},{country_code}"
+        region = self.region_for(location, country_code, result)
+        scopes = (("city", self.canonicalizer.city_key(location, country_code)), ("region", region), ("global", None))
+        records = [(None, result)] + [(detail.get("date_local"), detail) for detail in result.get("forecast_details", [])]
+        matches = []
+        lookups = 0
+        for date, values in records:
+            for field, groups in self.index.items():        # Only fields that have rules are looked at
+                value = values.get(field)
+                if value is None:
+                    continue
+                for scope in scopes:
+                    for op in OPERATORS:
+                        group = groups.get((scope, op))
+                        if group is None:
+                            continue
+                        lookups += 1
+                        for rule in self._matching(group[0], group[1], op, value):
+                            matches.append({"rule": rule.rule_id, "location": key, "region": region, "date": date,
+                                            "field": field, "value": value, "op": op, "threshold": rule.threshold})
+        return matches, lookups
+
+    def consume(self, location, country_code, result):      # Evaluate inline and emit the matches
+        started = time.perf_counter()
+        matches, lookups = self.evaluate(location, country_code, result)
+        elapsed = time.perf_counter() - started
+        with self.lock:
+            self.counters["forecasts"] += 1
+            self.counters["lookups"] += lookups
+            self.counters["matches"] += len(matches)
+            self.counters["evaluation_s"] += elapsed
+            if matches and self.output_path:
+                with open(self.output_path, "a", encoding="utf-8") as f:
+                    for match in matches:
+                        f.write(json.dumps(match) + "\n")
+            if self.callback is not None:
+                for match in matches:
+                    self.callback(match)
+        return matches
+
+    def stats(self):
+        with self.lock:
+            counters = dict(self.counters)
+        counters["rules"] = len(self.rules)
+        counters["evaluation_s"] = round(counters["evaluation_s"], 4)
+        return counters
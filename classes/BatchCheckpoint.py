@@ -0,0 +1,42 @@
+# Checkpoint file for batch runs
+# Records per-location completion as JSON lines so an interrupted batch can resume the remaining work.
+import os
+import json
+import threading
+
+class BatchCheckpoint:      # Append-only record of completed and permanently failed locations
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+
+    def load(self):     # Return {location key: status} for every location already handled
+        completed = {}
+        if not os.path.exists(self.path):
+            return completed
+        with open(self.path, "r") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:     # Last line may be truncated by a crash
+                    continue
+                completed[entry["key"]] = entry["status"]
+        return completed
+
+    def record(self, key, status, error=None):      # Append one location result and flush it to disk
+        entry = {"key": key, "status": status}
+        if error is not None:
+            entry["error"] = error
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self.lock:
+            with open(self.path, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+                f.flush()
+
+    def reset(self):        # Forget every recorded location, once a run has handled all of them
+        if os.path.exists(self.path):
+            os.remove(self.path)
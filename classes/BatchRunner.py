@@ -0,0 +1,210 @@
+# Batch runner for many locations
+# Fetches, processes and writes forecasts through a staged pipeline and checkpoints each location so a failed run can resume.
+import os
+import json
+import threading
+import requests
+from classes.WeatherForecast import WeatherForecast
+from classes.Transport import RequestsTransport
+from classes.BatchCheckpoint import BatchCheckpoint
+from classes.FingerprintStore import FingerprintStore
+from classes.APIKeyPool import KeyPoolExhausted
+from classes.Pipeline import Pipeline, Stage
+from classes.Units import unit_system
+from classes.Accumulators import ForecastStats
+
+class QuotaExhausted(Exception):    # Raised when the API rejects the key (401) or the quota is exhausted (429)
+    pass
+
+class BatchRunner:      # Resumable batch of forecast retrievals
+    QUOTA_STATUSES = (401, 429)
+
+    def __init__(self, locations, api_key, checkpoint_path="checkpoint.jsonl", output_dir="json",
+                 fetch_workers=4, process_workers=1, write_workers=1, queue_size=16, transport=None, base_url=None,
+                 fingerprint_path=None, metrics=None, key_pool=None, consumers=(), profiler=None,
+                 raw_archive_dir=None, units=("metric",), cache=None, canonicalizer=None):
+        self.locations = locations      # Iterable of (location, country_code)
+        self.canonicalizer = canonicalizer      # LocationCanonicalizer: spelling variants collapse before any fetch
+        self.api_key = api_key
+        self.key_pool = key_pool    # Rotates several keys so throughput scales with the number of keys
+        self.checkpoint = BatchCheckpoint(checkpoint_path)
+        self.output_dir = output_dir
+        self.fetch_workers = fetch_workers
+        self.process_workers = process_workers
+        self.write_workers = write_workers
+        self.queue_size = queue_size    # Bound between stages: a slow writer stalls fetches instead of buffering everything
+        self.transport = transport if transport is not None else RequestsTransport()    # Shared so its counters cover the batch
+        self.raw_archive_dir = raw_archive_dir    # Keep compressed raw responses for bandwidth-free replays
+        self.base_url = base_url
+        self.cache = cache      # ForecastCache or SharedForecastCache: batches and workers sharing it fetch each city once
+        self.profiler = profiler    # Optional Profiler, each pipeline stage is attributed separately
+        self.consumers = list(consumers)    # Objects with consume(location, country_code, result), e.g. RegionalRollup;
+                                        # restore() if defined receives results already written by an interrupted run
+        self.metrics = metrics      # Metrics computed by process_forecast, defaults to DEFAULT_METRICS
+        self.metric_names = ForecastStats(metrics).metrics      # Unknown names fail here, before any location is fetched
+        self.units = [unit_system(name).name for name in units]     # Unit systems written per location, all derived from one metric fetch
+        self.fingerprints = FingerprintStore(fingerprint_path) if fingerprint_path else None    # Skips unchanged payloads
+        self.lock = threading.Lock()
+        self.pipeline = None
+        self.summary = None
+
+    @staticmethod
+    def location_key(location, country_code):     # Key identifying a location in the checkpoint
+        return f"{location},{country_code}"
+
+    @staticmethod
+    def output_filename(location, country_code, units="metric"):     # Output file name, same scheme as WeatherApp for metric
+        suffix = "" if units == "metric" else f"_{units}"
+        return f"{location}_{country_code}{suffix}.json"
+
+    def _fail(self, key, error, permanent):     # Permanent failures are checkpointed, transient ones are retried on resume
+        if permanent:
+            self.checkpoint.record(key, "failed", str(error))
+        with self.lock:
+            self.summary["failed"] += 1
+            self.summary["errors"][key] = str(error)
+
+    def _on_error(self, stage, item, error):     # Classify a stage failure
+        key = self.location_key(item[0], item[1])
+        if isinstance(error, QuotaExhausted):
+            self.pipeline.stop()    # Leave the remaining locations for the next run
+            with self.lock:
+                self.summary["aborted"] = str(error)
+        elif isinstance(error, requests.exceptions.HTTPError):
+            status = error.response.status_code if error.response is not None else None
+            self._fail(key, error, permanent=status == 404)
+        elif isinstance(error, requests.exceptions.RequestException) or stage == "write":
+            self._fail(key, error, permanent=False)
+        else:       # API error payload ("Erreur API", missing list) or unprocessable data
+            self._fail(key, error, permanent=True)
+
+    def _validators(self, location, country_code):     # Previous fingerprint, only trusted while its output files still exist
+        if self.fingerprints is None:                   # and were computed with the same metrics
+            return None
+        for units in self.units:
+            if not os.path.exists(os.path.join(self.output_dir, self.output_filename(location, country_code, units))):
+                return None
+        validators = self.fingerprints.get(self.location_key(location, country_code))
+        if validators is None or validators.get("metrics") != self.metric_names:
+            return None
+        return validators
+
+    def _fetch(self, item):     # Stage 1: network fetch, unchanged payloads stop here
+        location, country_code = item
+        key = self.location_key(location, country_code)
+        forecast = WeatherForecast(location, country_code, self.api_key, transport=self.transport, base_url=self.base_url,
+                                   validators=self._validators(location, country_code), key_pool=self.key_pool,
+                                   raw_archive_dir=self.raw_archive_dir, cache=self.cache)
+        try:
+            forecast.get_forecast()
+        except KeyPoolExhausted as e:
+            raise QuotaExhausted(str(e)) from e
+        except requests.exceptions.HTTPError as e:
+            status = e.response.status_code if e.response is not None else None
+            if status in self.QUOTA_STATUSES:
+                raise QuotaExhausted(f"Quota ou clé API refusé ({status})") from e
+            raise
+        if forecast.unchanged:      # Output file already holds this payload: skip processing and rewriting
+            if self.consumers:
+                with open(os.path.join(self.output_dir, self.output_filename(location, country_code, self.units[0])), "r") as f:
+                    self._notify(location, country_code, json.load(f))
+            self.checkpoint.record(key, "unchanged")
+            with self.lock:
+                self.summary["unchanged"] += 1
+            return None
+        return location, country_code, forecast
+
+    def _notify(self, location, country_code, result):     # Stream a processed result to the consumers
+        for consumer in self.consumers:
+            consumer.consume(location, country_code, result)
+
+    def _restore(self, location, country_code):      # Hand a result written by the interrupted run to consumers keeping state
+        consumers = [consumer for consumer in self.consumers if hasattr(consumer, "restore")]
+        if not consumers:
+            return
+        path = os.path.join(self.output_dir, self.output_filename(location, country_code, self.units[0]))
+        if not os.path.exists(path):
+            self.summary["not_restored"] += 1
+            return
+        with open(path, "r") as f:
+            result = json.load(f)
+        for consumer in consumers:
+            consumer.restore(location, country_code, result)
+
+    def _process(self, item):       # Stage 2: aggregation, one metric pass converted to each unit system
+        location, country_code, forecast = item
+        return location, country_code, forecast, {units: forecast.process_forecast(self.metrics, units) for units in self.units}
+
+    def _write(self, item):     # Stage 3: output files and checkpoint
+        location, country_code, forecast, results = item
+        key = self.location_key(location, country_code)
+        for units, result in results.items():
+            forecast.save_forecast(self.output_filename(location, country_code, units), result, self.output_dir)
+        self._notify(location, country_code, results[self.units[0]])
+        if forecast.from_fallback:      # Old payload replayed by the circuit breaker: written, but fetched again on resume
+            with self.lock:
+                self.summary["fallbacks"] += 1
+                self.summary["fallback_locations"].append(key)
+            return item
+        if self.fingerprints is not None:
+            self.fingerprints.update(key, forecast.fingerprint, forecast.etag, forecast.last_modified, self.metric_names)
+        self.checkpoint.record(key, "done")
+        with self.lock:
+            self.summary["done"] += 1
+        return item
+
+    def run(self):      # Run the batch over the locations not yet in the checkpoint and return a summary
+        completed = self.checkpoint.load()
+        pending = []
+        seen = set()
+        self.summary = {"total": 0, "skipped": 0, "done": 0, "unchanged": 0, "failed": 0, "remaining": 0, "aborted": None,
+                        "duplicates": 0, "not_restored": 0, "fallbacks": 0, "fallback_locations": [], "errors": {}}
+        locations = self.locations
+        if self.canonicalizer is not None:
+            locations, self.summary["duplicates"], invalid = self.canonicalizer.dedupe(locations)
+            for (location, country_code), error in invalid:     # Never fetched, recorded like any permanent failure
+                key = self.location_key(location, country_code)
+                if key not in seen:
+                    seen.add(key)
+                    self.summary["total"] += 1
+                    self._fail(key, error, permanent=True)
+        for location, country_code in locations:
+            key = self.location_key(location, country_code)
+            if key in seen:
+                continue
+            seen.add(key)
+            self.summary["total"] += 1
+            if key in completed:
+                self.summary["skipped"] += 1
+                if completed[key] in ("done", "unchanged"):     # A resumed rollup still covers the whole list
+                    self._restore(location, country_code)
+            else:
+                pending.append((location, country_code))
+
+        fetch, process, write = self._fetch, self._process, self._write
+        if self.profiler is not None:
+            fetch = self.profiler.wrap("fetch", fetch)
+            process = self.profiler.wrap("process_forecast", process)
+            write = self.profiler.wrap("save_forecast", write)
+        self.pipeline = Pipeline([
+            Stage("fetch", fetch, self.fetch_workers, self.queue_size),
+            Stage("process", process, self.process_workers, self.queue_size),
+            Stage("write", write, self.write_workers, self.queue_size),
+        ], on_error=self._on_error)
+        try:
+            self.summary["pipeline"] = self.pipeline.run(pending)
+        finally:
+            if self.fingerprints is not None:
+                self.fingerprints.save()
+
+        if hasattr(self.transport, "stats"):
+            self.summary["transfer"] = self.transport.stats()
+        if self.cache is not None:
+            self.summary["cache"] = self.cache.stats()
+        if self.key_pool is not None:
+            self.summary["keys"] = self.key_pool.stats()
+        completed = self.checkpoint.load()
+        self.summary["remaining"] = sum(1 for key in seen if key not in completed)     # Transient failures, fallbacks and aborted work
+        if self.summary["remaining"] == 0:      # Finished: only an interrupted run resumes, the next one refreshes everything
+            self.checkpoint.reset()
+        return self.summary
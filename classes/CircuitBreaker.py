@@ -0,0 +1,112 @@
+# Circuit breaker around another transport
+# Stops calling an upstream whose recent error rate crossed a threshold, failing fast or replaying the last good response.
+import time
+import threading
+from collections import deque, OrderedDict
+import requests
+from classes.Transport import Transport, RequestsTransport
+
+class CircuitOpen(requests.exceptions.ConnectionError):     # Raised instead of calling the upstream; treated as a network error
+    pass
+
+class CircuitBreaker(Transport):        # closed -> open on errors -> half-open after reset_timeout -> closed on success
+    FALLBACK_PARAMS = ("appid",)     # Ignored when matching a request with a remembered response
+
+    def __init__(self, transport=None, failure_threshold=0.5, window=20, min_calls=5, reset_timeout=30, fallback=True,
+                 clock=time.monotonic, count_throttling=True, max_fallbacks=1000, max_fallback_age=3600):
+        self.transport = transport if transport is not None else RequestsTransport()
+        self.count_throttling = count_throttling    # False when a key pool rotates: a 429 benches one key, the upstream is fine
+        self.failure_threshold = failure_threshold      # Error rate over the window that opens the circuit
+        self.window = deque(maxlen=window)      # Outcomes of the last calls, True for a failure
+        self.min_calls = min_calls      # Calls needed in the window before the rate is trusted
+        self.reset_timeout = reset_timeout      # Seconds the circuit stays open before a trial call
+        self.fallback = fallback        # Serve the last good response of a request while open
+        self.max_fallbacks = max_fallbacks      # Responses remembered, the least recently stored are dropped beyond this count
+        self.max_fallback_age = max_fallback_age    # Seconds after which a remembered response is too old to be served
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.state = "closed"
+        self.opened_at = None
+        self.trial_in_flight = False
+        self.last_good = OrderedDict()      # Request signature -> (last successful response, stored at), oldest first
+        self.counters = {"calls": 0, "failures": 0, "opened": 0, "rejected": 0, "fallbacks": 0, "stale_fallbacks": 0}
+
+    def is_failure(self, response):       # Upstream errors and throttling, not client errors such as 404
+        return response.status_code >= 500 or (response.status_code == 429 and self.count_throttling)
+
+    def _signature(self, url, params):
+        return url, tuple(sorted((key, value) for key, value in (params or {}).items() if key not in self.FALLBACK_PARAMS))
+
+    def _admit(self):       # Whether a call may go upstream now
+        with self.lock:
+            if self.state == "open" and self.clock() - self.opened_at >= self.reset_timeout:
+                self.state = "half_open"
+            if self.state == "closed":
+                return True
+            if self.state == "half_open" and not self.trial_in_flight:
+                self.trial_in_flight = True     # One trial call decides whether to close again
+                return True
+            self.counters["rejected"] += 1
+            return False
+
+    def _record(self, failed):
+        with self.lock:
+            self.counters["calls"] += 1
+            self.counters["failures"] += failed
+            if self.state == "half_open":
+                self.trial_in_flight = False
+                if failed:
+                    self._open()
+                else:
+                    self.state = "closed"
+                    self.window.clear()
+                return
+            self.window.append(failed)
+            if (self.state == "closed" and len(self.window) >= self.min_calls
+                    and sum(self.window) / len(self.window) >= self.failure_threshold):
+                self._open()
+
+    def _open(self):
+        self.state = "open"
+        self.opened_at = self.clock()
+        self.counters["opened"] += 1
+
+    def get(self, url, params=None, headers=None):
+        signature = self._signature(url, params)
+        if not self._admit():
+            with self.lock:
+                response = self._fallback(signature) if self.fallback else None
+            if response is not None:
+                response.from_fallback = True
+                return response
+            raise CircuitOpen("Circuit ouvert : serveur en erreur, requête non envoyée")
+        try:
+            response = self.transport.get(url, params=params, headers=headers)
+        except Exception:
+            self._record(True)
+            raise
+        self._record(self.is_failure(response))
+        if response.status_code == 200 and self.fallback:
+            with self.lock:
+                self.last_good[signature] = (response, self.clock())
+                self.last_good.move_to_end(signature)
+                while len(self.last_good) > self.max_fallbacks:
+                    self.last_good.popitem(last=False)
+        return response
+
+    def _fallback(self, signature):     # Remembered response still young enough to be served, or None (lock held)
+        entry = self.last_good.get(signature)
+        if entry is None:
+            return None
+        if self.clock() - entry[1] > self.max_fallback_age:
+            del self.last_good[signature]
+            self.counters["stale_fallbacks"] += 1
+            return None
+        self.counters["fallbacks"] += 1
+        return entry[0]
+
+    def stats(self):        # Inner transport counters plus breaker state and counters
+        stats = dict(self.transport.stats()) if hasattr(self.transport, "stats") else {}
+        with self.lock:
+            stats["circuit"] = {**self.counters, "state": self.state}
+        return stats
@@ -0,0 +1,32 @@
+# Persistent store of payload fingerprints
+# Remembers, per location, the hash of the last processed forecast list and the upstream ETag/Last-Modified validators.
+import os
+import json
+import threading
+
+class FingerprintStore:     # {location key: {"fingerprint", "etag", "last_modified", "metrics"}} saved as JSON
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                self.entries = json.load(f)
+
+    def get(self, key):     # Validators of the last written payload for a location, or None
+        with self.lock:
+            return self.entries.get(key)
+
+    def update(self, key, fingerprint, etag=None, last_modified=None, metrics=None):     # metrics: selection the output was computed with
+        with self.lock:
+            self.entries[key] = {"fingerprint": fingerprint, "etag": etag, "last_modified": last_modified, "metrics": metrics}
+
+    def save(self):     # Write atomically so an interrupted run never leaves a truncated store
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with self.lock:
+            with open(tmp_path, "w") as f:
+                json.dump(self.entries, f)
+        os.replace(tmp_path, self.path)
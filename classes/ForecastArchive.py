@@ -0,0 +1,209 @@
+# Append-only binary archive of daily forecast summaries
+# Fixed-size records are appended to a data file and read back through mmap, a JSON sidecar indexes them by location and date.
+import os
+import mmap
+import json
+import struct
+import datetime
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl        # POSIX advisory locks: several processes may append to one archive
+except ImportError:     # Windows: a single writing process at a time
+    fcntl = None
+
+class ForecastArchive:      # Append-only archive of daily summaries with a location/date index
+    # date ordinal, location id, rain, snow, transitions, humidity, padding, min temp, max temp
+    RECORD = struct.Struct("<IIffHBxff")
+
+    def __init__(self, directory="archive", name="forecasts"):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.data_path = os.path.join(directory, f"{name}.bin")
+        self.index_path = os.path.join(directory, f"{name}.idx.json")
+        self.locations_path = os.path.join(directory, f"{name}.locations.jsonl")     # New location ids, logged before their records
+        self.location_ids = {}      # location key -> location id
+        self.index = {}             # location id -> {date ordinal: record number}
+        self.record_count = 0
+        self.lock = threading.Lock()        # One writer at a time when used as a BatchRunner consumer
+        self._locations_offset = 0      # Bytes of the locations log already replayed
+        self._mmap = None
+        self._mmap_size = 0
+        self._file = open(self.data_path, "ab")
+        with self._exclusive():
+            self._load_index()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @staticmethod
+    def location_key(location, country_code):     # Key under which a location is indexed
+        return f"{location},{country_code}"
+
+    @contextmanager
+    def _exclusive(self):       # Held across processes while ids are assigned, records appended or the index saved
+        if fcntl is not None:
+            fcntl.flock(self._file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(self._file, fcntl.LOCK_UN)
+
+    def _load_index(self):      # Load the sidecar index then catch up on records appended after it was written
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "r") as f:
+                saved = json.load(f)
+            self.location_ids = saved["locations"]
+            self.index = {
+                int(location_id): {int(date): recno for date, recno in dates.items()}
+                for location_id, dates in saved["records"].items()
+            }
+            self.record_count = saved["record_count"]
+        self._catch_up()
+
+    def _catch_up(self):        # Under the lock: replay ids and records other writers appended, drop a crash's torn tail
+        if os.path.exists(self.locations_path):     # Ids assigned after the last index save
+            with open(self.locations_path, "rb") as f:
+                f.seek(self._locations_offset)
+                tail = f.read()
+            complete = tail[:tail.rfind(b"\n") + 1]
+            for line in complete.splitlines():
+                entry = json.loads(line)
+                self.location_ids[entry["key"]] = entry["id"]
+            self._locations_offset += len(complete)
+            if len(complete) < len(tail):       # Line cut by a crash: the next id must start on a fresh line
+                os.truncate(self.locations_path, self._locations_offset)
+
+        self._file.flush()
+        data_size = os.path.getsize(self.data_path)
+        total_records = data_size // self.RECORD.size
+        if data_size != total_records * self.RECORD.size:       # Record cut by a crash: later appends stay aligned
+            os.truncate(self.data_path, total_records * self.RECORD.size)
+        if total_records > self.record_count:
+            with open(self.data_path, "rb") as f:
+                f.seek(self.record_count * self.RECORD.size)
+                tail = f.read((total_records - self.record_count) * self.RECORD.size)
+            for offset, record in enumerate(self.RECORD.iter_unpack(tail)):
+                self.index.setdefault(record[1], {})[record[0]] = self.record_count + offset
+            self.record_count = total_records
+
+    def save_index(self):       # Persist the index next to the data file
+        with self._exclusive():
+            self._catch_up()
+            self._save_index()
+
+    def _save_index(self):
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "record_count": self.record_count,
+                "locations": self.location_ids,
+                "records": {
+                    str(location_id): {str(date): recno for date, recno in dates.items()}
+                    for location_id, dates in self.index.items()
+                }
+            }, f)
+        os.replace(tmp_path, self.index_path)
+
+    def _location_id(self, key):        # Assign a stable id to a location the first time it is seen (lock held)
+        if key not in self.location_ids:
+            location_id = max(self.location_ids.values(), default=-1) + 1
+            entry = (json.dumps({"key": key, "id": location_id}) + "\n").encode("utf-8")
+            with open(self.locations_path, "ab") as f:      # Durable before any record carries the id
+                f.write(entry)
+                f.flush()
+                os.fsync(f.fileno())
+            self.location_ids[key] = location_id
+            self._locations_offset += len(entry)
+        return self.location_ids[key]
+
+    def append(self, location, country_code, forecast):     # Append the daily summaries of a processed forecast
+        with self.lock, self._exclusive():
+            self._catch_up()        # Other processes may have appended since: ids and record numbers follow theirs
+            location_id = self._location_id(self.location_key(location, country_code))
+            dates = self.index.setdefault(location_id, {})
+            for detail in forecast["forecast_details"]:
+                date = datetime.date.fromisoformat(detail["date_local"]).toordinal()
+                self._file.write(self.RECORD.pack(
+                    date,
+                    location_id,
+                    detail["rain_cumul_mm"],
+                    detail["snow_cumul_mm"],
+                    detail["major_transitions_count"],
+                    detail.get("max_humidity", 0),
+                    detail.get("min_temp", float('nan')),
+                    detail.get("max_temp", float('nan'))
+                ))
+                dates[date] = self.record_count     # Latest record for a date supersedes older ones
+                self.record_count += 1
+            self._file.flush()      # Whole records on disk before another writer takes the lock
+
+    def consume(self, location, country_code, result):      # BatchRunner consumer: every processed location is archived
+        self.append(location, country_code, result)
+
+    def _view(self):        # Map the data file, remapping only when records were appended since the last map
+        self._file.flush()
+        size = self.record_count * self.RECORD.size
+        if self._mmap is None or self._mmap_size != size:
+            if self._mmap is not None:
+                self._mmap.close()
+            self._mmap = None
+            if size == 0:
+                return None
+            with open(self.data_path, "rb") as f:
+                self._mmap = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+            self._mmap_size = size
+        return self._mmap
+
+    def _records(self, location_id, start_date, end_date):     # Yield (ordinal, record) pairs of a location within a date range
+        view = self._view()
+        dates = self.index.get(location_id)
+        if view is None or not dates:
+            return
+        start = start_date.toordinal() if start_date else 0
+        end = end_date.toordinal() if end_date else float('inf')
+        for date in sorted(dates):
+            if start <= date <= end:
+                yield date, self.RECORD.unpack_from(view, dates[date] * self.RECORD.size)
+
+    def query(self, location, country_code, start_date=None, end_date=None):     # Daily summaries of a location between two dates (inclusive)
+        location_id = self.location_ids.get(self.location_key(location, country_code))
+        if location_id is None:
+            return []
+        return [
+            {
+                "date_local": datetime.date.fromordinal(date).isoformat(),
+                "rain_cumul_mm": round(record[2], 2),
+                "snow_cumul_mm": round(record[3], 2),
+                "major_transitions_count": record[4],
+                "max_humidity": record[5],
+                "min_temp": round(record[6], 2),
+                "max_temp": round(record[7], 2)
+            }
+            for date, record in self._records(location_id, start_date, end_date)
+        ]
+
+    def rain_totals(self, locations, start_date=None, end_date=None):      # Total rain per location over a date range
+        totals = {}
+        for location, country_code in locations:
+            key = self.location_key(location, country_code)
+            location_id = self.location_ids.get(key)
+            if location_id is None:
+                continue
+            totals[key] = round(sum(record[2] for _, record in self._records(location_id, start_date, end_date)), 2)
+        return totals
+
+    def close(self):        # Flush the data file, persist the index and release the mapping
+        if self._file.closed:
+            return
+        with self.lock:
+            self.save_index()
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.close()
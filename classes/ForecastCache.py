@@ -0,0 +1,89 @@
+# In-memory cache of forecast payloads
+# Keeps each location's last payload with its fetch time so repeated lookups within the TTL skip the network.
+import time
+import threading
+from collections import OrderedDict
+
+class ForecastCache:        # Thread-safe payload and result cache with a time-to-live and LRU eviction
+    RESULT_PREFIX = "result:"      # Processed results (WeatherForecast.process_forecast), bounded apart from payloads
+
+    def __init__(self, ttl=600, clock=time.monotonic, max_entries=1000, max_results=None):
+        self.ttl = ttl          # Seconds a payload is served before a new fetch is needed (OpenWeatherMap updates ~10 min)
+        self.clock = clock      # Injectable for tests
+        self.max_entries = max_entries      # Payloads kept, the least recently used are evicted beyond this count
+        self.max_results = max_results if max_results is not None else 4 * max_entries     # Same bounds as SharedForecastCache
+        self.lock = threading.Lock()
+        self.partitions = {"payloads": OrderedDict(), "results": OrderedDict()}     # key -> (payload, stored_at), LRU first
+        self.key_locks = {}     # key -> threading.Lock held while that key is being fetched
+        self.counters = {"hits": 0, "misses": 0, "expired": 0, "stores": 0, "evictions": 0}
+
+    @staticmethod
+    def key(location, country_code):
+        return f"{location},{country_code}"
+
+    def _entries(self, key):        # Partition holding the key
+        return self.partitions["results" if key.startswith(self.RESULT_PREFIX) else "payloads"]
+
+    def _limit(self, entries):
+        return self.max_results if entries is self.partitions["results"] else self.max_entries
+
+    def _drop(self, entries, key):      # Remove an entry and its fetch lock unless a fetch holds it (lock held)
+        del entries[key]
+        key_lock = self.key_locks.get(key)
+        if key_lock is not None and not key_lock.locked():
+            del self.key_locks[key]
+
+    def get(self, key):     # Fresh payload or None
+        with self.lock:
+            entries = self._entries(key)
+            entry = entries.get(key)
+            if entry is not None and self.clock() - entry[1] >= self.ttl:
+                self._drop(entries, key)
+                self.counters["expired"] += 1
+                entry = None
+            if entry is not None:
+                entries.move_to_end(key)
+            self.counters["hits" if entry is not None else "misses"] += 1
+            return entry[0] if entry is not None else None
+
+    def put(self, key, payload):
+        with self.lock:
+            entries = self._entries(key)
+            entries[key] = (payload, self.clock())
+            entries.move_to_end(key)
+            self.counters["stores"] += 1
+            while len(entries) > self._limit(entries):
+                self._drop(entries, next(iter(entries)))
+                self.counters["evictions"] += 1
+
+    def age(self, key):     # Seconds since the payload was stored, None when absent (expired entries included)
+        with self.lock:
+            entry = self._entries(key).get(key)
+            return self.clock() - entry[1] if entry is not None else None
+
+    def fetch_lock(self, key):      # Per-key lock so concurrent misses on one location make a single fetch
+        with self.lock:
+            if key not in self.key_locks and len(self.key_locks) >= 2 * self.max_entries:
+                # Locks of failed fetches have no entry to be dropped with: sweep the idle ones
+                payloads = self.partitions["payloads"]
+                for other in [other for other, lock in self.key_locks.items() if other not in payloads and not lock.locked()]:
+                    del self.key_locks[other]
+            return self.key_locks.setdefault(key, threading.Lock())
+
+    def invalidate(self, key):
+        with self.lock:
+            entries = self._entries(key)
+            if key in entries:
+                self._drop(entries, key)
+
+    def __len__(self):
+        with self.lock:
+            return sum(len(entries) for entries in self.partitions.values())
+
+    def stats(self):
+        with self.lock:
+            counters = dict(self.counters)
+            counters["entries"] = sum(len(entries) for entries in self.partitions.values())
+        lookups = counters["hits"] + counters["misses"]
+        counters["hit_rate"] = round(counters["hits"] / lookups, 3) if lookups else None
+        return counters
@@ -3,7 +3,7 @@ from prettytable import PrettyTable
 
 class ForecastTable:    # Classe for displaying forecast data in a table
     def __init__(self, forecast_details):
-        self.forecast_details = forecast_details
+        self.forecast_details = forecast_details     # List or lazy iterable of daily summaries (WeatherForecast.iter_forecast)
         self.table = PrettyTable()
 
     def create_table(self):   # Create the table structure with headers and title
@@ -0,0 +1,79 @@
+# Hedged requests around another transport
+# When the first attempt is slow, a duplicate is sent and whichever answers first is used, within a budget of extra calls.
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from classes.Transport import Transport, RequestsTransport
+
+class HedgedTransport(Transport):       # Cuts tail latency by racing a second request against a slow first one
+    def __init__(self, transport=None, hedge_after=0.5, budget=0.1, max_workers=16, key_pool=None):
+        self.transport = transport if transport is not None else RequestsTransport()
+        self.hedge_after = hedge_after      # Seconds to wait for the first attempt before hedging
+        self.budget = budget                # Extra calls allowed, as a fraction of requests (0.1 = at most 10 % more calls)
+        self.key_pool = key_pool    # APIKeyPool: each duplicate takes and is charged to its own key instead of reusing appid
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hedge")
+        self.lock = threading.Lock()
+        self.counters = {"requests": 0, "hedged": 0, "hedge_wins": 0, "over_budget": 0, "no_key": 0}
+
+    def _may_hedge(self):       # Spend one unit of the hedge budget if any is left
+        with self.lock:
+            if self.counters["hedged"] + 1 > self.budget * self.counters["requests"]:
+                self.counters["over_budget"] += 1
+                return False
+            self.counters["hedged"] += 1
+            return True
+
+    def _hedge_key(self, params):      # Pooled key for the duplicate: None without a pool, False when no key has budget now
+        if self.key_pool is None or "appid" not in (params or {}):
+            return None
+        key = self.key_pool.acquire(block=False)
+        if key is None:
+            with self.lock:
+                self.counters["hedged"] -= 1        # The budget unit is given back, no call is made
+                self.counters["no_key"] += 1
+            return False
+        return key
+
+    def _send_hedge(self, url, params, headers, key):      # Duplicate request, charged to its own pooled key
+        if key is None:
+            return self.transport.get(url, params, headers)
+        try:
+            response = self.transport.get(url, {**params, "appid": key}, headers)
+        except Exception:
+            self.key_pool.release(key)
+            raise
+        self.key_pool.release(key, response.status_code)
+        return response
+
+    def get(self, url, params=None, headers=None):
+        with self.lock:
+            self.counters["requests"] += 1
+        primary = self.executor.submit(self.transport.get, url, params, headers)
+        done, _ = wait([primary], timeout=self.hedge_after)
+        if done or not self._may_hedge():
+            return primary.result()
+        key = self._hedge_key(params)
+        if key is False:
+            return primary.result()
+
+        hedge = self.executor.submit(self._send_hedge, url, params, headers, key)
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    error = future.exception()
+                elif future is hedge and key is not None and future.result().status_code in self.key_pool.BENCH_STATUSES:
+                    continue        # Refusal of the hedge's own key, already recorded: the caller would bench the primary's key
+                else:       # The slower attempt is left to finish in the background
+                    if future is hedge:
+                        with self.lock:
+                            self.counters["hedge_wins"] += 1
+                    return future.result()
+        raise error     # The primary failed and the hedge failed or was refused
+
+    def stats(self):        # Inner transport counters plus hedging counters
+        stats = dict(self.transport.stats()) if hasattr(self.transport, "stats") else {}
+        with self.lock:
+            stats["hedging"] = dict(self.counters)
+        return stats
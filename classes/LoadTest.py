@@ -0,0 +1,183 @@
+# Load and soak test harness
+# Drives the fetch or serve path at a fixed request rate for a fixed duration and reports latency percentiles, throughput, errors and RSS.
+import os
+import sys
+import json
+import math
+import time
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from classes.Transport import RequestsTransport
+from classes.ForecastCache import ForecastCache
+from classes.PrefetchScheduler import PrefetchScheduler
+from classes.WeatherForecast import WeatherForecast
+
+try:
+    import resource     # POSIX only, peak RSS when /proc is unavailable
+except ImportError:
+    resource = None
+
+def rss_mb():       # Current resident set size of this process in MB, None when it cannot be read
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return round(int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024, 1)
+    except (OSError, ValueError, IndexError):
+        pass
+    if resource is not None:        # Peak rather than current: kilobytes on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return round(peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024, 1)
+    return None
+
+def percentile(sorted_values, fraction):        # Nearest-rank percentile of an already sorted list
+    if not sorted_values:
+        return None
+    rank = math.ceil(round(fraction * len(sorted_values), 9))      # Rounding first keeps 0.95 * 100 at rank 95
+    return sorted_values[min(max(rank, 1), len(sorted_values)) - 1]
+
+def fetch_target(base_url, locations, api_key="stub_key", transport=None):     # Cold path: fetch and process every request
+    transport = transport if transport is not None else RequestsTransport(session=requests.Session())
+    def run(index):
+        location, country_code = locations[index % len(locations)]
+        forecast = WeatherForecast(location, country_code, api_key, transport=transport, base_url=base_url)
+        forecast.get_forecast()
+        forecast.process_forecast()
+    return run
+
+def serve_target(base_url, locations, api_key="stub_key", transport=None, ttl=600):     # Warm path: lookups through the cache
+    transport = transport if transport is not None else RequestsTransport(session=requests.Session())
+    scheduler = PrefetchScheduler(ForecastCache(ttl=ttl), api_key, transport=transport, base_url=base_url)
+    def run(index):
+        location, country_code = locations[index % len(locations)]
+        scheduler.forecast(location, country_code).process_forecast()
+    return run
+
+class LoadTest:     # Open-loop load generator: requests start on schedule whether or not earlier ones finished
+    THRESHOLDS = ("p50_ms", "p95_ms", "p99_ms", "error_rate", "min_throughput_per_s", "rss_growth_mb")
+
+    def __init__(self, target, rate=20, duration=10, workers=32, sample_every=1.0, thresholds=None):
+        unknown = [name for name in (thresholds or {}) if name not in self.THRESHOLDS]
+        if unknown:
+            raise ValueError(f"Seuils inconnus : {', '.join(unknown)}")
+        self.target = target        # Callable(index) performing one request
+        self.rate = rate            # Requests started per second
+        self.duration = duration    # Seconds of load
+        self.workers = workers      # Concurrent requests in flight at most
+        self.sample_every = sample_every    # Seconds between RSS samples
+        self.thresholds = thresholds or {}
+        self.lock = threading.Lock()
+        self.latencies = []
+        self.errors = Counter()
+        self.rss = []
+
+    def _call(self, index, scheduled):      # Latency is measured from the scheduled start, so queueing delays count
+        try:
+            self.target(index)
+        except Exception as e:
+            with self.lock:
+                self.errors[type(e).__name__] += 1
+            return
+        latency = time.perf_counter() - scheduled
+        with self.lock:
+            self.latencies.append(latency)
+
+    def _sample_rss(self, started, stop):
+        while True:
+            self.rss.append((round(time.perf_counter() - started, 1), rss_mb()))
+            if stop.wait(self.sample_every):
+                break
+
+    def run(self):      # Generate the load and return the report
+        started = time.perf_counter()
+        stop = threading.Event()
+        sampler = threading.Thread(target=self._sample_rss, args=(started, stop), daemon=True)
+        sampler.start()
+        total = int(self.rate * self.duration)
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="load") as executor:
+            for index in range(total):
+                scheduled = started + index / self.rate
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                executor.submit(self._call, index, scheduled)
+        elapsed = time.perf_counter() - started
+        stop.set()
+        sampler.join()
+        self.rss.append((round(elapsed, 1), rss_mb()))
+        return self.report(total, elapsed)
+
+    def report(self, total, elapsed):
+        latencies = sorted(self.latencies)
+        errors = sum(self.errors.values())
+        rss_values = [value for _, value in self.rss if value is not None]
+        report = {
+            "requests": total,
+            "completed": len(latencies),
+            "errors": errors,
+            "error_rate": round(errors / total, 4) if total else 0.0,
+            "errors_by_type": dict(self.errors),
+            "elapsed_s": round(elapsed, 2),
+            "throughput_per_s": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+            "latency_ms": {
+                name: round(value * 1000, 2) if value is not None else None
+                for name, value in (("p50", percentile(latencies, 0.50)), ("p95", percentile(latencies, 0.95)),
+                                    ("p99", percentile(latencies, 0.99)), ("max", latencies[-1] if latencies else None))
+            },
+            "rss_mb": self.rss,
+            "rss_growth_mb": round(rss_values[-1] - rss_values[0], 1) if rss_values else None,
+        }
+        report["violations"] = self.violations(report)
+        report["passed"] = not report["violations"]
+        return report
+
+    def violations(self, report):       # Thresholds exceeded by the report, as readable messages
+        measured = {
+            "p50_ms": report["latency_ms"]["p50"], "p95_ms": report["latency_ms"]["p95"], "p99_ms": report["latency_ms"]["p99"],
+            "error_rate": report["error_rate"], "rss_growth_mb": report["rss_growth_mb"],
+        }
+        violations = []
+        for name, limit in self.thresholds.items():
+            if name == "min_throughput_per_s":
+                if report["throughput_per_s"] < limit:
+                    violations.append(f"débit {report['throughput_per_s']}/s < {limit}/s")
+            elif measured[name] is None or measured[name] > limit:
+                violations.append(f"{name} {measured[name]} > {limit}")
+        return violations
+
+
+if __name__ == "__main__":     # python -m classes.LoadTest --path fetch --rate 50 --duration 30 --p99-ms 500
+    import argparse
+    from classes.StubServer import StubServer
+    parser = argparse.ArgumentParser(description="Test de charge contre le serveur factice")
+    parser.add_argument("--path", choices=("fetch", "serve"), default="fetch", help="fetch : requête et traitement ; serve : via le cache")
+    parser.add_argument("--rate", type=float, default=20, help="requêtes lancées par seconde")
+    parser.add_argument("--duration", type=float, default=10, help="durée en secondes")
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--locations", type=int, default=50, help="nombre de lieux distincts")
+    parser.add_argument("--latency", type=float, default=0.02, help="latence du serveur factice")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="taux d'erreurs du serveur factice")
+    parser.add_argument("--p50-ms", type=float)
+    parser.add_argument("--p95-ms", type=float)
+    parser.add_argument("--p99-ms", type=float)
+    parser.add_argument("--max-error-rate", type=float)
+    parser.add_argument("--min-throughput", type=float)
+    parser.add_argument("--max-rss-growth-mb", type=float)
+    parser.add_argument("--report", help="fichier JSON où écrire le rapport")
+    args = parser.parse_args()
+
+    thresholds = {name: value for name, value in (
+        ("p50_ms", args.p50_ms), ("p95_ms", args.p95_ms), ("p99_ms", args.p99_ms), ("error_rate", args.max_error_rate),
+        ("min_throughput_per_s", args.min_throughput), ("rss_growth_mb", args.max_rss_growth_mb)) if value is not None}
+    locations = [(f"Ville{index}", "FR") for index in range(args.locations)]
+    with StubServer(latency=args.latency, error_rate=args.error_rate, seed=42) as server:
+        target = (fetch_target if args.path == "fetch" else serve_target)(server.base_url, locations)
+        report = LoadTest(target, args.rate, args.duration, args.workers, thresholds=thresholds).run()
+
+    print(json.dumps({key: value for key, value in report.items() if key != "rss_mb"}, indent=4))
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=4)
+    if not report["passed"]:
+        print(f"Seuils dépassés : {'; '.join(report['violations'])}")
+        sys.exit(1)
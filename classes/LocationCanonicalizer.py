@@ -0,0 +1,125 @@
+# Canonical form of user and batch locations
+# Normalizes case and separators, applies aliases and validates once; accents are folded for the ids only, so equivalent spellings share one fetch, cache key and output file.
+import re
+import json
+import unicodedata
+
+class LocationCanonicalizer:        # Maps free-form (ville, code_pays) inputs to canonical names and stable ids
+    COUNTRY_CODE = re.compile(r"^[A-Z]{2}$")
+    CITY_PUNCTUATION = " .'-"       # Allowed in city names besides letters and digits of any script
+    SEPARATOR = re.compile(r"\s*[,/;|]\s*")     # "paris/fr", "Paris, FR", "paris;fr"
+    SPACES = re.compile(r"\s+")
+    NON_WORD = re.compile(r"[\W_]+")       # Unicode-aware: "Москва" keeps its letters in the id
+
+    def __init__(self, aliases=None):
+        self.aliases = {}       # Folded alias, optionally "alias,CC" -> (canonical name, country code or None)
+        for alias, target in (aliases or {}).items():
+            alias_name, _, alias_country = alias.partition(",")
+            target_name, _, target_country = target.partition(",")
+            key = self.fold(alias_name) + (f",{alias_country.strip().upper()}" if alias_country else "")
+            self.aliases[key] = (target_name.strip(), target_country.strip().upper() or None)
+        self.memo = {}      # Raw input -> (location id, country code), inputs repeat a lot in large lists
+        self.names = {}     # Location id -> preferred spelling among those seen (see _rank), whatever their order
+
+    @classmethod
+    def from_file(cls, path):       # JSON object {"alias" or "alias,CC": "Ville" or "Ville,CC"}
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    @classmethod
+    def fold(cls, text):        # Accent-free, case-folded, single-spaced
+        decomposed = unicodedata.normalize("NFKD", text)
+        stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+        return cls.SPACES.sub(" ", stripped.casefold().replace("’", "'")).strip()
+
+    @classmethod
+    def normalize(cls, text):       # Composed and single-spaced, letters and accents kept
+        return cls.SPACES.sub(" ", unicodedata.normalize("NFKC", text).replace("’", "'")).strip()
+
+    @classmethod
+    def valid_name(cls, name):      # Letters and digits of any script (Łódź, Tromsø, Москва), combining marks and . ' -
+        return name[:1].isalnum() and all(char.isalnum() or char in cls.CITY_PUNCTUATION
+                                          or unicodedata.category(char).startswith("M") for char in name)
+
+    @classmethod
+    def _id(cls, name, country):
+        return f"{cls.NON_WORD.sub('-', cls.fold(name)).strip('-')}_{country.lower()}"
+
+    @staticmethod
+    def _rank(name):        # Spellings of one id compare by accents kept, then by a fixed string order
+        return sum(1 for char in unicodedata.normalize("NFD", name) if unicodedata.combining(char)), name
+
+    @classmethod
+    def parse(cls, text):       # Split a single "ville,code_pays" string
+        location, _, country_code = cls.SEPARATOR.sub(",", text.strip()).rpartition(",")
+        return location, country_code
+
+    def canonicalize(self, location, country_code=None):       # (canonical name, country code), ValueError when invalid
+        if country_code is None:
+            location, country_code = self.parse(location)
+        raw = (location, country_code)
+        if raw in self.memo:
+            location_id, country = self.memo[raw]
+            return self.names[location_id], country
+
+        name = self.normalize(location or "")
+        country = (country_code or "").strip().upper()
+        if not name:
+            raise ValueError("Le nom de la ville est requis")
+        # Country code should be two letters (ISO-like)
+        if not self.COUNTRY_CODE.match(country):
+            raise ValueError("Le code pays doit être composé de 2 lettres")
+        if not self.valid_name(name):
+            raise ValueError(f"Nom de ville invalide : {location}")
+
+        folded = self.fold(name)        # Folding only keys the aliases and the id, the name keeps its letters
+        alias = self.aliases.get(f"{folded},{country}") or self.aliases.get(folded)
+        if alias is not None:
+            name, country = alias[0], alias[1] or country
+        else:
+            name = name.title()
+        location_id = self._id(name, country)
+        known = self.names.get(location_id)
+        if known is None or self._rank(name) > self._rank(known):
+            self.names[location_id] = name
+        self.memo[raw] = (location_id, country)
+        return self.names[location_id], country
+
+    def canonical_keys(self, mapping):      # {"ville,code_pays" or "code_pays": value} with city keys as location ids
+        canonical = {}
+        for key, value in mapping.items():
+            if "," in key:
+                try:
+                    key = self.location_id(key)
+                except ValueError as e:
+                    raise ValueError(f"Lieu invalide dans la table des régions ({key}) : {e}") from e
+            else:
+                key = key.strip().upper()
+            canonical[key] = value
+        return canonical
+
+    def location_id(self, location, country_code=None):        # Stable id, e.g. "saint-etienne_fr"
+        return self._id(*self.canonicalize(location, country_code))
+
+    def city_key(self, location, country_code):        # Key of a location in a canonical_keys() mapping, None when invalid
+        try:
+            return self.location_id(location, country_code)
+        except ValueError:
+            return None
+
+    def dedupe(self, locations):        # Canonical unique locations in first-seen order, duplicates and invalid inputs
+        unique = {}     # Location id -> country code, names are read once every spelling has been seen
+        duplicates = 0
+        invalid = []
+        for location, country_code in locations:
+            try:
+                name, country = self.canonicalize(location, country_code)
+            except ValueError as e:
+                invalid.append(((location, country_code), str(e)))
+                continue
+            location_id = self._id(name, country)
+            if location_id in unique:
+                duplicates += 1
+            else:
+                unique[location_id] = country
+        return [(self.names[location_id], country) for location_id, country in unique.items()], duplicates, invalid
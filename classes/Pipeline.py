@@ -0,0 +1,118 @@
+# Staged producer/consumer pipeline
+# Each stage runs in its own worker threads and hands items to the next stage through a bounded queue (backpressure).
+import time
+import queue
+import threading
+
+class Stage:        # One pipeline step: function applied to each item by a number of worker threads
+    def __init__(self, name, function, workers=1, queue_size=16):
+        self.name = name
+        self.function = function        # Returns the item for the next stage, or None to drop it
+        self.workers = workers
+        self.queue_size = queue_size    # Bound of the queue feeding this stage
+
+class Pipeline:     # Runs items through a chain of stages and reports end-to-end throughput
+    _DONE = object()    # Sentinel closing a stage queue
+
+    def __init__(self, stages, on_error=None):
+        self.stages = stages
+        self.on_error = on_error        # Called as on_error(stage_name, item, exception)
+        self.stopping = threading.Event()
+        self.lock = threading.Lock()
+        self.stats = None
+        self.handler_error = None       # First exception raised by on_error during a run
+
+    def stop(self):     # Stop feeding new items, items already in flight finish their stages
+        self.stopping.set()
+
+    def _feed(self, items, first_queue):
+        for item in items:
+            if self.stopping.is_set():
+                break
+            first_queue.put(item)
+            with self.lock:
+                self.stats["items_in"] += 1
+        for _ in range(self.stages[0].workers):
+            first_queue.put(self._DONE)
+
+    def _handle_error(self, stage, item, error):      # A failing on_error stops the run instead of killing the worker
+        if self.on_error is None:
+            return
+        try:
+            self.on_error(stage.name, item, error)
+        except Exception as e:
+            self.stop()
+            with self.lock:
+                if self.handler_error is None:
+                    self.handler_error = e      # Raised by run() once every stage has closed
+
+    def _work(self, index, queues, finished):
+        stage = self.stages[index]
+        inbox, outbox = queues[index], queues[index + 1]
+        stats = self.stats["stages"][stage.name]
+        try:
+            while True:
+                item = inbox.get()
+                if item is self._DONE:
+                    break
+                if index == 0 and self.stopping.is_set():      # Drain without starting new work
+                    continue
+                started = time.perf_counter()
+                try:
+                    result = stage.function(item)
+                except Exception as e:
+                    with self.lock:
+                        stats["errors"] += 1
+                    self._handle_error(stage, item, e)
+                    continue
+                finally:
+                    elapsed = time.perf_counter() - started
+                    with self.lock:
+                        stats["busy_s"] += elapsed
+                with self.lock:
+                    stats["processed"] += 1
+                if result is None:
+                    continue
+                if outbox is None:
+                    with self.lock:
+                        self.stats["items_out"] += 1
+                else:
+                    outbox.put(result)
+        finally:
+            with self.lock:     # Last worker of the stage closes the next one, even if this worker died
+                finished[index] += 1
+                last = finished[index] == stage.workers
+            if last and outbox is not None:
+                for _ in range(self.stages[index + 1].workers):
+                    outbox.put(self._DONE)
+
+    def run(self, items):       # Push every item through the stages and return run statistics
+        self.stopping.clear()
+        self.handler_error = None
+        self.stats = {
+            "items_in": 0,
+            "items_out": 0,
+            "stages": {stage.name: {"workers": stage.workers, "processed": 0, "errors": 0, "busy_s": 0.0}
+                       for stage in self.stages}
+        }
+        queues = [queue.Queue(maxsize=stage.queue_size) for stage in self.stages] + [None]
+        finished = [0] * len(self.stages)
+        threads = [threading.Thread(target=self._feed, args=(items, queues[0]), daemon=True)]
+        for index, stage in enumerate(self.stages):
+            threads += [threading.Thread(target=self._work, args=(index, queues, finished), daemon=True)
+                        for _ in range(stage.workers)]
+
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        self.stats["elapsed_s"] = round(elapsed, 3)
+        self.stats["throughput_per_s"] = round(self.stats["items_out"] / elapsed, 2) if elapsed > 0 else 0.0
+        for stats in self.stats["stages"].values():
+            stats["busy_s"] = round(stats["busy_s"], 3)
+        if self.handler_error is not None:
+            raise self.handler_error
+        return self.stats
@@ -0,0 +1,142 @@
+# Background warm-up of frequently requested locations
+# Counts lookups per location and refreshes the hottest cached forecasts shortly before they expire, within a call budget.
+import time
+import zlib
+import threading
+from collections import Counter
+from classes.WeatherForecast import WeatherForecast
+
+class PrefetchScheduler:        # Serves forecasts through a ForecastCache and keeps the top-N locations warm
+    def __init__(self, cache, api_key=None, key_pool=None, transport=None, base_url=None, top_n=10, refresh_ahead=0.2,
+                 calls_per_minute=30, burst=None, interval=1.0, decay_every=3600, clock=time.monotonic, canonicalizer=None):
+        self.cache = cache
+        self.api_key = api_key
+        self.key_pool = key_pool
+        self.transport = transport
+        self.base_url = base_url
+        self.top_n = top_n
+        self.refresh_ahead = refresh_ahead      # Fraction of the TTL before expiry in which a hot entry is refreshed
+        self.calls_per_minute = calls_per_minute    # Share of the API budget given to prefetching
+        self.burst = burst or max(1, calls_per_minute // 12)    # At most ~5 s of budget at once
+        self.interval = interval        # Seconds between background ticks
+        self.decay_every = decay_every  # Request counts are halved this often so hotness follows current demand
+        self.clock = clock
+        self.canonicalizer = canonicalizer      # Spelling variants of a location count towards one hot entry
+        self.lock = threading.Lock()
+        self.requests = Counter()
+        self.tokens = self.burst
+        self.last_refill = clock()
+        self.last_decay = clock()
+        self.counters = {"lookups": 0, "served_warm": 0, "served_cold": 0, "refreshes": 0, "deferred": 0,
+                         "refresh_errors": 0, "staleness_total_s": 0.0, "staleness_max_s": 0.0}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _forecast(self, location, country_code):
+        return WeatherForecast(location, country_code, self.api_key, transport=self.transport, base_url=self.base_url,
+                               key_pool=self.key_pool, cache=self.cache)
+
+    def forecast(self, location, country_code):     # Serve a forecast, recording the lookup for hotness
+        if self.canonicalizer is not None:
+            location, country_code = self.canonicalizer.canonicalize(location, country_code)
+        key = self.cache.key(location, country_code)
+        with self.lock:
+            self.requests[key] += 1
+        forecast = self._forecast(location, country_code)
+        forecast.get_forecast()
+        staleness = (self.cache.age(key) or 0.0) if forecast.from_cache else 0.0
+        with self.lock:
+            self.counters["lookups"] += 1
+            self.counters["served_warm" if forecast.from_cache else "served_cold"] += 1
+            self.counters["staleness_total_s"] += staleness
+            self.counters["staleness_max_s"] = max(self.counters["staleness_max_s"], staleness)
+        return forecast
+
+    def refresh_age(self, key):     # Age at which a hot entry is refreshed, spread per key to avoid refreshing all at once
+        spread = (zlib.crc32(key.encode("utf-8")) % 1000) / 1000
+        return self.cache.ttl * (1 - self.refresh_ahead * (0.5 + 0.5 * spread))
+
+    def hot(self):      # Most requested locations, hottest first
+        with self.lock:
+            return [key for key, _ in self.requests.most_common(self.top_n)]
+
+    def due(self):      # Hot locations missing from the cache or past their refresh age, most urgent first
+        due = []
+        for key in self.hot():
+            age = self.cache.age(key)
+            if age is None or age >= self.refresh_age(key):
+                due.append((float("inf") if age is None else age - self.refresh_age(key), key))
+        return [key for _, key in sorted(due, reverse=True)]
+
+    def _take_token(self):      # Token bucket refilled at calls_per_minute
+        now = self.clock()
+        self.tokens = min(self.burst, self.tokens + (now - self.last_refill) * self.calls_per_minute / 60)
+        self.last_refill = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def tick(self):     # Refresh what is due and affordable now, the rest waits for a later tick
+        now = self.clock()
+        with self.lock:
+            if now - self.last_decay >= self.decay_every:
+                self.requests = Counter({key: count // 2 for key, count in self.requests.items() if count // 2})
+                self.last_decay = now
+        refreshed = []
+        for key in self.due():
+            if not self._take_token():
+                with self.lock:
+                    self.counters["deferred"] += 1
+                continue
+            location, _, country_code = key.rpartition(",")
+            try:
+                self._forecast(location, country_code).get_forecast(refresh=True)
+            except Exception:       # A failed refresh leaves the entry to expire and be fetched on demand
+                with self.lock:
+                    self.counters["refresh_errors"] += 1
+                continue
+            with self.lock:
+                self.counters["refreshes"] += 1
+            refreshed.append(key)
+        return refreshed
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            self.tick()
+
+    def start(self):        # Run tick() in a background thread
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="prefetch", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def stats(self):        # Warm hit rate, staleness of served payloads and refresh activity
+        with self.lock:
+            counters = dict(self.counters)
+        lookups = counters["lookups"]
+        return {
+            "lookups": lookups,
+            "hit_rate": round(counters["served_warm"] / lookups, 3) if lookups else None,
+            "served_warm": counters["served_warm"],
+            "served_cold": counters["served_cold"],
+            "mean_staleness_s": round(counters["staleness_total_s"] / lookups, 2) if lookups else None,
+            "max_staleness_s": round(counters["staleness_max_s"], 2),
+            "refreshes": counters["refreshes"],
+            "deferred": counters["deferred"],
+            "refresh_errors": counters["refresh_errors"],
+            "hot": {key: self.cache.age(key) for key in self.hot()},
+            "cache": self.cache.stats()
+        }
@@ -0,0 +1,161 @@
+# Profiling mode for the application and batch runs
+# Runs the code under cProfile and tracemalloc, attributes time and allocations to named stages and writes a pstats file plus a hotspot report.
+import io
+import os
+import time
+import pstats
+import cProfile
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+class Profiler:     # cProfile + tracemalloc with per-stage attribution
+    def __init__(self, output_dir="profiles", top_n=15, trace_allocations=True, frames=32):
+        self.output_dir = output_dir
+        self.top_n = top_n
+        self.trace_allocations = trace_allocations
+        self.frames = frames        # Traceback depth kept per allocation, deep enough to reach the stage function
+        self.stage_code = {}        # Stage name -> {(filename, first line, last line)} of the functions given to wrap()
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.profiles = []      # One cProfile.Profile per thread that ran a stage, combined in the report
+        self.stages = {}
+        self.running = []       # Stage calls in progress, to detect allocations made by other threads meanwhile
+        self.started = None
+        self.elapsed = 0.0
+        self.snapshot = None
+
+    def _thread_profile(self):      # cProfile only sees the thread it is enabled in: one profile per thread
+        profile = getattr(self.local, "profile", None)
+        if profile is None:
+            profile = cProfile.Profile()
+            self.local.profile = profile
+            self.local.depth = 0
+            with self.lock:
+                self.profiles.append(profile)
+        return profile
+
+    def _enable(self):
+        profile = self._thread_profile()
+        if self.local.depth == 0:
+            try:
+                profile.enable()
+                self.local.enabled = True
+            except ValueError:      # Python 3.12+: one profiler per interpreter, already seeing every thread
+                self.local.enabled = False
+        self.local.depth += 1
+
+    def _disable(self):
+        self.local.depth -= 1
+        if self.local.depth == 0 and self.local.enabled:
+            self.local.profile.disable()
+
+    def start(self):        # Start profiling the calling thread
+        if self.trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        self.started = time.perf_counter()
+        self._enable()
+        return self
+
+    def stop(self):
+        self._disable()
+        self.elapsed = time.perf_counter() - self.started
+        if self.trace_allocations and tracemalloc.is_tracing():
+            self.snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            self._attribute_retained()
+
+    def _attribute_retained(self):      # Memory still held at the end, charged to every wrapped stage found in its traceback
+        # Unlike the per-call difference, this does not depend on which other threads were running at the same time
+        for name, ranges in self.stage_code.items():
+            filters = [tracemalloc.Filter(True, filename, lineno, all_frames=True)
+                       for filename, first, last in ranges for lineno in range(first, last + 1)]
+            retained = sum(trace.size for trace in self.snapshot.filter_traces(filters).traces)
+            self.stages.setdefault(name, {"calls": 0, "total_s": 0.0, "allocated_bytes": 0, "shared_calls": 0})["retained_bytes"] = retained
+
+    @contextmanager
+    def stage(self, name):      # Attribute the time and net allocations of a block to a stage
+        # tracemalloc counts the whole process: a call overlapping another thread's stage cannot own the difference,
+        # so its allocations are left out and counted as shared instead of being charged to the wrong stage
+        self._enable()
+        call = {"thread": threading.get_ident(), "shared": False}
+        with self.lock:
+            for other in self.running:
+                if other["thread"] != call["thread"]:
+                    other["shared"] = call["shared"] = True
+            self.running.append(call)
+        memory_before = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            allocated = (tracemalloc.get_traced_memory()[0] - memory_before) if tracemalloc.is_tracing() else 0
+            self._disable()
+            with self.lock:
+                self.running.remove(call)
+                stats = self.stages.setdefault(name, {"calls": 0, "total_s": 0.0, "allocated_bytes": 0, "shared_calls": 0})
+                stats["calls"] += 1
+                stats["total_s"] += elapsed
+                if call["shared"]:
+                    stats["shared_calls"] += 1
+                else:
+                    stats["allocated_bytes"] += allocated
+
+    def wrap(self, name, function):     # Same as stage() for a function, e.g. a pipeline stage
+        code = getattr(getattr(function, "__func__", function), "__code__", None)
+        if code is not None:        # Its lines identify the stage in allocation tracebacks
+            last = max((line for _, _, line in code.co_lines() if line is not None), default=code.co_firstlineno)
+            with self.lock:
+                self.stage_code.setdefault(name, set()).add((code.co_filename, code.co_firstlineno, last))
+
+        def profiled(*args, **kwargs):
+            with self.stage(name):
+                return function(*args, **kwargs)
+        return profiled
+
+    def _combined_stats(self, stream):
+        profiles = [profile for profile in self.profiles if profile.getstats()]
+        if not profiles:
+            return None
+        stats = pstats.Stats(profiles[0], stream=stream)
+        for profile in profiles[1:]:
+            stats.add(profile)
+        return stats
+
+    def report(self):       # Short text report: stages, top-N functions and top-N allocation sites
+        lines = [f"Durée totale : {self.elapsed:.3f}s", "", "Étapes :"]
+        lines.append(f"  {'étape':<20}{'appels':>8}{'total (s)':>12}{'moyenne (ms)':>15}{'alloué (Kio)':>15}{'concurrents':>13}"
+                     f"{'retenu (Kio)':>15}")
+        for name, stats in sorted(self.stages.items(), key=lambda item: -item[1]["total_s"]):
+            mean_ms = stats["total_s"] / stats["calls"] * 1000 if stats["calls"] else 0.0
+            retained = f"{stats['retained_bytes'] / 1024:.1f}" if "retained_bytes" in stats else "-"
+            lines.append(f"  {name:<20}{stats['calls']:>8}{stats['total_s']:>12.3f}{mean_ms:>15.2f}"
+                         f"{stats['allocated_bytes'] / 1024:>15.1f}{stats['shared_calls']:>13}{retained:>15}")
+        if any(stats["shared_calls"] for stats in self.stages.values()):
+            lines.append("  Allocations des appels concurrents non attribuées (tracemalloc mesure tout le processus) ; "
+                         "la colonne « retenu » les attribue par pile d'appels.")
+
+        stream = io.StringIO()
+        stats = self._combined_stats(stream)
+        if stats is not None:
+            lines += ["", f"Top {self.top_n} fonctions (temps cumulé) :"]
+            stats.sort_stats("cumulative").print_stats(self.top_n)
+            lines.append(stream.getvalue().strip())
+
+        if self.snapshot is not None:
+            lines += ["", f"Top {self.top_n} allocations :"]
+            for statistic in self.snapshot.statistics("lineno")[:self.top_n]:
+                lines.append(f"  {statistic}")
+        return "\n".join(lines)
+
+    def write(self, name="profile"):        # Write <name>.pstats and <name>_report.txt, return their paths
+        os.makedirs(self.output_dir, exist_ok=True)
+        pstats_path = os.path.join(self.output_dir, f"{name}.pstats")
+        report_path = os.path.join(self.output_dir, f"{name}_report.txt")
+        stats = self._combined_stats(io.StringIO())
+        if stats is not None:
+            stats.dump_stats(pstats_path)
+        with open(report_path, "w", encoding="utf-8") as f:
+            f.write(self.report())
+        return pstats_path, report_path
@@ -0,0 +1,82 @@
+# Regional aggregates over batch results
+# Consumes processed forecasts as they stream out of a batch and keeps running sums, bounded top-N heaps and a transition histogram.
+import os
+import json
+import heapq
+import threading
+from collections import Counter
+from classes.LocationCanonicalizer import LocationCanonicalizer
+
+class RegionalRollup:       # Per-region totals and worst-hit cities, without rereading per-city files
+    def __init__(self, region_map=None, top_n=10, canonicalizer=None):
+        if top_n < 0:
+            raise ValueError(f"Nombre de villes invalide pour le classement : {top_n}")
+        self.canonicalizer = canonicalizer or LocationCanonicalizer()   # The batch's own, so city keys match its locations
+        self.region_map = self.canonicalizer.canonical_keys(region_map or {})   # Location id or "code_pays" -> region name
+        self.top_n = top_n      # 0 keeps no ranking
+        self.lock = threading.Lock()
+        self.regions = {}
+        self.top_rain = []      # Min-heaps of (value, city key): the smallest is evicted once N are held
+        self.top_snow = []
+        self.transitions = Counter()
+        self.locations = 0
+        self.partial = False    # Set when some locations of the batch could not be included
+
+    @classmethod
+    def from_file(cls, path, top_n=10, canonicalizer=None):     # Region map stored as JSON
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f), top_n, canonicalizer)
+
+    def region_for(self, location, country_code, result):
+        country = result.get("country_code") or country_code
+        return self.region_map.get(self.canonicalizer.city_key(location, country_code)) or self.region_map.get(country) or country
+
+    def _push(self, heap, value, key):      # Keep only the N largest values
+        if self.top_n == 0:
+            return
+        if len(heap) < self.top_n:
+            heapq.heappush(heap, (value, key))
+        elif value > heap[0][0]:
+            heapq.heapreplace(heap, (value, key))
+
+    def consume(self, location, country_code, result):      # Add one processed forecast
+        key = f"{location},{country_code}"
+        region = self.region_for(location, country_code, result)
+        rain = result.get("total_rain_period_mm", 0)
+        snow = result.get("total_snow_period_mm", 0)
+        transitions = sum(detail.get("major_transitions_count", 0) for detail in result.get("forecast_details", []))
+        with self.lock:
+            totals = self.regions.setdefault(region, {"locations": 0, "total_rain_mm": 0, "total_snow_mm": 0, "transitions": 0})
+            totals["locations"] += 1
+            totals["total_rain_mm"] += rain
+            totals["total_snow_mm"] += snow
+            totals["transitions"] += transitions
+            self._push(self.top_rain, rain, key)
+            self._push(self.top_snow, snow, key)
+            self.transitions[transitions] += 1
+            self.locations += 1
+
+    def restore(self, location, country_code, result):      # Result written by an interrupted run, counted like a fresh one
+        self.consume(location, country_code, result)
+
+    def summary(self):      # Rollup document
+        with self.lock:
+            return {
+                "locations": self.locations,
+                "partial": self.partial,
+                "regions": {
+                    region: {**totals, "total_rain_mm": round(totals["total_rain_mm"], 2), "total_snow_mm": round(totals["total_snow_mm"], 2)}
+                    for region, totals in sorted(self.regions.items())
+                },
+                "top_rain": [{"location": key, "total_rain_mm": value} for value, key in sorted(self.top_rain, reverse=True)],
+                "top_snow": [{"location": key, "total_snow_mm": value} for value, key in sorted(self.top_snow, reverse=True)],
+                "transition_distribution": {str(count): cities for count, cities in sorted(self.transitions.items())}
+            }
+
+    def write(self, path):      # Save the rollup as its own summary document
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.summary(), f, indent=4)
+        print(f"Synthèse régionale sauvegardée dans {path}")
@@ -0,0 +1,136 @@
+# Sharded batch execution
+# Splits the location list by a stable hash so N nodes or processes each run one shard, then merges their output partitions.
+import os
+import json
+import zlib
+import shutil
+import hashlib
+import multiprocessing
+from classes.BatchRunner import BatchRunner
+
+class ShardedBatch:     # One shard of a batch, with its own checkpoint, fingerprints and output partition
+    def __init__(self, locations, shards, shard_index, api_key, root="shards", canonicalizer=None, **options):
+        if not 0 <= shard_index < shards:
+            raise ValueError(f"Index de partition invalide : {shard_index} (attendu entre 0 et {shards - 1})")
+        self.duplicates = 0     # Dropped before sharding, reported by shard 0 so merged.json counts them once
+        self.invalid = []
+        if canonicalizer is not None:       # Spelling variants must hash to the same shard
+            locations, self.duplicates, self.invalid = canonicalizer.dedupe(locations)
+        self.locations = list(dict.fromkeys(locations))
+        self.shards = shards
+        self.shard_index = shard_index
+        self.api_key = api_key
+        self.root = root
+        self.options = options      # Passed to BatchRunner (workers, metrics, units, base_url...)
+        self.digest = self.plan_digest(self.locations, shards)
+
+    @staticmethod
+    def shard_of(location, country_code, shards):      # Same shard on every node, whatever the list order
+        return zlib.crc32(BatchRunner.location_key(location, country_code).encode("utf-8")) % shards
+
+    @staticmethod
+    def plan_digest(locations, shards):     # Identifies the location list and shard count a partition was built from
+        keys = sorted(BatchRunner.location_key(location, country_code) for location, country_code in locations)
+        return hashlib.sha256(json.dumps([shards, keys]).encode("utf-8")).hexdigest()[:16]
+
+    @staticmethod
+    def partition_dir(root, shard_index, shards):
+        return os.path.join(root, f"shard-{shard_index:03d}-of-{shards:03d}")
+
+    def assigned(self):     # Locations of this shard
+        return [(location, country_code) for location, country_code in self.locations
+                if self.shard_of(location, country_code, self.shards) == self.shard_index]
+
+    def run(self):      # Run this shard and write its manifest, return the BatchRunner summary
+        partition = self.partition_dir(self.root, self.shard_index, self.shards)
+        output_dir = os.path.join(partition, "json")
+        runner = BatchRunner(self.assigned(), self.api_key, checkpoint_path=os.path.join(partition, "checkpoint.jsonl"),
+                             output_dir=output_dir, fingerprint_path=os.path.join(partition, "fingerprints.json"),
+                             **self.options)
+        summary = runner.run()
+        if self.shard_index == 0:
+            self._report_dropped(summary)
+
+        outputs = {}
+        for location, country_code in self.assigned():
+            filenames = [BatchRunner.output_filename(location, country_code, units) for units in runner.units]
+            filenames = [name for name in filenames if os.path.exists(os.path.join(output_dir, name))]
+            if filenames:
+                outputs[BatchRunner.location_key(location, country_code)] = filenames
+        manifest = {
+            "plan": {"shards": self.shards, "shard_index": self.shard_index, "digest": self.digest},
+            "complete": summary["remaining"] == 0,
+            "outputs": outputs,
+            "summary": {key: summary[key] for key in ("total", "skipped", "done", "unchanged", "failed", "remaining", "duplicates", "fallbacks", "errors")}
+        }
+        temp_path = os.path.join(partition, "manifest.json.tmp")
+        with open(temp_path, "w") as f:
+            json.dump(manifest, f, indent=4)
+        os.replace(temp_path, os.path.join(partition, "manifest.json"))     # A manifest is only ever complete JSON
+        return summary
+
+    def _report_dropped(self, summary):     # Same counts as BatchRunner gives an unsharded run of the raw list
+        summary["duplicates"] += self.duplicates
+        for (location, country_code), error in self.invalid:        # Never fetched, failed on every run
+            key = BatchRunner.location_key(location, country_code)
+            if key not in summary["errors"]:
+                summary["total"] += 1
+                summary["failed"] += 1
+                summary["errors"][key] = error
+
+    @classmethod
+    def merge(cls, root, shards, output_dir="json"):        # Combine every partition into output_dir and return the merged summary
+        manifests = []
+        for shard_index in range(shards):
+            path = os.path.join(cls.partition_dir(root, shard_index, shards), "manifest.json")
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"Partition {shard_index} absente ou non terminée : {path}")
+            with open(path, "r") as f:
+                manifests.append(json.load(f))
+        digests = {manifest["plan"]["digest"] for manifest in manifests}
+        if len(digests) != 1:
+            raise ValueError("Les partitions proviennent de listes de lieux ou de découpages différents")
+
+        os.makedirs(output_dir, exist_ok=True)
+        merged = {"shards": shards, "digest": digests.pop(), "complete": True, "locations": 0,
+                  "total": 0, "skipped": 0, "done": 0, "unchanged": 0, "failed": 0, "remaining": 0, "duplicates": 0, "fallbacks": 0,
+                  "errors": {}}
+        for shard_index, manifest in enumerate(manifests):
+            partition = os.path.join(cls.partition_dir(root, shard_index, shards), "json")
+            for key, filenames in manifest["outputs"].items():
+                for name in filenames:      # Copy then rename: readers of output_dir never see a partial file
+                    temp_path = os.path.join(output_dir, f".{name}.tmp")
+                    shutil.copyfile(os.path.join(partition, name), temp_path)
+                    os.replace(temp_path, os.path.join(output_dir, name))
+                merged["locations"] += 1
+            for field in ("total", "skipped", "done", "unchanged", "failed", "remaining", "duplicates", "fallbacks"):
+                merged[field] += manifest["summary"][field]
+            merged["errors"].update(manifest["summary"]["errors"])
+            merged["complete"] = merged["complete"] and manifest["complete"]
+
+        with open(os.path.join(root, "merged.json"), "w") as f:
+            json.dump(merged, f, indent=4)
+        return merged
+
+    @classmethod
+    def run_local(cls, locations, shards, api_key, root="shards", output_dir="json", setup=None, **options):     # Every shard in its own process, then merge
+        # Options are sent to the worker processes, so they must be picklable (no transport, key pool or consumer objects);
+        # setup, a picklable callable, builds those in each process and returns them as extra BatchRunner options
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("fork" if "fork" in methods else None)
+        processes = [context.Process(target=_run_shard, args=(list(locations), shards, shard_index, api_key, root, options, setup),
+                                     name=f"shard-{shard_index}")
+                     for shard_index in range(shards)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        failed = [process.name for process in processes if process.exitcode != 0]
+        if failed:
+            raise RuntimeError(f"Partitions en échec : {', '.join(failed)}")
+        return cls.merge(root, shards, output_dir)
+
+def _run_shard(locations, shards, shard_index, api_key, root, options, setup=None):     # Process entry point for run_local
+    if setup is not None:
+        options = {**options, **setup()}
+    ShardedBatch(locations, shards, shard_index, api_key, root, **options).run()
@@ -0,0 +1,209 @@
+# File-backed forecast cache shared by several worker processes
+# Same interface as ForecastCache; entries are JSON files written atomically, and file locks make one process fetch per location.
+import os
+import json
+import time
+import hashlib
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl        # POSIX advisory locks
+except ImportError:     # Windows: atomic writes still keep entries consistent, concurrent misses may fetch twice
+    fcntl = None
+
+class SharedForecastCache:      # Cross-process payload and result cache with a time-to-live and bounded size
+    RESULT_PREFIX = "result:"      # Processed results (WeatherForecast.process_forecast), stored apart from payloads
+
+    def __init__(self, directory="cache", ttl=600, max_entries=1000, clock=time.time, max_results=None):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_entries = max_entries      # Payloads kept, the oldest are evicted beyond this count
+        self.max_results = max_results if max_results is not None else 4 * max_entries     # Results, bounded separately
+                                            # so unit and metric variants never push the payloads out
+        self.clock = clock      # Wall clock: timestamps are compared across processes
+        self.lock = threading.Lock()
+        self.sizes = {}     # partition -> entry count, scanned once then tracked from this process's own writes
+        self.counters = {"hits": 0, "misses": 0, "expired": 0, "stores": 0, "evictions": 0, "scans": 0}
+        os.makedirs(os.path.join(directory, "locks"), exist_ok=True)
+        os.makedirs(os.path.join(directory, "results"), exist_ok=True)
+
+    @staticmethod
+    def key(location, country_code):
+        return f"{location},{country_code}"
+
+    @staticmethod
+    def _name(key):     # Keys can hold any character, file names are hashes
+        return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+    def _partition(self, key):     # "results" or "payloads", each in its own directory with its own bound
+        return "results" if key.startswith(self.RESULT_PREFIX) else "payloads"
+
+    def _directory(self, partition):
+        return os.path.join(self.directory, "results") if partition == "results" else self.directory
+
+    def _limit(self, partition):
+        return self.max_results if partition == "results" else self.max_entries
+
+    def _path(self, key):
+        return os.path.join(self._directory(self._partition(key)), f"{self._name(key)}.json")
+
+    def _count(self, name):
+        with self.lock:
+            self.counters[name] += 1
+
+    def _read(self, key):       # (value, stored_at) or None
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if entry.get("key") != key:     # Hash collision
+            return None
+        return entry["value"], entry["stored_at"]
+
+    def get(self, key):     # Fresh value or None
+        entry = self._read(key)
+        if entry is not None and self.clock() - entry[1] >= self.ttl:
+            if self._remove(self._path(key)):
+                self._shrink(self._partition(key))
+                self._forget_lock(key)
+            self._count("expired")
+            entry = None
+        self._count("hits" if entry is not None else "misses")
+        return entry[0] if entry is not None else None
+
+    def put(self, key, value):      # Write to a temporary file then rename, so readers never see a partial entry
+        partition = self._partition(key)
+        path = self._path(key)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        stored_at = self.clock()
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"key": key, "stored_at": stored_at, "value": value}, f, separators=(",", ":"))
+        os.utime(temp_path, (stored_at, stored_at))     # mtime on the same clock as stored_at, eviction compares the two
+        added = not os.path.exists(path)
+        os.replace(temp_path, path)
+        self._count("stores")
+        if self._grow(partition, added) > self._limit(partition):
+            self._evict(partition, keep=path)
+
+    def age(self, key):
+        entry = self._read(key)
+        return self.clock() - entry[1] if entry is not None else None
+
+    def _lock_path(self, name):
+        return os.path.join(self.directory, "locks", f"{name}.lock")
+
+    @contextmanager
+    def _file_lock(self, name):
+        path = self._lock_path(name)
+        while True:
+            f = open(path, "a")
+            if fcntl is None:
+                break
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                if os.fstat(f.fileno()).st_ino == os.stat(path).st_ino:
+                    break       # Still the file at that path, not one _remove_lock() unlinked while we waited
+            except FileNotFoundError:
+                pass
+            f.close()
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            f.close()
+
+    def _remove_lock(self, name):       # Delete a location's lock file, only when no process holds it
+        path = self._lock_path(name)
+        try:
+            with open(path, "r") as f:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                os.remove(path)
+        except OSError:     # Held by a fetch, already removed, or still open elsewhere on Windows
+            pass
+
+    def _forget_lock(self, key):        # Only payload keys are fetched under a lock
+        if self._partition(key) == "payloads":
+            self._remove_lock(self._name(key))
+
+    def _remove_stale_locks(self):      # Lock files of locations that no longer have a payload
+        cached = {os.path.basename(path)[:-len(".json")] for _, path in self._entries("payloads")}
+        for name in os.listdir(os.path.join(self.directory, "locks")):
+            name = name[:-len(".lock")]
+            if not name.startswith("evict-") and name not in cached:
+                self._remove_lock(name)
+
+    def fetch_lock(self, key):      # Held across processes while a location is fetched
+        return self._file_lock(self._name(key))
+
+    def _remove(self, path):        # True when this call removed the file
+        try:
+            os.remove(path)
+            return True
+        except FileNotFoundError:       # Already removed by another process
+            return False
+
+    def _entries(self, partition):     # (mtime, path) of every stored entry of a partition
+        directory = self._directory(partition)
+        entries = []
+        for name in os.listdir(directory):
+            if name.endswith(".json"):
+                path = os.path.join(directory, name)
+                try:
+                    entries.append((os.stat(path).st_mtime_ns / 1e9, path))
+                except FileNotFoundError:
+                    pass
+        return entries
+
+    def _grow(self, partition, added):       # Tracked entry count after a put, the directory is only listed the first time
+        with self.lock:
+            size = self.sizes.get(partition)
+        if size is None:
+            self._count("scans")
+            size, added = len(self._entries(partition)), False      # The scan already sees the new entry
+        with self.lock:
+            self.sizes[partition] = size + (1 if added else 0)
+            return self.sizes[partition]
+
+    def _shrink(self, partition):      # One entry removed by this process, before any scan there is nothing to track
+        with self.lock:
+            if self.sizes.get(partition):
+                self.sizes[partition] -= 1
+
+    def _evict(self, partition, keep=None):       # Drop expired entries, then the oldest down to 90% of the bound (never `keep`)
+        # Other processes' writes are only seen here, so the bound is approximate; evicting below it spaces out the scans.
+        limit = self._limit(partition)
+        target = limit - max(1, limit // 10)
+        with self._file_lock(f"evict-{partition}"):
+            self._count("scans")
+            entries = sorted(entry for entry in self._entries(partition) if entry[1] != keep)
+            now = self.clock()
+            stale = [path for mtime, path in entries if now - mtime >= self.ttl]
+            fresh = [path for mtime, path in entries if now - mtime < self.ttl]
+            removed = stale + fresh[:max(0, len(fresh) + 1 - target)]
+            for path in removed:
+                self._remove(path)
+                self._count("evictions")
+            with self.lock:
+                self.sizes[partition] = len(entries) + 1 - len(removed)
+            if partition == "payloads":     # Same scan cadence, so lock files stay bounded by the payload count
+                self._remove_stale_locks()
+
+    def invalidate(self, key):
+        if self._remove(self._path(key)):
+            self._shrink(self._partition(key))
+            self._forget_lock(key)
+
+    def __len__(self):      # Payloads and results, counted on disk
+        return len(self._entries("payloads")) + len(self._entries("results"))
+
+    def stats(self):
+        with self.lock:
+            counters = dict(self.counters)
+        counters["entries"] = len(self)
+        lookups = counters["hits"] + counters["misses"]
+        counters["hit_rate"] = round(counters["hits"] / lookups, 3) if lookups else None
+        return counters
@@ -0,0 +1,189 @@
+# Local fake OpenWeatherMap server
+# Serves deterministic synthetic forecasts with configurable latency, error rate and 429 responses for offline and load tests.
+import gzip
+import json
+import time
+import hashlib
+import random
+import datetime
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+class StubServer:       # Fake OpenWeatherMap forecast endpoint running in a background thread
+    PATH = "/data/2.5/forecast"
+    CATEGORIES = [
+        ("Clear", "clear sky"),
+        ("Clouds", "broken clouds"),
+        ("Rain", "light rain"),
+        ("Rain", "moderate rain"),
+        ("Snow", "light snow"),
+    ]
+
+    def __init__(self, latency=0.0, error_rate=0.0, rate_limit_rate=0.0, entries=40,
+                 unknown_locations=(), invalid_keys=(), seed=None, port=0, start=None, etags=True,
+                 compression=True):
+        self.latency = latency                  # Seconds added to every response
+        self.error_rate = error_rate            # Share of requests answered with a 500
+        self.rate_limit_rate = rate_limit_rate  # Share of requests answered with a 429
+        self.entries = entries                  # Number of 3h entries per forecast (40 = 5 days)
+        self.unknown_locations = {name.lower() for name in unknown_locations}
+        self.invalid_keys = set(invalid_keys)
+        self.start = start
+        self.etags = etags                      # Send ETag and answer If-None-Match with 304
+        self.compression = compression          # Gzip bodies when the client accepts it
+        self.port = port
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "ok": 0, "errors": 0, "rate_limited": 0, "not_found": 0, "unauthorized": 0, "not_modified": 0,
+                      "wire_bytes": 0}
+        self.httpd = None
+        self.thread = None
+
+    def __enter__(self):
+        self.start_server()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    @property
+    def base_url(self):     # URL to pass as WeatherForecast base_url
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}{self.PATH}"
+
+    @classmethod
+    def synthetic_forecast(cls, location, country_code, entries=40, start=None):     # Deterministic payload shaped like the OpenWeatherMap response
+        rng = random.Random(f"{location.lower()},{country_code.upper()}")
+        if start is None:
+            start = datetime.datetime.combine(datetime.date.today(), datetime.time())
+        temp = rng.uniform(-5, 25)
+        forecast_list = []
+        for i in range(entries):
+            moment = start + datetime.timedelta(hours=3 * i)
+            temp += rng.uniform(-4, 4)
+            category, description = rng.choice(cls.CATEGORIES)
+            entry = {
+                "dt": int(moment.replace(tzinfo=datetime.timezone.utc).timestamp()),
+                "main": {
+                    "temp": round(temp, 2),
+                    "feels_like": round(temp - rng.uniform(0, 3), 2),
+                    "pressure": rng.randint(990, 1030),
+                    "humidity": rng.randint(30, 100)
+                },
+                "weather": [{"main": category, "description": description}],
+                "wind": {"speed": round(rng.uniform(0, 15), 2), "deg": rng.randint(0, 359)},
+                "pop": round(rng.random(), 2),
+                "dt_txt": moment.strftime("%Y-%m-%d %H:%M:%S")
+            }
+            if category == "Rain":
+                entry["rain"] = {"3h": round(rng.uniform(0.1, 5), 2)}
+            if category == "Snow":
+                entry["snow"] = {"3h": round(rng.uniform(0.1, 3), 2)}
+            forecast_list.append(entry)
+        return {
+            "cod": "200",
+            "message": 0,
+            "cnt": entries,
+            "list": forecast_list,
+            "city": {"name": location, "country": country_code.upper()}
+        }
+
+    def _count(self, key):
+        with self.lock:
+            self.stats[key] += 1
+
+    def _draw(self):        # Shared random draw so error injection is reproducible with a seed
+        with self.lock:
+            return self.random.random()
+
+    def handle(self, path, query, headers=None):      # Build (status, payload, response headers) for a request
+        self._count("requests")
+        headers = headers or {}
+        if self.latency:
+            time.sleep(self.latency)
+        if path != self.PATH:
+            self._count("not_found")
+            return 404, {"cod": "404", "message": "Not found"}, {}
+        if query.get("appid", [""])[0] in self.invalid_keys:
+            self._count("unauthorized")
+            return 401, {"cod": 401, "message": "Invalid API key"}, {}
+
+        draw = self._draw()
+        if draw < self.rate_limit_rate:
+            self._count("rate_limited")
+            return 429, {"cod": 429, "message": "Too many requests"}, {}
+        if draw < self.rate_limit_rate + self.error_rate:
+            self._count("errors")
+            return 500, {"cod": "500", "message": "Internal error"}, {}
+
+        location, _, country_code = query.get("q", [""])[0].partition(",")
+        if not location or location.lower() in self.unknown_locations:
+            self._count("not_found")
+            return 404, {"cod": "404", "message": "city not found"}, {}
+        payload = self.synthetic_forecast(location, country_code, self.entries, self.start)
+        if not self.etags:
+            self._count("ok")
+            return 200, payload, {}
+        etag = '"' + hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()[:32] + '"'
+        if headers.get("If-None-Match") == etag:
+            self._count("not_modified")
+            return 304, None, {"ETag": etag}
+        self._count("ok")
+        return 200, payload, {"ETag": etag}
+
+    def start_server(self):     # Start serving on 127.0.0.1 (port 0 picks a free port)
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                status, payload, headers = stub.handle(url.path, parse_qs(url.query), self.headers)
+                body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+                if body and stub.compression and "gzip" in self.headers.get("Accept-Encoding", ""):
+                    body = gzip.compress(body)
+                    headers = {**headers, "Content-Encoding": "gzip"}
+                with stub.lock:
+                    stub.stats["wire_bytes"] += len(body)
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):      # Keep test and load-test output quiet
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", self.port), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        if self.httpd is not None:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.httpd = None
+
+
+if __name__ == "__main__":     # python -m classes.StubServer --port 8080 --latency 0.05
+    import argparse
+    parser = argparse.ArgumentParser(description="Serveur OpenWeatherMap factice")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    server = StubServer(latency=args.latency, error_rate=args.error_rate,
+                        rate_limit_rate=args.rate_limit_rate, seed=args.seed, port=args.port).start_server()
+    print(f"Serveur factice démarré sur {server.base_url}")
+    try:
+        server.thread.join()
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,77 @@
+# HTTP transport abstraction used by WeatherForecast
+# Lets the forecast code run against the real API, a local stub server or any custom client.
+import gzip
+import zlib
+import threading
+import requests
+from urllib3.exceptions import ProtocolError, ReadTimeoutError, DecodeError, SSLError
+
+def decode_body(body, content_encoding):       # Decode a gzip/deflate/identity response body
+    encoding = (content_encoding or "identity").lower()
+    if encoding == "gzip":
+        return gzip.decompress(body)
+    if encoding == "deflate":
+        try:
+            return zlib.decompress(body)
+        except zlib.error:      # Some servers send raw deflate without the zlib header
+            return zlib.decompress(body, -zlib.MAX_WBITS)
+    return body
+
+class Transport:        # Base transport: performs a GET request and returns a requests-like response
+    def get(self, url, params=None, headers=None):
+        raise NotImplementedError("Le transport doit implémenter get()")
+
+class RequestsTransport(Transport):     # Default transport backed by the requests library
+    ACCEPT_ENCODING = "gzip, deflate"
+
+    def __init__(self, session=None, verify=False, timeout=30, compression=True):
+        self.session = session      # Optional requests.Session to reuse pooled connections
+        self.verify = verify        # Change verify to your certificate path if needed
+        self.timeout = timeout
+        self.compression = compression      # Negotiate gzip/deflate and keep the bytes as received
+        self.lock = threading.Lock()
+        self.counters = {"requests": 0, "wire_bytes": 0, "decoded_bytes": 0}
+
+    def get(self, url, params=None, headers=None):
+        client = self.session if self.session is not None else requests
+        headers = dict(headers or {})
+        headers["Accept-Encoding"] = self.ACCEPT_ENCODING if self.compression else "identity"
+        response = client.get(url, params=params, headers=headers, verify=self.verify, timeout=self.timeout, stream=True)
+
+        # Read the body as sent on the wire, then decode it ourselves to measure both sizes
+        content_encoding = response.headers.get("Content-Encoding")
+        try:
+            raw_body = response.raw.read(decode_content=False)
+            response._content = decode_body(raw_body, content_encoding)
+        except Exception as e:
+            response.close()
+            raise self._request_error(e, response) from e
+        response.raw.release_conn()
+        response.raw_body = raw_body        # Compressed bytes, reusable for archiving without recompressing
+        response.content_encoding = content_encoding
+
+        with self.lock:
+            self.counters["requests"] += 1
+            self.counters["wire_bytes"] += len(raw_body)
+            self.counters["decoded_bytes"] += len(response._content)
+        return response
+
+    @staticmethod
+    def _request_error(error, response):       # Body read failures as requests exceptions, as iter_content() would raise them
+        # Callers (BatchRunner, CircuitBreaker) classify failures on requests.exceptions: a truncated or stalled body is
+        # a transient network error, not a permanent failure
+        if isinstance(error, ProtocolError):
+            return requests.exceptions.ChunkedEncodingError(error, response=response)
+        if isinstance(error, ReadTimeoutError):
+            return requests.exceptions.ConnectionError(error, response=response)
+        if isinstance(error, SSLError):
+            return requests.exceptions.SSLError(error, response=response)
+        if isinstance(error, (DecodeError, OSError, EOFError, zlib.error)):     # gzip.BadGzipFile is an OSError
+            return requests.exceptions.ContentDecodingError(error, response=response)
+        return error
+
+    def stats(self):        # Wire size versus decoded size over every request
+        with self.lock:
+            counters = dict(self.counters)
+        counters["compression_ratio"] = round(counters["decoded_bytes"] / counters["wire_bytes"], 2) if counters["wire_bytes"] else None
+        return counters
@@ -0,0 +1,47 @@
+# Unit systems derived locally from metric values
+# The API is always queried with units=metric; imperial and standard (Kelvin) values are converted here instead of refetched.
+import copy
+
+class UnitSystem:       # Conversions from metric values to one OpenWeatherMap unit system
+    def __init__(self, name, temperature, speed):
+        self.name = name
+        self.temperature = temperature      # °C -> unit, for absolute temperatures
+        self.speed = speed                  # Scale of a speed (m/s -> unit)
+
+    def convert(self, quantity, value):     # Convert a metric value; None values and unit-less quantities pass through
+        if value is None or quantity is None or self.name == "metric":
+            return value
+        if quantity == "temperature":
+            return round(self.temperature(value), 2)
+        if quantity == "speed":
+            return round(value * self.speed, 2)
+        raise ValueError(f"Grandeur inconnue : {quantity}")
+
+UNITS = {
+    "metric": UnitSystem("metric", lambda c: c, 1),
+    "imperial": UnitSystem("imperial", lambda c: c * 9 / 5 + 32, 1 / 0.44704),     # °F, mph
+    "standard": UnitSystem("standard", lambda c: c + 273.15, 1),                   # K, m/s
+}
+
+def unit_system(name):      # Look up a unit system by its OpenWeatherMap name
+    if name not in UNITS:
+        raise ValueError(f"Système d'unités inconnu : {name} (attendu : {', '.join(UNITS)})")
+    return UNITS[name]
+
+ENTRY_FIELDS = {        # Converted fields of a forecast entry, everything else (mm, %, hPa) is unit independent
+    "main": {"temp": "temperature", "feels_like": "temperature", "temp_min": "temperature", "temp_max": "temperature"},
+    "wind": {"speed": "speed", "gust": "speed"},
+}
+
+def convert_payload(forecast_data, units):      # Copy of a metric forecast payload expressed in another unit system
+    units = unit_system(units) if isinstance(units, str) else units
+    converted = copy.deepcopy(forecast_data)
+    if units.name == "metric":
+        return converted
+    for entry in converted.get("list", []):
+        for section, fields in ENTRY_FIELDS.items():
+            values = entry.get(section, {})
+            for field, quantity in fields.items():
+                if field in values:
+                    values[field] = units.convert(quantity, values[field])
+    return converted
@@ -1,35 +1,45 @@
 # Weather application class
 # Manages user input and orchestrates the weather forecast retrieval and saving process.
-import re
-from classes.APIKey import APIKey
+from contextlib import nullcontext
+from classes.APIKeyPool import APIKeyPool
 from classes.WeatherForecast import WeatherForecast
 from classes.ForecastTable import ForecastTable
+from classes.ForecastArchive import ForecastArchive
+from classes.LocationCanonicalizer import LocationCanonicalizer
 
 class WeatherApp:      # Weather application class
-    def __init__(self):
+    def __init__(self, profiler=None, canonicalizer=None, transport=None, base_url=None):
         self.location = None
         self.country_code = None
         self.api_key = None
+        self.profiler = profiler    # Optional Profiler attributing time and allocations to each stage
+        self.canonicalizer = canonicalizer or LocationCanonicalizer()
+        self.transport = transport      # Passed to WeatherForecast, e.g. to reach a StubServer through base_url
+        self.base_url = base_url
 
-    def run(self):      # Main method to run the weather application
-        # Read and validate inputs
-        self.location = input("Entrez la ville : ").strip()
-        self.country_code = input("Entrez le code du pays : ").strip()
-
-        if not self.location:
-            raise ValueError("Le nom de la ville est requis")
-
-        # Country code should be two letters (ISO-like). Raise if empty or malformed.
-        if not self.country_code or not re.match(r'^[A-Za-z]{2}$', self.country_code):
-            raise ValueError("Le code pays doit être composé de 2 lettres")
+    def _stage(self, name):
+        return self.profiler.stage(name) if self.profiler is not None else nullcontext()
 
-        self.api_key = APIKey.key
+    def run(self):      # Main method to run the weather application
+        # Read and validate inputs: "PARIS"/"fr" and "Paris"/"FR" give the same location, file and cache key
+        location = input("Entrez la ville : ")
+        country_code = input("Entrez le code du pays : ")
+        self.location, self.country_code = self.canonicalizer.canonicalize(location, country_code)
 
         # Orchestrate forecast retrieval and presentation
-        forecast = WeatherForecast(self.location, self.country_code, self.api_key)
-        forecast.get_forecast()
-        forecast_data = forecast.process_forecast()
-        forecast.save_forecast(f"{self.location}_{self.country_code}.json")
+        forecast = WeatherForecast(self.location, self.country_code, None, key_pool=APIKeyPool.from_env(),
+                                   transport=self.transport, base_url=self.base_url)
+        with self._stage("fetch"):
+            forecast.get_forecast()
+        self.api_key = forecast.api_key     # Key picked from the pool
+        with self._stage("process_forecast"):
+            forecast_data = forecast.process_forecast()
+        with self._stage("save_forecast"):
+            forecast.save_forecast(f"{self.location}_{self.country_code}.json", forecast_data)
+
+            with ForecastArchive() as archive:     # Keep the daily summaries in the history archive
+                archive.append(self.location, self.country_code, forecast_data)
 
-        table = ForecastTable(forecast_data["forecast_details"])    # Display the forecast table in console
-        table.display_table()
\ No newline at end of file
+        with self._stage("ForecastTable"):
+            table = ForecastTable(forecast_data["forecast_details"])    # Display the forecast table in console
+            table.display_table()
\ No newline at end of file
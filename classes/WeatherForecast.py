@@ -3,23 +3,123 @@
 import os
 import requests
 import json
-import datetime
+import gzip
+import hashlib
+from classes.Transport import RequestsTransport
+from classes.Accumulators import ForecastStats, DailySummaries, convert_results
+from classes.Units import unit_system, convert_payload
 
 class WeatherForecast:      # Weather forecast retrieval and processing class 
-    def __init__(self, location, country_code, api_key):
+    BASE_URL = "http://api.openweathermap.org/data/2.5/forecast"
+
+    def __init__(self, location, country_code, api_key, transport=None, base_url=None, validators=None, key_pool=None,
+                 raw_archive_dir=None, cache=None):
         self.location = location
         self.country_code = country_code
         self.api_key = api_key
+        self.key_pool = key_pool        # When set, keys are taken from the pool instead of api_key
+        self.transport = transport if transport is not None else RequestsTransport()
+        self.base_url = base_url or self.BASE_URL     # Point at a local stub server for offline runs
+        self.validators = validators    # Fingerprint, ETag and Last-Modified of the last written payload
+        self.raw_archive_dir = raw_archive_dir      # Keep the gzip response next to the processed output
+        self.cache = cache      # Optional ForecastCache shared between instances
+        self.from_cache = False
+        self.from_fallback = False      # Payload replayed by a CircuitBreaker while the upstream was failing
+        self.forecast_data = None
+        self.fingerprint = None
+        self.etag = None
+        self.last_modified = None
+        self.unchanged = False
+        self._processed = {}        # (metrics, units) -> processed result for the current payload
+        self.released = False       # Set once iter_forecast(release=True) has consumed the raw entries
+
+    @staticmethod
+    def payload_fingerprint(forecast_list):     # Stable hash of the forecast entries
+        serialized = json.dumps(forecast_list, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+    def _conditional_headers(self):     # Let the upstream answer 304 when it supports ETag/Last-Modified
+        headers = {}
+        if self.validators:
+            if self.validators.get("etag"):
+                headers["If-None-Match"] = self.validators["etag"]
+            if self.validators.get("last_modified"):
+                headers["If-Modified-Since"] = self.validators["last_modified"]
+        return headers or None
+
+    def _request(self, api_key):
+        params = {"q": f"{self.location},{self.country_code}", "appid": api_key, "units": "metric"}
+        return self.transport.get(self.base_url, params=params, headers=self._conditional_headers())
+
+    def _send(self):        # Send the request, moving to another pooled key when one answers 401/429
+        if self.key_pool is None:
+            return self._request(self.api_key)
+        for _ in range(len(self.key_pool)):
+            key = self.key_pool.acquire()
+            try:
+                response = self._request(key)
+            except Exception:
+                self.key_pool.release(key)
+                raise
+            self.key_pool.release(key, response.status_code)
+            self.api_key = key
+            if response.status_code not in self.key_pool.BENCH_STATUSES:
+                break
+        return response     # Every key refused: raise_for_status reports the last 401/429
+
+    def get_forecast(self, refresh=False):     # Fetch weather forecast data, from the cache when one is set and fresh
+        self.from_cache = False
+        self.from_fallback = False
+        if self.cache is None:
+            return self._fetch()
+        cache_key = self.cache.key(self.location, self.country_code)
+        with self.cache.fetch_lock(cache_key):      # Concurrent misses (threads or worker processes) wait for a single fetch
+            cached = None if refresh else self.cache.get(cache_key)     # refresh=True renews the entry
+            if cached is not None:
+                self.forecast_data = cached
+                self.from_cache = True
+                self._validate()
+                return
+            self._fetch()
+            if self.forecast_data is not None and not self.from_fallback:      # Not on a 304, which carries no payload,
+                self.cache.put(cache_key, self.forecast_data)                   # nor for an old payload replayed as fresh
 
-    def get_forecast(self):     # Fetch weather forecast data from OpenWeatherMap API with metrics units
-        url = f"http://api.openweathermap.org/data/2.5/forecast?q={self.location},{self.country_code}&appid={self.api_key}&units=metric"
+    def _fetch(self):       # Fetch weather forecast data from OpenWeatherMap API with metrics units
         try:
-            response = requests.get(url, verify=False) # Change verify to your certificate path if needed
+            response = self._send()
+            if response.status_code == 304:     # Nothing changed upstream since the last written payload
+                self.unchanged = True
+                return
             response.raise_for_status()
+            self.from_fallback = getattr(response, "from_fallback", False)
             self.forecast_data = response.json()
+            self.etag = response.headers.get("ETag")
+            self.last_modified = response.headers.get("Last-Modified")
         except requests.exceptions.RequestException as e:
             raise
-        
+
+        self._validate()
+        if self.raw_archive_dir is not None:
+            self._archive_raw(response)
+
+    def _archive_raw(self, response):       # Store the response gzip-compressed, as received when it already was
+        os.makedirs(self.raw_archive_dir, exist_ok=True)
+        if getattr(response, "content_encoding", None) == "gzip":
+            body = response.raw_body
+        else:
+            body = gzip.compress(response.content, compresslevel=6)
+        with open(self.raw_path(), "wb") as f:
+            f.write(body)
+
+    def raw_path(self):
+        return os.path.join(self.raw_archive_dir or "raw", f"{self.location}_{self.country_code}.json.gz")
+
+    def replay_forecast(self, path=None):       # Load an archived raw response instead of calling the API
+        with open(path or self.raw_path(), "rb") as f:
+            self.forecast_data = json.loads(gzip.decompress(f.read()))
+        self._validate()
+
+    def _validate(self):
         # Verify response for errors
         if "cod" in self.forecast_data and self.forecast_data["cod"] != "200":
             error_message = self.forecast_data.get("message", "Erreur inconnue")
@@ -28,85 +128,102 @@ class WeatherForecast:      # Weather forecast retrieval and processing class
         if "list" not in self.forecast_data:
             raise Exception("La réponse API ne contient pas les données attendues. Vérifiez votre clé API.")
 
-    def process_forecast(self):     # Process the fetched forecast data to extract relevant information
-        forecast_by_day = {}  # Dictionary to hold daily aggregated data
-        total_rain_period_mm = 0
-        total_snow_period_mm = 0
-        max_humidity_period = 0
-        min_temp_period = float('inf')
-        max_temp_period = float('-inf')
-        previous_temp = None
-
-        for forecast in self.forecast_data["list"]:    # Iterate through each forecast entry
-            date_local = datetime.datetime.strptime(forecast["dt_txt"], "%Y-%m-%d %H:%M:%S")
-            date_str = date_local.strftime("%Y-%m-%d")  # Extract just the date
-            
-            rain_cumul_mm = 0
-            snow_cumul_mm = 0
-            major_transitions_count = 0
-            temp = forecast["main"]["temp"]
-
-            # Check if temperature changed by ±3°C or more AND weather category changed
-            if previous_temp is not None:
-                temp_difference = abs(temp - previous_temp)
-                current_weather = forecast["weather"][0]["main"]
-                
-                if temp_difference >= 3:
-                    major_transitions_count = 1
-            
-            previous_temp = temp
-
-            if "rain" in forecast["weather"][0]["description"]:
-                rain_cumul_mm += forecast["rain"]["3h"]
-            if "snow" in forecast["weather"][0]["description"]:
-                snow_cumul_mm += forecast["snow"]["3h"]
-
-            if forecast["main"]["humidity"] > max_humidity_period:
-                max_humidity_period = forecast["main"]["humidity"]
-            
-            if temp < min_temp_period:
-                min_temp_period = temp
-            if temp > max_temp_period:
-                max_temp_period = temp
-
-            # Add or accumulate data for this day
-            if date_str not in forecast_by_day:
-                forecast_by_day[date_str] = {
-                    "rain_cumul_mm": 0,
-                    "snow_cumul_mm": 0,
-                    "major_transitions_count": 0
-                }
-            
-            forecast_by_day[date_str]["rain_cumul_mm"] += rain_cumul_mm
-            forecast_by_day[date_str]["snow_cumul_mm"] += snow_cumul_mm
-            forecast_by_day[date_str]["major_transitions_count"] += major_transitions_count
-
-            total_rain_period_mm += rain_cumul_mm
-            total_snow_period_mm += snow_cumul_mm
-
-        # Convert the daily data into a list of dictionaries
-        forecast_details = []
-        for date_str, data in sorted(forecast_by_day.items()):
-            forecast_details.append({
-                "date_local": date_str,
-                "rain_cumul_mm": round(data["rain_cumul_mm"], 2),
-                "snow_cumul_mm": round(data["snow_cumul_mm"], 2),
-                "major_transitions_count": data["major_transitions_count"]
-            })
-
-        return {
-            "forecast_location_name": self.forecast_data["city"]["name"],
-            "country_code": self.forecast_data["city"]["country"],
-            "total_rain_period_mm": round(total_rain_period_mm, 2),
-            "total_snow_period_mm": round(total_snow_period_mm, 2),
-            "max_humidity_period": max_humidity_period,
-            "forecast_details": forecast_details
-        }
-
-    def save_forecast(self, filename):      # Save the processed forecast data to a JSON file
-        forecast = self.process_forecast()
-        os.makedirs("json", exist_ok=True)
-        filepath = f"json/{filename}"
+        self.fingerprint = self.payload_fingerprint(self.forecast_data["list"])
+        self.unchanged = bool(self.validators) and self.validators.get("fingerprint") == self.fingerprint
+        self._processed = {}
+        self.released = False
+
+    def _check_not_released(self):
+        if self.released:
+            raise Exception("Les données de prévision ont été libérées par iter_forecast(release=True) : rechargez-les avec get_forecast()")
+
+    def process_forecast(self, metrics=None, units="metric"):     # Process the fetched forecast data to extract relevant information
+        # The payload is always metric: other unit systems are converted from the metric result, and results are
+        # cached per payload so several unit variants cost a single fetch and a single pass over the entries.
+        self._check_not_released()
+        system = unit_system(units)
+        cache_key = (tuple(metrics or ()), system.name)
+        if self.fingerprint is not None and cache_key in self._processed:
+            return self._processed[cache_key]
+        shared_key = None
+        if self.cache is not None and self.fingerprint is not None:     # Results are shared through the cache as well
+            shared_key = f"result:{self.location},{self.country_code}:{self.fingerprint[:16]}:{','.join(cache_key[0])}:{system.name}"
+            shared = self.cache.get(shared_key)
+            if shared is not None:
+                self._processed[cache_key] = shared
+                return shared
+
+        if system.name != "metric":
+            result = self.process_forecast(metrics)
+            result = {
+                **convert_results(result, system),
+                "units": system.name,
+                "forecast_details": [convert_results(detail, system) for detail in result["forecast_details"]]
+            }
+        else:
+            # All selected metrics are computed per day and per period in a single pass (see classes/Accumulators.py)
+            stats = ForecastStats(metrics).update_all(self.forecast_data["list"])
+            result = {
+                "forecast_location_name": self.forecast_data["city"]["name"],
+                "country_code": self.forecast_data["city"]["country"],
+                **stats.period_results(),
+                "metrics": stats.metrics,
+                "units": system.name,
+                "forecast_details": stats.day_results()
+            }
+        if self.fingerprint is not None:        # Payloads set by hand have no fingerprint and are not cached
+            self._processed[cache_key] = result
+        if shared_key is not None:
+            self.cache.put(shared_key, result)
+        return result
+
+    def forecast_data_in(self, units):      # Raw payload converted to another unit system, without a new API call
+        self._check_not_released()
+        return convert_payload(self.forecast_data, units)
+
+    def iter_forecast(self, metrics=None, release=False, units="metric"):      # Daily summaries yielded one by one, totals on .totals at the end
+        self._check_not_released()
+        entries = self.forecast_data["list"]
+        if release and self.cache is None:     # Drop each raw entry once consumed (a cached payload is shared, kept intact)
+            self.forecast_data["list"] = []
+            # The payload is gone: nothing computed from it may be served again, and reusing the instance is an error
+            self.released = True
+            self.fingerprint = None
+            self._processed = {}
+            entries = self._release_entries(entries)
+        return DailySummaries(entries, metrics, units)
+
+    @staticmethod
+    def _release_entries(entries):
+        for index in range(len(entries)):
+            entry = entries[index]
+            entries[index] = None
+            yield entry
+
+    def stream_forecast(self, filename, directory="json", metrics=None, release=False, units="metric"):      # Write the JSON file day by day from iter_forecast()
+        summaries = self.iter_forecast(metrics, release, units)
+        os.makedirs(directory, exist_ok=True)
+        filepath = f"{directory}/{filename}"
+        with open(filepath, "w") as f:
+            f.write("{\n")
+            f.write(f'    "forecast_location_name": {json.dumps(self.forecast_data["city"]["name"])},\n')
+            f.write(f'    "country_code": {json.dumps(self.forecast_data["city"]["country"])},\n')
+            f.write(f'    "metrics": {json.dumps(summaries.metrics)},\n')
+            f.write(f'    "units": {json.dumps(summaries.units.name)},\n')
+            f.write('    "forecast_details": [')
+            for index, detail in enumerate(summaries):
+                f.write(("," if index else "") + "\n        " + json.dumps(detail))
+            f.write("\n    ]")
+            for key, value in summaries.totals.items():       # Totals are only known once every day has been seen
+                f.write(f",\n    {json.dumps(key)}: {json.dumps(value)}")
+            f.write("\n}\n")
+        print(f"Prévisions sauvegardées dans {filepath}")
+
+    def save_forecast(self, filename, forecast=None, directory="json"):      # Save the processed forecast data to a JSON file
+        if forecast is None:    # Reuse an already processed result when the caller has one
+            forecast = self.process_forecast()
+        os.makedirs(directory, exist_ok=True)
+        filepath = f"{directory}/{filename}"
         with open(filepath, "w") as f:
             json.dump(forecast, f, indent=4)
         print(f"Prévisions sauvegardées dans {filepath}")
@@ -0,0 +1,100 @@
+# Interactive session mode
+# Loops over lookups in one process so the HTTP connection pool, forecast cache and canonical names stay warm between them.
+import time
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from classes.APIKeyPool import APIKeyPool
+from classes.Transport import RequestsTransport
+from classes.ForecastCache import ForecastCache
+from classes.PrefetchScheduler import PrefetchScheduler
+from classes.LocationCanonicalizer import LocationCanonicalizer
+from classes.ForecastTable import ForecastTable
+
+class WeatherSession:       # REPL: several cities per line, fetched concurrently, with latency and cache status
+    PROMPT = "Villes (ex: Paris,FR; Lyon,FR), 'stats' ou 'q' pour quitter : "
+    QUIT = ("q", "quit", "quitter", "exit")
+
+    def __init__(self, api_key=None, key_pool=None, transport=None, base_url=None, cache=None, canonicalizer=None,
+                 max_workers=4, prefetch=True):
+        self.transport = transport if transport is not None else RequestsTransport(session=requests.Session())   # Keep-alive connections
+        self.cache = cache if cache is not None else ForecastCache()
+        self.canonicalizer = canonicalizer or LocationCanonicalizer()      # Memoizes canonical names across lookups
+        if api_key is None and key_pool is None:
+            key_pool = APIKeyPool.from_env()
+        self.scheduler = PrefetchScheduler(self.cache, api_key, key_pool=key_pool, transport=self.transport, base_url=base_url,
+                                           canonicalizer=self.canonicalizer)
+        self.prefetch = prefetch        # Refresh the most requested cities in the background while the session is idle
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="lookup")
+        self.latencies = []
+
+    def parse_line(self, line):     # "Paris,FR; lyon/fr" -> [(location, country_code) or ValueError, ...]
+        parsed = []
+        for item in line.split(";"):
+            if not item.strip():
+                continue
+            try:
+                parsed.append(self.canonicalizer.canonicalize(item))
+            except ValueError as e:
+                parsed.append(ValueError(f"{item.strip()} : {e}"))
+        return list(dict.fromkeys(parsed))      # The same city twice on one line is looked up once
+
+    def lookup(self, location, country_code):       # One city: forecast, processed result, latency and cache status
+        started = time.perf_counter()
+        try:
+            forecast = self.scheduler.forecast(location, country_code)
+            result = forecast.process_forecast()
+        except Exception as e:
+            return {"location": location, "country_code": country_code, "error": str(e),
+                    "latency_ms": round((time.perf_counter() - started) * 1000, 1)}
+        latency_ms = round((time.perf_counter() - started) * 1000, 1)
+        self.latencies.append(latency_ms)
+        return {"location": location, "country_code": country_code, "result": result, "latency_ms": latency_ms,
+                "cache": "chaud" if forecast.from_cache else "froid",
+                "age_s": round(self.cache.age(self.cache.key(location, country_code)) or 0, 1)}
+
+    def lookup_many(self, locations):       # Concurrent lookups, results in input order
+        return list(self.executor.map(lambda item: self.lookup(*item), locations))
+
+    def display(self, lookup):
+        if "error" in lookup:
+            print(f"✗ {lookup['location']} ({lookup['country_code']}) : {lookup['error']} [{lookup['latency_ms']} ms]")
+            return
+        print(f"{lookup['location']} ({lookup['country_code']}) : {lookup['latency_ms']} ms, cache {lookup['cache']}"
+              f" (données de {lookup['age_s']} s)")
+        ForecastTable(lookup["result"]["forecast_details"]).display_table()
+
+    def display_stats(self):
+        stats = self.scheduler.stats()
+        mean = round(sum(self.latencies) / len(self.latencies), 1) if self.latencies else None
+        print(f"Recherches : {stats['lookups']}, servies depuis le cache : {stats['served_warm']} "
+              f"(taux {stats['hit_rate']}), latence moyenne : {mean} ms, rafraîchissements : {stats['refreshes']}")
+
+    def handle(self, line):     # Process one input line, False when the session should end
+        line = line.strip()
+        if line.lower() in self.QUIT:
+            return False
+        if line.lower() == "stats":
+            self.display_stats()
+            return True
+        parsed = self.parse_line(line)
+        for error in [item for item in parsed if isinstance(item, ValueError)]:
+            print(f"✗ {error}")
+        for lookup in self.lookup_many([item for item in parsed if not isinstance(item, ValueError)]):
+            self.display(lookup)
+        return True
+
+    def run(self):      # Read lines until 'q', an empty line or end of input
+        if self.prefetch:
+            self.scheduler.start()
+        try:
+            while True:
+                try:
+                    line = input(self.PROMPT)
+                except EOFError:
+                    break
+                if not line.strip() or not self.handle(line):
+                    break
+            self.display_stats()
+        finally:
+            self.scheduler.stop()
+            self.executor.shutdown()
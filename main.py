@@ -1,7 +1,192 @@
 # Main entry point for the weather application
-# Initializes and runs the WeatherApp.
-from classes.WeatherApp import WeatherApp 
+# Initializes and runs the WeatherApp, or a resumable batch with --batch (optionally sharded with --shards).
+import argparse
+import functools
+import requests
+from classes.WeatherApp import WeatherApp
+from classes.WeatherSession import WeatherSession
+from classes.APIKeyPool import APIKeyPool
+from classes.BatchRunner import BatchRunner
+from classes.ShardedBatch import ShardedBatch
+from classes.RegionalRollup import RegionalRollup
+from classes.ForecastArchive import ForecastArchive
+from classes.Accumulators import METRICS
+from classes.AlertEngine import AlertEngine
+from classes.Profiler import Profiler
+from classes.SharedForecastCache import SharedForecastCache
+from classes.LocationCanonicalizer import LocationCanonicalizer
+from classes.Transport import RequestsTransport
+from classes.HedgedTransport import HedgedTransport
+from classes.CircuitBreaker import CircuitBreaker
+
+def read_locations(path):      # One "ville,code_pays" (or "ville/code_pays") per line, blank lines and # comments ignored
+    locations = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            locations.append(LocationCanonicalizer.parse(line))
+    return locations
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Prévisions météorologiques OpenWeatherMap")
+    parser.add_argument("--session", action="store_true",
+                        help="mode interactif : plusieurs recherches par ligne, connexions et cache conservés")
+    parser.add_argument("--batch", help="fichier de lieux (une ligne 'ville,code_pays')")
+    parser.add_argument("--aliases", help="fichier JSON d'alias de villes ({\"paname\": \"Paris\", \"nyc\": \"New York,US\"})")
+    parser.add_argument("--checkpoint", default="checkpoint.jsonl", help="fichier de reprise du batch")
+    parser.add_argument("--fingerprints", default="fingerprints.json", help="empreintes des dernières données écrites")
+    parser.add_argument("--metrics", help="métriques calculées, séparées par des virgules (ex: rain,snow,wind_max)")
+    parser.add_argument("--keys-config", help="fichier JSON de clés API ({\"keys\": [...], \"calls_per_minute\": 60})")
+    parser.add_argument("--rollup", help="fichier de synthèse régionale à écrire après le batch")
+    parser.add_argument("--region-map", help="fichier JSON associant 'ville,code_pays' ou 'code_pays' à une région")
+    parser.add_argument("--top", type=int, default=10, help="nombre de villes les plus touchées dans la synthèse")
+    parser.add_argument("--alerts", help="fichier JSON de règles d'alerte évaluées pendant le batch")
+    parser.add_argument("--alerts-out", default="alerts.jsonl", help="fichier où les alertes déclenchées sont ajoutées")
+    parser.add_argument("--units", default="metric",
+                        help="systèmes d'unités écrits, séparés par des virgules (metric, imperial, standard)")
+    parser.add_argument("--cache-dir", help="cache partagé entre processus (réponses et résultats traités)")
+    parser.add_argument("--cache-ttl", type=int, default=600, help="durée de validité du cache en secondes")
+    parser.add_argument("--hedge-after", type=float, help="doubler une requête sans réponse après ce délai (secondes)")
+    parser.add_argument("--circuit-breaker", action="store_true",
+                        help="cesser d'appeler l'API quand elle est en erreur et resservir la dernière réponse valide")
+    parser.add_argument("--archive-dir", default="archive", help="archive historique où les résumés quotidiens sont ajoutés")
+    parser.add_argument("--archive-raw", metavar="DOSSIER", help="conserver les réponses brutes compressées (gzip) dans DOSSIER")
+    parser.add_argument("--shards", type=int, help="découper le batch en N partitions par hachage des lieux")
+    parser.add_argument("--shard-index", type=int,
+                        help="partition traitée par ce nœud (sans cet index, toutes les partitions tournent en processus locaux)")
+    parser.add_argument("--shard-dir", default="shards", help="dossier des partitions")
+    parser.add_argument("--merge", action="store_true", help="fusionner les partitions de --shard-dir dans json/")
+    parser.add_argument("--workers", type=int, default=4, help="nombre de requêtes simultanées")
+    parser.add_argument("--process-workers", type=int, default=1, help="nombre de threads de traitement")
+    parser.add_argument("--write-workers", type=int, default=1, help="nombre de threads d'écriture")
+    parser.add_argument("--profile", nargs="?", const="profiles", metavar="DOSSIER",
+                        help="profiler l'exécution (cProfile + tracemalloc) et écrire le rapport dans DOSSIER")
+    return parser
+
+def check_args(parser, args):      # Reject invalid options and combinations a mode would otherwise silently ignore
+    if args.top < 0:
+        parser.error("--top doit être positif ou nul")
+    if args.metrics:
+        unknown = [name for name in args.metrics.split(",") if name not in METRICS]
+        if unknown:     # Caught before any location is fetched
+            parser.error(f"métriques inconnues : {', '.join(unknown)} (disponibles : {', '.join(METRICS)})")
+    if args.shards:
+        ignored = [option for option, value in (("--rollup", args.rollup), ("--alerts", args.alerts), ("--region-map", args.region_map))
+                   if value]
+        if ignored:     # Consumers keep per-process state that the merge does not combine
+            parser.error(f"{', '.join(ignored)} incompatible avec --shards : lancez le batch sans partition")
+    if args.profile and (args.shards or args.session):      # Shard processes and the session loop have no profiled stages
+        parser.error("--profile incompatible avec --shards et --session : profilez un batch sans partition ou le mode interactif")
+    return args
+
+def build_transport(args, session=None, key_pool=None):     # Requests transport, optionally wrapped with hedging and a circuit breaker
+    transport = RequestsTransport(session=session)
+    if args.hedge_after:
+        transport = HedgedTransport(transport, hedge_after=args.hedge_after, key_pool=key_pool)
+    if args.circuit_breaker:        # With several keys, a 429 only benches one of them
+        transport = CircuitBreaker(transport, count_throttling=key_pool is None or len(key_pool) < 2)
+    return transport
+
+def run_batch(args, profiler=None):
+    canonicalizer = LocationCanonicalizer.from_file(args.aliases) if args.aliases else LocationCanonicalizer()
+    archive = ForecastArchive(args.archive_dir)     # Daily summaries kept across runs, as in interactive mode
+    consumers = [archive]
+    if args.rollup:
+        rollup = (RegionalRollup.from_file(args.region_map, args.top, canonicalizer) if args.region_map
+                  else RegionalRollup(top_n=args.top))
+        consumers.append(rollup)
+    if args.alerts:
+        region_map = RegionalRollup.from_file(args.region_map).region_map if args.region_map else None
+        alerts = AlertEngine.from_file(args.alerts, region_map=region_map, output_path=args.alerts_out, canonicalizer=canonicalizer)
+        consumers.append(alerts)
+    key_pool = APIKeyPool.from_env(args.keys_config)
+    runner = BatchRunner(read_locations(args.batch), None, checkpoint_path=args.checkpoint, fetch_workers=args.workers,
+                         process_workers=args.process_workers, write_workers=args.write_workers,
+                         fingerprint_path=args.fingerprints, metrics=args.metrics.split(",") if args.metrics else None,
+                         key_pool=key_pool, consumers=consumers, profiler=profiler,
+                         raw_archive_dir=args.archive_raw, units=args.units.split(","),
+                         cache=SharedForecastCache(args.cache_dir, args.cache_ttl) if args.cache_dir else None,
+                         canonicalizer=canonicalizer, transport=build_transport(args, key_pool=key_pool))
+    try:
+        summary = runner.run()
+    finally:
+        archive.close()
+    print(f"Batch : {summary['done']} traités, {summary['unchanged']} inchangés, {summary['skipped']} déjà faits, "
+          f"{summary['failed']} en échec, {summary['remaining']} restants, {summary['duplicates']} doublons ignorés")
+    if summary["fallbacks"]:
+        print(f"Réponses de repli : {summary['fallbacks']} lieux écrits avec une réponse antérieure du circuit ouvert "
+              f"({', '.join(summary['fallback_locations'])}), à nouveau demandés à la reprise")
+    print(f"Débit : {summary['pipeline']['throughput_per_s']} lieux/s en {summary['pipeline']['elapsed_s']}s")
+    transfer = summary["transfer"]
+    if transfer["requests"]:
+        print(f"Transfert : {transfer['wire_bytes']} octets reçus, {transfer['decoded_bytes']} octets décodés "
+              f"(ratio {transfer['compression_ratio']})")
+    if "hedging" in transfer:
+        hedging = transfer["hedging"]
+        print(f"Requêtes doublées : {hedging['hedged']} dont {hedging['hedge_wins']} plus rapides, {hedging['over_budget']} hors budget")
+    if "circuit" in transfer:
+        circuit = transfer["circuit"]
+        print(f"Circuit : {circuit['state']}, ouvert {circuit['opened']} fois, {circuit['rejected']} requêtes évitées, "
+              f"{circuit['fallbacks']} réponses de repli")
+    if args.rollup:
+        rollup.partial = summary["not_restored"] > 0
+        if rollup.partial:
+            print(f"Synthèse partielle : {summary['not_restored']} lieux déjà traités n'ont plus de fichier de sortie")
+        rollup.write(args.rollup)
+    if args.alerts:
+        stats = alerts.stats()
+        print(f"Alertes : {stats['matches']} déclenchées ({stats['rules']} règles, {stats['evaluation_s']}s), voir {args.alerts_out}")
+    if summary["aborted"]:
+        print(f"Batch interrompu : {summary['aborted']}. Relancez la même commande pour reprendre.")
+
+def shard_resources(args, processes=1):      # Key pool, transport and cache of one shard, built in the process running it
+    key_pool = APIKeyPool.from_env(args.keys_config)
+    key_pool.calls_per_minute = max(1, key_pool.calls_per_minute // processes)     # Local processes share the per-minute budget
+    return {"key_pool": key_pool, "transport": build_transport(args, key_pool=key_pool),
+            "cache": SharedForecastCache(args.cache_dir, args.cache_ttl) if args.cache_dir else None}
+
+def run_sharded(args):     # One shard per node with --shard-index, every shard as a local process otherwise, then merge
+    if not args.merge:
+        canonicalizer = LocationCanonicalizer.from_file(args.aliases) if args.aliases else LocationCanonicalizer()
+        options = {"fetch_workers": args.workers, "process_workers": args.process_workers, "write_workers": args.write_workers,
+                   "metrics": args.metrics.split(",") if args.metrics else None, "units": args.units.split(","),
+                   "raw_archive_dir": args.archive_raw, "canonicalizer": canonicalizer}
+        if args.shard_index is not None:
+            summary = ShardedBatch(read_locations(args.batch), args.shards, args.shard_index, None, args.shard_dir,
+                                   **options, **shard_resources(args)).run()
+            print(f"Partition {args.shard_index}/{args.shards} : {summary['done']} traités, {summary['unchanged']} inchangés, "
+                  f"{summary['failed']} en échec, {summary['remaining']} restants")
+            return
+        ShardedBatch.run_local(read_locations(args.batch), args.shards, None, args.shard_dir,
+                               setup=functools.partial(shard_resources, args, args.shards), **options)
+    merged = ShardedBatch.merge(args.shard_dir, args.shards)
+    print(f"Fusion de {merged['shards']} partitions : {merged['locations']} lieux dans json/, {merged['failed']} en échec, "
+          f"{merged['remaining']} restants, {merged['duplicates']} doublons ignorés{'' if merged['complete'] else ' (partitions incomplètes)'}")
 
 if __name__ == "__main__":
-    app = WeatherApp()
-    app.run()
\ No newline at end of file
+    parser = build_parser()
+    args = check_args(parser, parser.parse_args())
+
+    profiler = Profiler(args.profile).start() if args.profile else None
+    try:
+        if args.shards:
+            run_sharded(args)
+        elif args.batch:
+            run_batch(args, profiler)
+        elif args.session:
+            canonicalizer = LocationCanonicalizer.from_file(args.aliases) if args.aliases else None
+            key_pool = APIKeyPool.from_env(args.keys_config)
+            WeatherSession(key_pool=key_pool, canonicalizer=canonicalizer,
+                           transport=build_transport(args, requests.Session(), key_pool), max_workers=args.workers,
+                           cache=SharedForecastCache(args.cache_dir, args.cache_ttl) if args.cache_dir else None).run()
+        else:
+            app = WeatherApp(profiler, LocationCanonicalizer.from_file(args.aliases) if args.aliases else None)
+            app.run()
+    finally:
+        if profiler is not None:
+            profiler.stop()
+            pstats_path, report_path = profiler.write()
+            print(profiler.report())
+            print(f"Profil sauvegardé dans {pstats_path}, rapport dans {report_path}")
@@ -0,0 +1,96 @@
+"""
+Tests unitaires pour les accumulateurs de statistiques
+Teste le calcul en une passe, la fusion de résultats partiels et les métriques étendues
+"""
+import unittest
+import sys
+from pathlib import Path
+from loguru import logger
+from tests.logging_setup import configure_for
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from classes.Accumulators import ForecastStats, METRICS, DEFAULT_METRICS
+from classes.StubServer import StubServer
+from classes.WeatherForecast import WeatherForecast
+
+
+class TestAccumulators(unittest.TestCase):
+    """Tests unitaires pour ForecastStats et les accumulateurs"""
+
+    def setUp(self):
+        """Initialisation avant chaque test"""
+        configure_for(Path(__file__).stem)
+        logger.info("🧪 Démarrage test Accumulators")
+        self.payload = StubServer.synthetic_forecast("Paris", "FR")
+        self.entries = self.payload["list"]
+
+    def tearDown(self):
+        """Nettoyage après chaque test"""
+        logger.info("✅ Fin test Accumulators\n")
+
+    def test_merge_matches_single_pass(self):
+        """Test que la fusion de blocs donne le même résultat qu'une passe unique"""
+        logger.info("Test : merge()")
+        metrics = list(METRICS)
+        single = ForecastStats(metrics).update_all(self.entries)
+
+        # Chunk boundaries fall inside days; each chunk knows the entry preceding it
+        chunks = [self.entries[0:7], self.entries[7:19], self.entries[19:]]
+        merged = ForecastStats(metrics).update_all(chunks[0])
+        for index, chunk in enumerate(chunks[1:], start=1):
+            previous = chunks[index - 1][-1]
+            merged.merge(ForecastStats(metrics, previous=previous).update_all(chunk))
+
+        self.assertEqual(merged.day_results(), single.day_results())
+        self.assertEqual(merged.period_results(), single.period_results())
+        logger.success("✓ Fusion identique à la passe unique")
+
+    def test_extended_metrics(self):
+        """Test les métriques étendues sur des données connues"""
+        logger.info("Test : Métriques étendues")
+        entries = [
+            {"dt": 1, "dt_txt": "2025-11-17 00:00:00", "main": {"temp": 2, "feels_like": 0, "humidity": 80, "pressure": 1010},
+             "weather": [{"description": "light rain"}], "rain": {"3h": 1.2}, "wind": {"speed": 4.0}, "pop": 0.8},
+            {"dt": 2, "dt_txt": "2025-11-17 03:00:00", "main": {"temp": 6, "feels_like": 3, "humidity": 60, "pressure": 1004},
+             "weather": [{"description": "clear sky"}], "wind": {"speed": 9.5}, "pop": 0.1},
+        ]
+        stats = ForecastStats(["temp_mean", "wind_max", "pressure_trend", "pop_max", "feels_like_min", "transitions"])
+        day = stats.update_all(entries).day_results()[0]
+
+        self.assertEqual(day["mean_temp"], 4)
+        self.assertEqual(day["max_wind_speed"], 9.5)
+        self.assertEqual(day["pressure_trend_hpa"], -6)
+        self.assertEqual(day["max_pop"], 0.8)
+        self.assertEqual(day["min_feels_like"], 0)
+        self.assertEqual(day["major_transitions_count"], 1)
+        logger.success("✓ Métriques étendues validées")
+
+    def test_process_forecast_lists_metrics(self):
+        """Test que le résultat liste les métriques calculées"""
+        logger.info("Test : process_forecast(metrics=...)")
+        forecast = WeatherForecast("Paris", "FR", "stub_key")
+        forecast.forecast_data = self.payload
+
+        default = forecast.process_forecast()
+        extended = forecast.process_forecast(DEFAULT_METRICS + ["wind_max"])
+
+        self.assertEqual(default["metrics"], DEFAULT_METRICS)
+        self.assertIn("min_temp_period", default)
+        self.assertIn("max_temp_period", default)
+        self.assertNotIn("max_wind_speed_period", default)
+        self.assertIn("max_wind_speed_period", extended)
+        self.assertIn("max_wind_speed", extended["forecast_details"][0])
+        self.assertEqual(default["forecast_details"][0]["rain_cumul_mm"], extended["forecast_details"][0]["rain_cumul_mm"])
+        logger.success("✓ Schéma des métriques validé")
+
+    def test_unknown_metric(self):
+        """Test une métrique inconnue"""
+        logger.info("Test : Métrique inconnue")
+        with self.assertRaises(ValueError):
+            ForecastStats(["rain", "uv_index"])
+        logger.success("✓ Métrique inconnue rejetée")
+
+
+if __name__ == "__main__":
+    unittest.main()
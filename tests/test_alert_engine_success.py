@@ -0,0 +1,162 @@
+"""
+Tests unitaires pour la classe AlertEngine
+Teste la correspondance des seuils, la portée des règles, l'index et l'émission des alertes
+"""
+import unittest
+import sys
+import json
+import random
+import tempfile
+from pathlib import Path
+from loguru import logger
+from tests.logging_setup import configure_for
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from classes.AlertEngine import AlertEngine, AlertRule
+from classes.BatchRunner import BatchRunner
+from classes.StubServer import StubServer
+from classes.LocationCanonicalizer import LocationCanonicalizer
+
+
+class TestAlertEngine(unittest.TestCase):
+    """Tests unitaires pour la classe AlertEngine"""
+
+    def setUp(self):
+        """Initialisation avant chaque test"""
+        configure_for(Path(__file__).stem)
+        logger.info("🧪 Démarrage test AlertEngine")
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.result = {
+            "forecast_location_name": "Paris", "country_code": "FR", "total_rain_period_mm": 12.5,
+            "forecast_details": [
+                {"date_local": "2025-11-17", "rain_cumul_mm": 8.0, "snow_cumul_mm": 0, "major_transitions_count": 1},
+                {"date_local": "2025-11-18", "rain_cumul_mm": 4.5, "snow_cumul_mm": 2.0, "major_transitions_count": 3},
+            ]
+        }
+
+    def tearDown(self):
+        """Nettoyage après chaque test"""
+        self.tmp_dir.cleanup()
+        logger.info("✅ Fin test AlertEngine\n")
+
+    def test_scopes_and_operators(self):
+        """Test les portées ville/région/globale et les opérateurs"""
+        logger.info("Test : evaluate() - Portées et opérateurs")
+        engine = AlertEngine([
+            {"id": "pluie-paris", "city": "Paris,FR", "field": "rain_cumul_mm", "threshold": 5},
+            {"id": "pluie-lyon", "city": "Lyon,FR", "field": "rain_cumul_mm", "threshold": 1},
+            {"id": "neige-europe", "region": "Europe", "field": "snow_cumul_mm", "op": ">", "threshold": 2},
+            {"id": "neige-fr", "region": "FR", "field": "snow_cumul_mm", "op": ">=", "threshold": 2},
+            {"id": "transitions", "field": "major_transitions_count", "threshold": 3},
+            {"id": "calme", "field": "major_transitions_count", "op": "<", "threshold": 2},
+            {"id": "periode", "field": "total_rain_period_mm", "op": ">", "threshold": 10},
+        ])
+        matches, _ = engine.evaluate("Paris", "FR", self.result)
+        found = {(match["rule"], match["date"]) for match in matches}
+
+        self.assertEqual(found, {("pluie-paris", "2025-11-17"), ("neige-fr", "2025-11-18"), ("transitions", "2025-11-18"),
+                                 ("calme", "2025-11-17"), ("periode", None)})
+        logger.success("✓ Portées et opérateurs validés")
+
+    def test_matches_brute_force(self):
+        """Test que l'index donne les mêmes alertes qu'une évaluation règle par règle"""
+        logger.info("Test : evaluate() - Équivalence")
+        rng = random.Random(7)
+        rules = []
+        for index in range(500):
+            scope = rng.choice([{"city": "Paris,FR"}, {"city": "Nice,FR"}, {"region": "FR"}, {}])
+            rules.append({"id": index, "field": rng.choice(["rain_cumul_mm", "snow_cumul_mm", "major_transitions_count"]),
+                          "op": rng.choice([">=", ">", "<=", "<"]), "threshold": rng.randint(0, 10), **scope})
+        engine = AlertEngine(rules)
+        matches, _ = engine.evaluate("Paris", "FR", self.result)
+
+        compare = {">=": lambda a, b: a >= b, ">": lambda a, b: a > b, "<=": lambda a, b: a <= b, "<": lambda a, b: a < b}
+        expected = set()
+        for rule in rules:
+            if rule.get("city", "Paris,FR") != "Paris,FR" or rule.get("region", "FR") != "FR":
+                continue
+            for detail in self.result["forecast_details"]:
+                if compare[rule["op"]](detail[rule["field"]], rule["threshold"]):
+                    expected.add((rule["id"], detail["date_local"]))
+        self.assertEqual({(match["rule"], match["date"]) for match in matches}, expected)
+        logger.success(f"✓ {len(expected)} alertes identiques")
+
+    def test_lookups_independent_of_rule_count(self):
+        """Test que le nombre de recherches ne croît pas avec le nombre de règles"""
+        logger.info("Test : evaluate() - Index")
+        small = AlertEngine([{"city": "Paris,FR", "field": "rain_cumul_mm", "threshold": 5}])
+        large = AlertEngine([{"city": f"Ville{index},FR", "field": "rain_cumul_mm", "threshold": index % 20}
+                             for index in range(5000)] + [{"city": "Paris,FR", "field": "rain_cumul_mm", "threshold": 5}])
+
+        small_matches, small_lookups = small.evaluate("Paris", "FR", self.result)
+        large_matches, large_lookups = large.evaluate("Paris", "FR", self.result)
+        self.assertEqual(len(small_matches), len(large_matches))
+        self.assertEqual(small_lookups, large_lookups)
+        logger.success("✓ Recherches indépendantes du nombre de règles")
+
+    def test_invalid_rules(self):
+        """Test le rejet des règles invalides"""
+        logger.info("Test : AlertRule - Validation")
+        with self.assertRaises(ValueError):
+            AlertRule(0, "pluie", 5)
+        with self.assertRaises(ValueError):
+            AlertRule(0, "rain_cumul_mm", 5, op="==")
+        with self.assertRaises(ValueError):
+            AlertEngine([{"id": "sans-pays", "city": "Paris", "field": "rain_cumul_mm", "threshold": 5}])
+        logger.success("✓ Règles invalides rejetées")
+
+    def test_rule_city_is_canonicalized(self):
+        """Test qu'une règle écrite avec une autre graphie vise la même ville que le batch"""
+        logger.info("Test : AlertEngine - Ville canonique")
+        canonicalizer = LocationCanonicalizer({"paname": "Paris"})
+        engine = AlertEngine([
+            {"id": "pluie-paris", "city": "paname,fr", "field": "rain_cumul_mm", "threshold": 5},
+            {"id": "pluie-stetienne", "city": "saint-étienne,fr", "field": "rain_cumul_mm", "threshold": 5},
+        ], canonicalizer=canonicalizer)
+        location, country_code = canonicalizer.canonicalize("Saint-Etienne,FR")
+
+        paris, _ = engine.evaluate("Paris", "FR", self.result)
+        saint_etienne, _ = engine.evaluate(location, country_code, self.result)
+
+        self.assertEqual({match["rule"] for match in paris}, {"pluie-paris"})
+        self.assertEqual({match["rule"] for match in saint_etienne}, {"pluie-stetienne"})
+        logger.success("✓ Villes des règles canonisées")
+
+    def test_region_map_cities_are_canonicalized(self):
+        """Test que les villes de la table des régions sont normalisées comme celles du batch"""
+        logger.info("Test : AlertEngine - Table des régions canonisée")
+        canonicalizer = LocationCanonicalizer()
+        engine = AlertEngine([{"id": "pluie-loire", "region": "Loire", "field": "rain_cumul_mm", "threshold": 5}],
+                             region_map={"saint-étienne,fr": "Loire"}, canonicalizer=canonicalizer)
+        location, country_code = canonicalizer.canonicalize("Saint-Etienne", "FR")
+
+        matches, _ = engine.evaluate(location, country_code, self.result)
+        self.assertEqual({(match["rule"], match["region"]) for match in matches}, {("pluie-loire", "Loire")})
+        with self.assertRaises(ValueError):
+            AlertEngine([], region_map={"<script>,FR": "Loire"})
+        logger.success("✓ Région trouvée pour la graphie du batch")
+
+    def test_batch_emits_to_file_and_callback(self):
+        """Test l'évaluation en ligne pendant un batch"""
+        logger.info("Test : consume() - Batch")
+        output_path = f"{self.tmp_dir.name}/alerts.jsonl"
+        received = []
+        engine = AlertEngine([{"id": "humide", "field": "max_humidity", "threshold": 0}],
+                             callback=received.append, output_path=output_path)
+        with StubServer() as server:
+            BatchRunner([("Paris", "FR"), ("Lyon", "FR")], "stub_key", checkpoint_path=f"{self.tmp_dir.name}/checkpoint.jsonl",
+                        output_dir=f"{self.tmp_dir.name}/json", base_url=server.base_url, consumers=[engine]).run()
+
+        with open(output_path, "r", encoding="utf-8") as f:
+            written = [json.loads(line) for line in f]
+        days = {entry["dt_txt"][:10] for entry in StubServer.synthetic_forecast("Paris", "FR")["list"]}
+        self.assertEqual(len(written), 2 * len(days))
+        self.assertEqual(written, received)
+        self.assertEqual({match["location"] for match in written}, {"Paris,FR", "Lyon,FR"})
+        self.assertEqual(engine.stats()["forecasts"], 2)
+        logger.success(f"✓ {len(written)} alertes émises")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+"""
+Tests unitaires pour la classe APIKeyPool
+Teste le chargement des clés, la rotation, les budgets et la mise en pause des clés refusées
+"""
+import unittest
+import sys
+import time
+from pathlib import Path
+from loguru import logger
+from tests.logging_setup import configure_for
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from classes.APIKeyPool import APIKeyPool, KeyPoolExhausted
+from classes.APIKey import APIKey
+from classes.StubServer import StubServer
+from classes.WeatherForecast import WeatherForecast
+
+
+class TestAPIKeyPool(unittest.TestCase):
+    """Tests unitaires pour la classe APIKeyPool"""
+
+    def setUp(self):
+        """Initialisation avant chaque test"""
+        configure_for(Path(__file__).stem)
+        logger.info("🧪 Démarrage test APIKeyPool")
+
+    def tearDown(self):
+        """Nettoyage après chaque test"""
+        logger.info("✅ Fin test APIKeyPool\n")
+
+    def test_from_env(self):
+        """Test le chargement des clés depuis l'environnement"""
+        logger.info("Test : from_env()")
+        pool = APIKeyPool.from_env(environ={"OPENWEATHER_API_KEYS": "key_a, key_b,,key_a"})
+        self.assertEqual(list(pool.keys), ["key_a", "key_b"])
+
+        fallback = APIKeyPool.from_env(environ={})
+        self.assertEqual(list(fallback.keys), [APIKey.key])
+        logger.success("✓ from_env() validé")
+
+    def test_rotation_spreads_requests(self):
+        """Test la répartition des requêtes entre les clés"""
+        logger.info("Test : Rotation des clés")
+        pool = APIKeyPool(["key_a", "key_b", "key_c"])
+        for _ in range(9):
+            pool.release(pool.acquire(), 200)
+
+        used = [stats["used"] for stats in pool.stats().values()]
+        self.assertEqual(used, [3, 3, 3])
+        logger.success("✓ Rotation validée")
+
+    def test_budget_exhaustion(self):
+        """Test l'épuisement du budget par minute avec un délai d'attente maximal"""
+        logger.info("Test : Budget épuisé")
+        pool = APIKeyPool(["key_a"], calls_per_minute=2, max_wait=0)
+        pool.release(pool.acquire(), 200)
+        pool.release(pool.acquire(), 200)
+
+        with self.assertRaises(KeyPoolExhausted):
+            pool.acquire()
+        logger.success("✓ Budget respecté")
+
+    def test_budget_waits_for_window_reset(self):
+        """Test qu'un budget par minute épuisé fait attendre la fenêtre suivante au lieu d'abandonner"""
+        logger.info("Test : Attente de la fenêtre suivante")
+        pool = APIKeyPool(["key_a"], calls_per_minute=3, window_seconds=0.3)
+        for _ in range(3):
+            pool.release(pool.acquire(), 200)
+
+        started = time.monotonic()
+        pool.release(pool.acquire(), 200)
+        self.assertGreater(time.monotonic() - started, 0.1)
+        self.assertEqual(pool.keys["key_a"]["used"], 4)
+        logger.success("✓ Fenêtre suivante attendue")
+
+    def test_exhausted_only_when_no_key_can_recover(self):
+        """Test que l'épuisement n'est signalé que pour un quota total atteint ou des clés toutes refusées (401)"""
+        logger.info("Test : Épuisement définitif")
+        pool = APIKeyPool(["key_a"], total_quota=1)
+        pool.release(pool.acquire(), 200)
+        with self.assertRaises(KeyPoolExhausted):
+            pool.acquire()
+
+        pool = APIKeyPool(["key_a", "key_b"])
+        pool.release(pool.acquire(), 401)
+        pool.release(pool.acquire(), 401)
+        with self.assertRaises(KeyPoolExhausted):
+            pool.acquire()
+
+        pool = APIKeyPool(["key_a"], bench_seconds=0.2)     # Throttled (429): wait for the bench to expire
+        pool.release(pool.acquire(), 429)
+        pool.release(pool.acquire(), 200)
+        self.assertEqual(pool.keys["key_a"]["rejections"], 1)
+        logger.success("✓ Épuisement définitif validé")
+
+    def test_rejected_key_is_benched(self):
+        """Test qu'une clé refusée (401) est mise en pause et remplacée"""
+        logger.info("Test : Clé refusée")
+        pool = APIKeyPool(["accepted_key", "rejected_key"])
+
+        with StubServer(invalid_keys=["rejected_key"]) as server:
+            for city in ("Paris", "Lyon", "Nice"):
+                forecast = WeatherForecast(city, "FR", None, base_url=server.base_url, key_pool=pool)
+                forecast.get_forecast()
+                self.assertEqual(forecast.api_key, "accepted_key")
+
+        stats = pool.stats()
+        self.assertEqual(server.stats["unauthorized"], 1)
+        self.assertTrue(stats["reje..._key"]["benched"])
+        self.assertFalse(stats["acce..._key"]["benched"])
+        self.assertEqual(pool.keys["rejected_key"]["rejections"], 1)
+        logger.success("✓ Clé refusée mise en pause")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,185 @@
+"""
+Tests unitaires pour la classe BatchRunner
+Teste l'exécution par lots, le point de reprise et la reprise après interruption
+"""
+import unittest
+import sys
+import json
+import tempfile
+from pathlib import Path
+from loguru import logger
+from tests.logging_setup import configure_for
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from classes.BatchRunner import BatchRunner
+from classes.BatchCheckpoint import BatchCheckpoint
+from classes.StubServer import StubServer
+
+
+class FailingConsumer:
+    """Consommateur qui échoue pour une ville donnée"""
+
+    def __init__(self, location):
+        self.location = location
+
+    def consume(self, location, country_code, result):
+        if location == self.location:
+            raise OSError("disque plein")
+
+
+class TestBatchRunner(unittest.TestCase):
+    """Tests unitaires pour la classe BatchRunner"""
+
+    def setUp(self):
+        """Initialisation avant chaque test"""
+        configure_for(Path(__file__).stem)
+        logger.info("🧪 Démarrage test BatchRunner")
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.output_dir = f"{self.tmp_dir.name}/json"
+        self.checkpoint_path = f"{self.tmp_dir.name}/checkpoint.jsonl"
+        self.locations = [("Paris", "FR"), ("Lyon", "FR"), ("London", "GB"), ("Tokyo", "JP"), ("Paris", "FR")]
+
+    def tearDown(self):
+        """Nettoyage après chaque test"""
+        self.tmp_dir.cleanup()
+        logger.info("✅ Fin test BatchRunner\n")
+
+    def make_runner(self, server, locations=None):
+        return BatchRunner(locations or self.locations, "stub_key", checkpoint_path=self.checkpoint_path,
+                           output_dir=self.output_dir, base_url=server.base_url)
+
+    def test_run_writes_every_location(self):
+        """Test l'exécution complète d'un lot"""
+        logger.info("Test : run() - Lot complet")
+        with StubServer() as server:
+            summary = self.make_runner(server).run()
+
+        self.assertEqual(summary["total"], 4)
+        self.assertEqual(summary["done"], 4)
+        self.assertEqual(summary["remaining"], 0)
+        self.assertEqual(server.stats["requests"], 4)
+        with open(f"{self.output_dir}/Tokyo_JP.json", "r") as f:
+            self.assertIn("forecast_details", json.load(f))
+        logger.success("✓ Lot complet validé")
+
+    def test_resume_skips_completed(self):
+        """Test la reprise qui ne refait que le travail restant"""
+        logger.info("Test : run() - Reprise")
+        checkpoint = BatchCheckpoint(self.checkpoint_path)
+        checkpoint.record("Paris,FR", "done")
+        checkpoint.record("Lyon,FR", "done")
+
+        with StubServer() as server:
+            summary = self.make_runner(server).run()
+
+        self.assertEqual(summary["skipped"], 2)
+        self.assertEqual(summary["done"], 2)
+        self.assertEqual(server.stats["requests"], 2)
+        self.assertFalse(Path(self.checkpoint_path).exists())      # Run finished: nothing left to resume
+        logger.success("✓ Reprise validée")
+
+    def test_finished_run_is_not_resumed(self):
+        """Test que la même commande relancée après un lot terminé rafraîchit tous les lieux"""
+        logger.info("Test : run() - Lot relancé")
+        with StubServer() as server:
+            first = self.make_runner(server).run()
+            second = self.make_runner(server).run()
+
+        self.assertEqual((first["done"], first["remaining"]), (4, 0))
+        self.assertEqual(second["skipped"], 0)
+        self.assertEqual(second["done"], 4)
+        self.assertEqual(server.stats["requests"], 8)
+        logger.success("✓ Lot relancé entièrement")
+
+    def test_quota_exhaustion_aborts_then_resumes(self):
+        """Test l'interruption sur 429 puis la reprise"""
+        logger.info("Test : run() - Quota épuisé")
+        with StubServer(rate_limit_rate=1.0) as server:
+            summary = self.make_runner(server).run()
+
+        self.assertIsNotNone(summary["aborted"])
+        self.assertEqual(summary["done"], 0)
+        self.assertEqual(summary["remaining"], 4)
+
+        with StubServer() as server:
+            summary = self.make_runner(server).run()
+
+        self.assertEqual(summary["done"], 4)
+        self.assertEqual(summary["remaining"], 0)
+        logger.success("✓ Interruption et reprise validées")
+
+    def test_unknown_location_is_not_retried(self):
+        """Test qu'une ville inconnue est marquée en échec définitif et n'est pas retentée à la reprise"""
+        logger.info("Test : run() - Ville inconnue")
+        locations = [("Paris", "FR"), ("Atlantis", "XX")]
+        with StubServer(unknown_locations=["Atlantis"]) as server:
+            runner = self.make_runner(server, locations)
+            runner.consumers = [FailingConsumer("Paris")]       # Transient write failure: the run is left to resume
+            summary = runner.run()
+            self.assertEqual(summary["failed"], 2)
+            self.assertEqual(summary["remaining"], 1)
+            self.assertIn("Atlantis,XX", summary["errors"])
+
+            summary = self.make_runner(server, locations).run()
+
+        self.assertEqual(summary["skipped"], 1)
+        self.assertEqual(summary["done"], 1)
+        self.assertEqual(server.stats["requests"], 3)
+        logger.success("✓ Échec définitif enregistré")
+
+    def test_unchanged_payloads_are_skipped(self):
+        """Test que les données inchangées ne sont ni retraitées ni réécrites lorsque la même commande est relancée"""
+        logger.info("Test : run() - Données inchangées")
+        for etags in (True, False):     # 304 from the upstream, then local fingerprint comparison
+            fingerprint_path = f"{self.tmp_dir.name}/fingerprints_{etags}.json"
+            output_dir = f"{self.tmp_dir.name}/json_{etags}"
+            with self.subTest(etags=etags), StubServer(etags=etags) as server:
+                def make_runner():      # Same command line every time, as from the CLI
+                    return BatchRunner(self.locations, "stub_key", checkpoint_path=self.checkpoint_path, output_dir=output_dir,
+                                       base_url=server.base_url, fingerprint_path=fingerprint_path)
+                first = make_runner().run()
+                written = Path(f"{output_dir}/Paris_FR.json").stat().st_mtime_ns
+                summary = make_runner().run()
+
+                self.assertEqual((first["done"], first["unchanged"]), (4, 0))
+                self.assertEqual(summary["skipped"], 0)
+                self.assertEqual(summary["unchanged"], 4)
+                self.assertEqual(summary["done"], 0)
+                self.assertEqual(summary["remaining"], 0)
+                self.assertEqual(Path(f"{output_dir}/Paris_FR.json").stat().st_mtime_ns, written)
+                self.assertEqual(server.stats["requests"], 8)
+                self.assertEqual(server.stats["not_modified"], 4 if etags else 0)
+        logger.success("✓ Données inchangées ignorées")
+
+    def test_metric_change_rewrites_unchanged_payloads(self):
+        """Test qu'un changement de --metrics réécrit les fichiers même si les données sont inchangées"""
+        logger.info("Test : run() - Métriques modifiées")
+        fingerprint_path = f"{self.tmp_dir.name}/fingerprints.json"
+        with StubServer() as server:
+            def make_runner(metrics=None):
+                return BatchRunner(self.locations, "stub_key", checkpoint_path=self.checkpoint_path, output_dir=self.output_dir,
+                                   base_url=server.base_url, fingerprint_path=fingerprint_path, metrics=metrics)
+            make_runner().run()
+            changed = make_runner(["rain", "wind_max"]).run()
+            repeated = make_runner(["rain", "wind_max"]).run()
+
+        self.assertEqual((changed["done"], changed["unchanged"]), (4, 0))
+        self.assertEqual((repeated["done"], repeated["unchanged"]), (0, 4))
+        with open(f"{self.output_dir}/Paris_FR.json", "r") as f:
+            self.assertEqual(json.load(f)["metrics"], ["rain", "wind_max"])
+        logger.success("✓ Fichiers recalculés pour les nouvelles métriques")
+
+    def test_unknown_metric_rejected_before_fetch(self):
+        """Test qu'une métrique inconnue est refusée avant toute requête"""
+        logger.info("Test : BatchRunner() - Métrique inconnue")
+        with StubServer() as server:
+            with self.assertRaises(ValueError):
+                BatchRunner(self.locations, "stub_key", checkpoint_path=self.checkpoint_path, output_dir=self.output_dir,
+                            base_url=server.base_url, metrics=["rain", "pluie"])
+        self.assertEqual(server.stats["requests"], 0)
+        self.assertFalse(Path(self.checkpoint_path).exists())
+        logger.success("✓ Métrique inconnue refusée")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+"""
+Tests unitaires pour l'itérateur de résumés quotidiens
+Teste iter_forecast(), stream_forecast() et l'affichage direct avec ForecastTable
+"""
+import unittest
+import sys
+import io
+import json
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+from loguru import logger
+from tests.logging_setup import configure_for
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from classes.WeatherForecast import WeatherForecast
+from classes.ForecastTable import ForecastTable
+from classes.StubServer import StubServer
+
+
+class TestDailySummaries(unittest.TestCase):
+    """Tests unitaires pour iter_forecast() et stream_forecast()"""
+
+    def setUp(self):
+        """Initialisation avant chaque test"""
+        configure_for(Path(__file__).stem)
+        logger.info("🧪 Démarrage test DailySummaries")
+        self.forecast = WeatherForecast("Paris", "FR", "stub_key")
+        self.forecast.forecast_data = StubServer.synthetic_forecast("Paris", "FR")
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """Nettoyage après chaque test"""
+        self.tmp_dir.cleanup()
+        logger.info("✅ Fin test DailySummaries\n")
+
+    def test_matches_process_forecast(self):
+        """Test que l'itérateur produit les mêmes résultats que process_forecast()"""
+        logger.info("Test : iter_forecast() - Résultats")
+        expected = self.forecast.process_forecast()
+        summaries = self.forecast.iter_forecast()
+
+        self.assertIsNone(summaries.totals)
+        self.assertEqual(list(summaries), expected["forecast_details"])
+        self.assertEqual(summaries.totals["total_rain_period_mm"], expected["total_rain_period_mm"])
+        self.assertEqual(summaries.totals["max_humidity_period"], expected["max_humidity_period"])
+        logger.success("✓ Résultats identiques")
+
+    def test_first_day_is_lazy(self):
+        """Test que le premier jour est produit sans parcourir toute la liste"""
+        logger.info("Test : iter_forecast() - Évaluation paresseuse")
+        consumed = []
+        entries = self.forecast.forecast_data["list"]
+
+        def tracking():
+            for entry in entries:
+                consumed.append(entry)
+                yield entry
+
+        self.forecast.forecast_data["list"] = tracking()
+        today = next(self.forecast.iter_forecast())
+
+        # Only the first day's entries plus the first entry of the next day have been read
+        first_day = sum(1 for entry in entries if entry["dt_txt"][:10] == today["date_local"])
+        self.assertEqual(len(consumed), first_day + 1)
+        self.assertLess(len(consumed), len(entries))
+        logger.success("✓ Premier jour produit immédiatement")
+
+    def test_release_drops_raw_entries(self):
+        """Test la libération des données brutes pendant l'itération"""
+        logger.info("Test : iter_forecast(release=True)")
+        entries = self.forecast.forecast_data["list"]
+        days = list(self.forecast.iter_forecast(release=True))
+
+        self.assertGreater(len(days), 0)
+        self.assertEqual(self.forecast.forecast_data["list"], [])
+        self.assertTrue(all(entry is None for entry in entries))
+        logger.success("✓ Données brutes libérées")
+
+    def test_stream_forecast_writes_valid_json(self):
+        """Test l'écriture en flux du fichier JSON"""
+        logger.info("Test : stream_forecast()")
+        expected = self.forecast.process_forecast()
+        self.forecast.stream_forecast("paris.json", directory=self.tmp_dir.name)
+
+        with open(f"{self.tmp_dir.name}/paris.json", "r") as f:
+            saved = json.load(f)
+        self.assertEqual(saved, expected)
+        logger.success("✓ JSON écrit en flux")
+
+    def test_table_from_iterator(self):
+        """Test l'affichage du tableau directement depuis l'itérateur"""
+        logger.info("Test : ForecastTable(iter_forecast())")
+        captured_output = io.StringIO()
+        with patch('sys.stdout', captured_output):
+            ForecastTable(self.forecast.iter_forecast()).display_table()
+
+        first_day = self.forecast.forecast_data["list"][0]["dt_txt"][:10]
+        self.assertIn(first_day, captured_output.getvalue())
+        logger.success("✓ Tableau affiché depuis l'itérateur")
+
+
+if __name__ == "__main__":
+    unittest.main()
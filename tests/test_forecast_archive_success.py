@@ -0,0 +1,195 @@
+"""
+Tests unitaires pour la classe ForecastArchive
+Teste l'ajout, l'indexation et la relecture des résumés quotidiens
+"""
+import unittest
+import sys
+import datetime
+import tempfile
+import multiprocessing
+from pathlib import Path
+from loguru import logger
+from tests.logging_setup import configure_for
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from classes.ForecastArchive import ForecastArchive
+from classes.BatchRunner import BatchRunner
+from classes.StubServer import StubServer
+
+
+def append_cities(directory, cities, forecast):
+    """Processus écrivain : ajoute chaque ville à la même archive"""
+    archive = ForecastArchive(directory)
+    for city in cities:
+        archive.append(city, "FR", forecast)
+    archive.close()
+
+
+class TestForecastArchive(unittest.TestCase):
+    """Tests unitaires pour la classe ForecastArchive"""
+
+    def setUp(self):
+        """Initialisation avant chaque test"""
+        configure_for(Path(__file__).stem)
+        logger.info("🧪 Démarrage test ForecastArchive")
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.forecast = {
+            "forecast_details": [
+                {
+                    "date_local": "2025-11-17",
+                    "rain_cumul_mm": 1.5,
+                    "snow_cumul_mm": 0,
+                    "major_transitions_count": 1,
+                    "max_humidity": 90,
+                    "min_temp": 3.25,
+                    "max_temp": 8.5
+                },
+                {
+                    "date_local": "2025-11-18",
+                    "rain_cumul_mm": 2.25,
+                    "snow_cumul_mm": 0.5,
+                    "major_transitions_count": 0,
+                    "max_humidity": 75,
+                    "min_temp": 1.0,
+                    "max_temp": 6.0
+                }
+            ]
+        }
+
+    def tearDown(self):
+        """Nettoyage après chaque test"""
+        self.tmp_dir.cleanup()
+        logger.info("✅ Fin test ForecastArchive\n")
+
+    def test_append_and_query(self):
+        """Test l'ajout puis la relecture des résumés"""
+        logger.info("Test : append() / query()")
+        with ForecastArchive(self.tmp_dir.name) as archive:
+            archive.append("Paris", "FR", self.forecast)
+            records = archive.query("Paris", "FR")
+
+        self.assertEqual(len(records), 2)
+        self.assertEqual(records[0]["date_local"], "2025-11-17")
+        self.assertEqual(records[0]["rain_cumul_mm"], 1.5)
+        self.assertEqual(records[1]["snow_cumul_mm"], 0.5)
+        self.assertEqual(records[0]["max_humidity"], 90)
+        self.assertEqual(records[0]["min_temp"], 3.25)
+        logger.success("✓ append() / query() validés")
+
+    def test_reopen_uses_persisted_index(self):
+        """Test la réouverture de l'archive et l'historique conservé"""
+        logger.info("Test : Réouverture de l'archive")
+        with ForecastArchive(self.tmp_dir.name) as archive:
+            archive.append("Paris", "FR", self.forecast)
+        with ForecastArchive(self.tmp_dir.name) as archive:
+            archive.append("Lyon", "FR", self.forecast)
+            self.assertEqual(archive.record_count, 4)
+            self.assertEqual(len(archive.query("Paris", "FR")), 2)
+            self.assertEqual(len(archive.query("Lyon", "FR")), 2)
+        logger.success("✓ Réouverture validée")
+
+    def test_unsaved_index_is_rebuilt(self):
+        """Test la reconstruction de l'index à partir des enregistrements non indexés"""
+        logger.info("Test : Reconstruction de l'index")
+        archive = ForecastArchive(self.tmp_dir.name)
+        archive.append("Paris", "FR", self.forecast)
+        archive._file.flush()     # Simulate a crash: data written, index never saved
+
+        reopened = ForecastArchive(self.tmp_dir.name)
+        self.assertEqual(reopened.record_count, 2)
+        self.assertEqual(len(reopened.query("Paris", "FR")), 2)
+        lyon = {"forecast_details": [dict(self.forecast["forecast_details"][0], rain_cumul_mm=1.0)]}
+        reopened.append("Lyon", "FR", lyon)     # A location first seen after the crash gets its own id
+        self.assertEqual(reopened.rain_totals([("Paris", "FR"), ("Lyon", "FR")]), {"Paris,FR": 3.75, "Lyon,FR": 1.0})
+        reopened.close()
+        archive._file.close()
+
+        with ForecastArchive(self.tmp_dir.name) as archive:
+            self.assertEqual(len(archive.query("Paris", "FR")), 2)
+            self.assertEqual(len(archive.query("Lyon", "FR")), 1)
+        logger.success("✓ Reconstruction validée")
+
+    def test_torn_record_is_truncated(self):
+        """Test qu'un enregistrement coupé par un arrêt brutal n'aligne pas mal les ajouts suivants"""
+        logger.info("Test : Enregistrement tronqué")
+        with ForecastArchive(self.tmp_dir.name) as archive:
+            archive.append("Paris", "FR", self.forecast)
+        with open(f"{self.tmp_dir.name}/forecasts.bin", "ab") as f:
+            f.write(b"\x01\x02\x03")       # Crash in the middle of a record
+        with open(f"{self.tmp_dir.name}/forecasts.locations.jsonl", "a") as f:
+            f.write('{"key": "Ly')          # Crash in the middle of a location entry
+
+        updated = {"forecast_details": [dict(self.forecast["forecast_details"][0], rain_cumul_mm=7.5)]}
+        with ForecastArchive(self.tmp_dir.name) as archive:
+            archive.append("Lyon", "FR", updated)
+            self.assertEqual(archive.query("Lyon", "FR")[0]["rain_cumul_mm"], 7.5)
+        with ForecastArchive(self.tmp_dir.name) as archive:
+            self.assertEqual(archive.rain_totals([("Paris", "FR"), ("Lyon", "FR")]), {"Paris,FR": 3.75, "Lyon,FR": 7.5})
+        logger.success("✓ Fin tronquée ignorée et écrasée")
+
+    @unittest.skipUnless("fork" in multiprocessing.get_all_start_methods(), "fork indisponible")
+    def test_concurrent_processes_get_distinct_ids(self):
+        """Test que plusieurs processus ajoutant à la même archive reçoivent des identifiants distincts"""
+        logger.info("Test : Écrivains concurrents")
+        context = multiprocessing.get_context("fork")
+        groups = [[f"Ville{writer}_{index}" for index in range(20)] for writer in range(4)]
+        processes = [context.Process(target=append_cities, args=(self.tmp_dir.name, cities, self.forecast)) for cities in groups]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+
+        with ForecastArchive(self.tmp_dir.name) as archive:
+            self.assertEqual(len(set(archive.location_ids.values())), 80)
+            self.assertEqual(archive.record_count, 160)
+            totals = archive.rain_totals([(city, "FR") for cities in groups for city in cities])
+        self.assertEqual(set(totals.values()), {3.75})
+        logger.success("✓ 80 lieux sans collision d'identifiant")
+
+    def test_batch_feeds_the_archive(self):
+        """Test que le batch ajoute les résumés quotidiens de chaque lieu à l'archive"""
+        logger.info("Test : BatchRunner(consumers=[archive])")
+        archive = ForecastArchive(self.tmp_dir.name)
+        with StubServer() as server:
+            BatchRunner([("Paris", "FR"), ("Lyon", "FR")], "stub_key", checkpoint_path=f"{self.tmp_dir.name}/checkpoint.jsonl",
+                        output_dir=f"{self.tmp_dir.name}/json", base_url=server.base_url, write_workers=2,
+                        consumers=[archive]).run()
+        archive.close()
+
+        days = {entry["dt_txt"][:10] for entry in StubServer.synthetic_forecast("Paris", "FR")["list"]}
+        with ForecastArchive(self.tmp_dir.name) as archive:
+            self.assertEqual(len(archive.query("Paris", "FR")), len(days))
+            self.assertEqual(len(archive.query("Lyon", "FR")), len(days))
+        logger.success("✓ Lot archivé")
+
+    def test_latest_record_supersedes(self):
+        """Test qu'un nouveau résumé pour une même date remplace l'ancien"""
+        logger.info("Test : Remplacement d'un résumé")
+        updated = {"forecast_details": [dict(self.forecast["forecast_details"][0], rain_cumul_mm=4.0)]}
+        with ForecastArchive(self.tmp_dir.name) as archive:
+            archive.append("Paris", "FR", self.forecast)
+            archive.append("Paris", "FR", updated)
+            records = archive.query("Paris", "FR")
+
+        self.assertEqual(len(records), 2)
+        self.assertEqual(records[0]["rain_cumul_mm"], 4.0)
+        logger.success("✓ Remplacement validé")
+
+    def test_rain_totals_date_range(self):
+        """Test le cumul de pluie sur une plage de dates"""
+        logger.info("Test : rain_totals()")
+        with ForecastArchive(self.tmp_dir.name) as archive:
+            archive.append("Paris", "FR", self.forecast)
+            archive.append("Lyon", "FR", self.forecast)
+            totals = archive.rain_totals(
+                [("Paris", "FR"), ("Lyon", "FR"), ("Unknown", "XX")],
+                start_date=datetime.date(2025, 11, 18)
+            )
+
+        self.assertEqual(totals, {"Paris,FR": 2.25, "Lyon,FR": 2.25})
+        logger.success("✓ rain_totals() validé")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+"""
+Tests unitaires pour la classe ForecastCache
+Teste l'expiration, l'éviction LRU et la séparation des réponses et des résultats
+"""
+import unittest
+import sys
+from pathlib import Path
+from loguru import logger
+from tests.logging_setup import configure_for
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from classes.ForecastCache import ForecastCache
+from classes.WeatherForecast import WeatherForecast
+from classes.StubServer import StubServer
+
+
+class TestForecastCache(unittest.TestCase):
+    """Tests unitaires pour la classe ForecastCache"""
+
+    def setUp(self):
+        """Initialisation avant chaque test"""
+        configure_for(Path(__file__).stem)
+        logger.info("🧪 Démarrage test ForecastCache")
+        self.now = [1000.0]
+
+    def tearDown(self):
+        """Nettoyage après chaque test"""
+        logger.info("✅ Fin test ForecastCache\n")
+
+    def test_ttl(self):
+        """Test qu'une entrée est servie jusqu'à expiration"""
+        logger.info("Test : get()/put() - TTL")
+        cache = ForecastCache(ttl=60, clock=lambda: self.now[0])
+        cache.put("Paris,FR", {"list": [1]})
+        self.now[0] += 30
+        self.assertEqual(cache.get("Paris,FR"), {"list": [1]})
+        self.assertEqual(cache.age("Paris,FR"), 30)
+        self.now[0] += 30
+        self.assertIsNone(cache.get("Paris,FR"))
+        self.assertEqual(cache.stats()["expired"], 1)
+        logger.success("✓ Entrée expirée")
+
+    def test_lru_eviction(self):
+        """Test que les réponses les moins récemment utilisées sont évincées au-delà de max_entries"""
+        logger.info("Test : put() - Éviction LRU")
+        cache = ForecastCache(max_entries=3, clock=lambda: self.now[0])
+        for city in ("Paris", "Lyon", "Nice"):
+            cache.put(f"{city},FR", {"list": [city]})
+        cache.get("Paris,FR")       # Paris becomes the most recently used
+        cache.put("Lille,FR", {"list": ["Lille"]})
+
+        self.assertEqual(len(cache), 3)
+        self.assertIsNone(cache.get("Lyon,FR"))
+        self.assertEqual(cache.get("Paris,FR"), {"list": ["Paris"]})
+        self.assertEqual(cache.stats()["evictions"], 1)
+        logger.success("✓ Taille bornée, entrée la plus ancienne évincée")
+
+    def test_results_bounded_apart(self):
+        """Test que les résultats traités ont leur propre borne et ne chassent pas les réponses"""
+        logger.info("Test : put() - Résultats bornés à part")
+        cache = ForecastCache(max_entries=2, max_results=5)
+        with StubServer() as server:
+            forecast = WeatherForecast("Paris", "FR", "stub_key", base_url=server.base_url, cache=cache)
+            forecast.get_forecast()
+            forecast.process_forecast(units="imperial")     # Stores the metric and imperial results
+        for index in range(20):
+            cache.put(f"result:Ville{index},FR:metric", {"index": index})
+
+        self.assertEqual(len(cache.partitions["results"]), 5)
+        self.assertEqual(len(cache.partitions["payloads"]), 1)
+        self.assertIsNotNone(cache.get("Paris,FR"))
+        self.assertEqual(cache.get("result:Ville19,FR:metric"), {"index": 19})
+        self.assertEqual(cache.stats()["evictions"], 2 + 20 - 5)
+        logger.success("✓ Résultats bornés, réponse conservée")
+
+    def test_idle_fetch_locks_swept(self):
+        """Test que les verrous des lieux jamais mis en cache ne s'accumulent pas"""
+        logger.info("Test : fetch_lock() - Verrous inutilisés")
+        cache = ForecastCache(max_entries=5)
+        for index in range(100):
+            with cache.fetch_lock(f"Ville{index},FR"):
+                pass        # Fetch failed, nothing stored
+
+        self.assertLessEqual(len(cache.key_locks), 2 * 5)
+        logger.success("✓ Verrous bornés")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,301 @@
+"""
+Tests unitaires pour HedgedTransport et CircuitBreaker
+Teste les requêtes doublées, le budget de doublement, l'ouverture du circuit et la réponse de repli
+"""
+import unittest
+import sys
+import time
+import tempfile
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+import requests
+from loguru import logger
+from tests.logging_setup import configure_for
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from classes.Transport import Transport, RequestsTransport
+from classes.HedgedTransport import HedgedTransport
+from classes.CircuitBreaker import CircuitBreaker, CircuitOpen
+from classes.APIKeyPool import APIKeyPool
+from classes.WeatherForecast import WeatherForecast
+from classes.BatchRunner import BatchRunner
+from classes.StubServer import StubServer
+
+
+class ScriptedTransport(Transport):
+    """Transport factice : chaque appel suit le script (délai ou événement attendu, statut ou exception)"""
+
+    def __init__(self, script):
+        self.script = list(script)
+        self.calls = 0
+        self.finished = 0
+        self.params = []
+        self.lock = threading.Lock()
+
+    def get(self, url, params=None, headers=None):
+        with self.lock:
+            step = self.script[min(self.calls, len(self.script) - 1)]
+            self.calls += 1
+            call = self.calls
+            self.params.append(params)
+        delay, outcome = step
+        if isinstance(delay, threading.Event):
+            delay.wait(5)
+        else:
+            time.sleep(delay)
+        with self.lock:
+            self.finished += 1
+        if isinstance(outcome, Exception):
+            raise outcome
+        return SimpleNamespace(status_code=outcome, call=call)
+
+
+class FakeClock:
+    """Horloge contrôlée par le test"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestHedgedTransport(unittest.TestCase):
+    """Tests unitaires pour HedgedTransport et CircuitBreaker"""
+
+    def setUp(self):
+        """Initialisation avant chaque test"""
+        configure_for(Path(__file__).stem)
+        logger.info("🧪 Démarrage test HedgedTransport")
+
+    def tearDown(self):
+        """Nettoyage après chaque test"""
+        logger.info("✅ Fin test HedgedTransport\n")
+
+    def test_hedge_wins_over_slow_first_attempt(self):
+        """Test qu'une requête doublée répond avant une première tentative lente"""
+        logger.info("Test : HedgedTransport - Tentative lente")
+        gate = threading.Event()        # The first attempt only answers once the test lets it
+        inner = ScriptedTransport([(gate, 200), (0.0, 200)])
+        transport = HedgedTransport(inner, hedge_after=0.05, budget=1.0)
+        response = transport.get("http://upstream")
+        finished_before_first = inner.finished
+        gate.set()
+
+        self.assertEqual(response.call, 2)
+        self.assertEqual(finished_before_first, 1)      # Returned while the first attempt was still pending
+        self.assertEqual(transport.stats()["hedging"],
+                         {"requests": 1, "hedged": 1, "hedge_wins": 1, "over_budget": 0, "no_key": 0})
+        logger.success("✓ Réponse doublée sans attendre la première tentative")
+
+    def test_hedge_takes_its_own_pooled_key(self):
+        """Test que la requête doublée prend sa propre clé du pool et lui est comptée"""
+        logger.info("Test : HedgedTransport - Pool de clés")
+        pool = APIKeyPool(["key_aaaa", "key_bbbb"])
+        gate = threading.Event()
+        inner = ScriptedTransport([(gate, 200), (0.0, 200)])
+        transport = HedgedTransport(inner, hedge_after=0.05, budget=1.0, key_pool=pool)
+        primary_key = pool.acquire()
+        response = transport.get("http://upstream", params={"q": "Paris,FR", "appid": primary_key})
+        gate.set()
+        pool.release(primary_key, response.status_code)
+
+        hedge_key = inner.params[1]["appid"]
+        self.assertEqual(response.call, 2)
+        self.assertNotEqual(hedge_key, primary_key)
+        self.assertEqual(inner.params[1]["q"], "Paris,FR")
+        self.assertEqual({state["used"] for state in pool.keys.values()}, {1})
+        self.assertEqual(pool.keys[hedge_key]["in_flight"], 0)
+        logger.success("✓ Clé distincte comptée pour la requête doublée")
+
+    def test_no_hedge_without_pooled_budget(self):
+        """Test qu'aucune requête n'est doublée quand aucune clé n'a de budget"""
+        logger.info("Test : HedgedTransport - Pool sans budget")
+        pool = APIKeyPool(["key_aaaa"], calls_per_minute=1)
+        inner = ScriptedTransport([(0.1, 200)])
+        transport = HedgedTransport(inner, hedge_after=0.01, budget=1.0, key_pool=pool)
+        key = pool.acquire()
+        response = transport.get("http://upstream", params={"appid": key})
+        pool.release(key, response.status_code)
+
+        self.assertEqual(inner.calls, 1)
+        self.assertEqual(response.call, 1)
+        stats = transport.stats()["hedging"]
+        self.assertEqual((stats["hedged"], stats["no_key"]), (0, 1))
+        logger.success("✓ Pas de doublement hors budget du pool")
+
+    def test_refused_hedge_key_does_not_win(self):
+        """Test qu'un 429 reçu par la clé de la requête doublée n'est pas renvoyé à l'appelant"""
+        logger.info("Test : HedgedTransport - Clé doublée refusée")
+        pool = APIKeyPool(["key_aaaa", "key_bbbb"])
+        inner = ScriptedTransport([(0.2, 200), (0.0, 429)])
+        transport = HedgedTransport(inner, hedge_after=0.05, budget=1.0, key_pool=pool)
+        primary_key = pool.acquire()
+        response = transport.get("http://upstream", params={"appid": primary_key})
+        pool.release(primary_key, response.status_code)
+
+        hedge_key = inner.params[1]["appid"]
+        self.assertEqual((response.call, response.status_code), (1, 200))
+        self.assertEqual(pool.keys[hedge_key]["bench_status"], 429)
+        self.assertIsNone(pool.keys[primary_key]["bench_status"])
+        self.assertEqual(transport.stats()["hedging"]["hedge_wins"], 0)
+        logger.success("✓ Seule la clé doublée est mise en pause")
+
+    def test_fast_requests_not_hedged(self):
+        """Test qu'une réponse rapide n'est pas doublée"""
+        logger.info("Test : HedgedTransport - Réponse rapide")
+        inner = ScriptedTransport([(0.0, 200)])
+        transport = HedgedTransport(inner, hedge_after=0.2, budget=1.0)
+        for _ in range(5):
+            transport.get("http://upstream")
+        self.assertEqual(inner.calls, 5)
+        self.assertEqual(transport.stats()["hedging"]["hedged"], 0)
+        logger.success("✓ Aucun doublement inutile")
+
+    def test_budget_limits_hedges(self):
+        """Test que le budget limite les requêtes supplémentaires"""
+        logger.info("Test : HedgedTransport - Budget")
+        inner = ScriptedTransport([(0.1, 200)])
+        transport = HedgedTransport(inner, hedge_after=0.01, budget=0.25)
+        for _ in range(8):
+            transport.get("http://upstream")
+        stats = transport.stats()["hedging"]
+        self.assertEqual(stats["hedged"], 2)
+        self.assertEqual(stats["over_budget"], 6)
+        logger.success("✓ Budget de doublement respecté")
+
+    def test_both_attempts_fail(self):
+        """Test que l'erreur est propagée si les deux tentatives échouent"""
+        logger.info("Test : HedgedTransport - Double échec")
+        error = requests.exceptions.ConnectionError("down")
+        transport = HedgedTransport(ScriptedTransport([(0.1, error), (0.0, error)]), hedge_after=0.01, budget=1.0)
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            transport.get("http://upstream")
+        logger.success("✓ Erreur propagée")
+
+    def test_circuit_opens_and_recovers(self):
+        """Test l'ouverture du circuit, le rejet rapide et la fermeture après essai"""
+        logger.info("Test : CircuitBreaker - Cycle")
+        clock = FakeClock()
+        inner = ScriptedTransport([(0.0, 500)] * 4 + [(0.0, 200)])
+        breaker = CircuitBreaker(inner, failure_threshold=0.5, window=4, min_calls=4, reset_timeout=30,
+                                 fallback=False, clock=clock)
+        for _ in range(4):
+            breaker.get("http://upstream", params={"q": "Paris,FR"})
+        self.assertEqual(breaker.state, "open")
+
+        with self.assertRaises(CircuitOpen):
+            breaker.get("http://upstream", params={"q": "Paris,FR"})
+        self.assertEqual(inner.calls, 4)
+
+        clock.now += 30
+        self.assertEqual(breaker.get("http://upstream", params={"q": "Paris,FR"}).status_code, 200)
+        self.assertEqual(breaker.state, "closed")
+        circuit = breaker.stats()["circuit"]
+        self.assertEqual((circuit["opened"], circuit["rejected"], circuit["failures"]), (1, 1, 4))
+        logger.success("✓ Circuit ouvert puis refermé")
+
+    def test_failed_trial_reopens(self):
+        """Test qu'un essai en échec rouvre le circuit"""
+        logger.info("Test : CircuitBreaker - Essai en échec")
+        clock = FakeClock()
+        breaker = CircuitBreaker(ScriptedTransport([(0.0, 503)]), window=2, min_calls=2, reset_timeout=10,
+                                 fallback=False, clock=clock)
+        for _ in range(2):
+            breaker.get("http://upstream")
+        clock.now += 10
+        breaker.get("http://upstream")
+        self.assertEqual(breaker.state, "open")
+        self.assertEqual(breaker.stats()["circuit"]["opened"], 2)
+        logger.success("✓ Circuit rouvert")
+
+    def test_throttling_ignored_with_rotating_keys(self):
+        """Test que les 429 n'ouvrent pas le circuit quand un pool de clés les absorbe"""
+        logger.info("Test : CircuitBreaker - 429 avec pool de clés")
+        for count_throttling, expected in ((True, "open"), (False, "closed")):
+            breaker = CircuitBreaker(ScriptedTransport([(0.0, 429)]), window=4, min_calls=4, fallback=False,
+                                     clock=FakeClock(), count_throttling=count_throttling)
+            for _ in range(4):
+                breaker.get("http://upstream")
+            self.assertEqual(breaker.state, expected)
+        logger.success("✓ Un 429 ne coupe pas toutes les clés")
+
+    def test_fallback_serves_last_good_forecast(self):
+        """Test la réponse de repli pendant une panne du serveur"""
+        logger.info("Test : CircuitBreaker - Repli")
+        breaker = CircuitBreaker(RequestsTransport(timeout=1), window=2, min_calls=2, reset_timeout=60)
+        server = StubServer().start_server()
+        base_url = server.base_url
+        first = WeatherForecast("Paris", "FR", "key_a", transport=breaker, base_url=base_url)
+        first.get_forecast()
+        server.stop()       # Upstream outage
+
+        for _ in range(2):
+            with self.assertRaises(requests.exceptions.RequestException):
+                WeatherForecast("Lyon", "FR", "key_a", transport=breaker, base_url=base_url).get_forecast()
+        self.assertEqual(breaker.state, "open")
+
+        calls = breaker.stats()["circuit"]["calls"]
+        fallback = WeatherForecast("Paris", "FR", "key_b", transport=breaker, base_url=base_url)
+        fallback.get_forecast()
+        self.assertEqual(breaker.stats()["circuit"]["calls"], calls)        # Served without going upstream
+        self.assertEqual(fallback.forecast_data, first.forecast_data)
+        with self.assertRaises(CircuitOpen):
+            WeatherForecast("Lyon", "FR", "key_a", transport=breaker, base_url=base_url).get_forecast()
+        self.assertEqual(breaker.stats()["circuit"]["fallbacks"], 1)
+        self.assertTrue(fallback.from_fallback)
+        self.assertFalse(first.from_fallback)
+        logger.success("✓ Dernière réponse valide servie")
+
+    def test_fallback_store_bounded_and_aged(self):
+        """Test que les réponses de repli sont bornées en nombre et en âge"""
+        logger.info("Test : CircuitBreaker - Repli borné")
+        clock = FakeClock()
+        inner = ScriptedTransport([(0.0, 200)] * 5 + [(0.0, 500)])
+        breaker = CircuitBreaker(inner, window=2, min_calls=2, reset_timeout=600, clock=clock,
+                                 max_fallbacks=3, max_fallback_age=60)
+        for city in ("Paris", "Lyon", "Nice", "Lille", "Brest"):
+            breaker.get("http://upstream", params={"q": f"{city},FR"})
+            clock.now += 10
+        self.assertEqual(len(breaker.last_good), 3)
+        breaker.get("http://upstream", params={"q": "Tours,FR"})        # One failure in a window of two opens the circuit
+        self.assertEqual(breaker.state, "open")
+
+        with self.assertRaises(CircuitOpen):        # Evicted from the store
+            breaker.get("http://upstream", params={"q": "Paris,FR"})
+        self.assertTrue(breaker.get("http://upstream", params={"q": "Brest,FR"}).from_fallback)
+        clock.now += 60
+        with self.assertRaises(CircuitOpen):        # Stored 70 s ago, older than max_fallback_age
+            breaker.get("http://upstream", params={"q": "Brest,FR"})
+        circuit = breaker.stats()["circuit"]
+        self.assertEqual((circuit["fallbacks"], circuit["stale_fallbacks"]), (1, 1))
+        logger.success("✓ Repli borné et limité en âge")
+
+    def test_batch_reports_fallbacks(self):
+        """Test que le batch signale les lieux écrits avec une réponse de repli et les redemande à la reprise"""
+        logger.info("Test : BatchRunner - Réponses de repli")
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        clock = FakeClock()
+        breaker = CircuitBreaker(RequestsTransport(timeout=1), reset_timeout=600, clock=clock)
+        locations = [("Paris", "FR"), ("Lyon", "FR")]
+        with StubServer() as server:
+            base_url = server.base_url
+            BatchRunner(locations, "stub_key", checkpoint_path=f"{tmp_dir.name}/first.jsonl", output_dir=f"{tmp_dir.name}/json",
+                        transport=breaker, base_url=base_url).run()
+        breaker._open()     # Upstream down since
+
+        runner = BatchRunner(locations, "stub_key", checkpoint_path=f"{tmp_dir.name}/second.jsonl",
+                             output_dir=f"{tmp_dir.name}/json", transport=breaker, base_url=base_url)
+        summary = runner.run()
+
+        self.assertEqual((summary["done"], summary["fallbacks"], summary["remaining"]), (0, 2, 2))
+        self.assertEqual(sorted(summary["fallback_locations"]), ["Lyon,FR", "Paris,FR"])
+        self.assertTrue(Path(tmp_dir.name, "json", "Paris_FR.json").exists())
+        logger.success("✓ Réponses de repli signalées")
+
+
+if __name__ == "__main__":
+    unittest.main()
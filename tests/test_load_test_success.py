@@ -0,0 +1,99 @@
+"""
+Tests unitaires pour LoadTest
+Teste le rythme des requêtes, les percentiles de latence, le taux d'erreurs et les seuils
+"""
+import unittest
+import sys
+import time
+from pathlib import Path
+from loguru import logger
+from tests.logging_setup import configure_for
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from classes.LoadTest import LoadTest, percentile, rss_mb, fetch_target, serve_target
+from classes.StubServer import StubServer
+
+
+class TestLoadTest(unittest.TestCase):
+    """Tests unitaires pour LoadTest"""
+
+    def setUp(self):
+        """Initialisation avant chaque test"""
+        configure_for(Path(__file__).stem)
+        logger.info("🧪 Démarrage test LoadTest")
+
+    def tearDown(self):
+        """Nettoyage après chaque test"""
+        logger.info("✅ Fin test LoadTest\n")
+
+    def test_percentile_nearest_rank(self):
+        """Test le calcul des percentiles par rang"""
+        logger.info("Test : LoadTest - Percentiles")
+        values = list(range(1, 101))
+        self.assertEqual((percentile(values, 0.5), percentile(values, 0.95), percentile(values, 0.99)), (50, 95, 99))
+        self.assertEqual(percentile([7], 0.99), 7)
+        self.assertIsNone(percentile([], 0.5))
+        logger.success("✓ Percentiles corrects")
+
+    def test_rate_and_report(self):
+        """Test que la charge suit le débit demandé et que le rapport est complet"""
+        logger.info("Test : LoadTest - Débit")
+        report = LoadTest(lambda index: time.sleep(0.01), rate=50, duration=1, sample_every=0.2).run()
+
+        self.assertEqual(report["requests"], 50)
+        self.assertEqual(report["completed"], 50)
+        self.assertGreaterEqual(report["elapsed_s"], 0.98)
+        latency = report["latency_ms"]
+        self.assertGreaterEqual(latency["p50"], 10)
+        self.assertLessEqual(latency["p50"], latency["p95"])
+        self.assertLessEqual(latency["p95"], latency["p99"])
+        self.assertLessEqual(latency["p99"], latency["max"])
+        self.assertGreaterEqual(len(report["rss_mb"]), 5)
+        self.assertTrue(report["passed"])
+        if rss_mb() is not None:
+            self.assertGreater(rss_mb(), 0)
+        logger.success(f"✓ {report['throughput_per_s']} requêtes/s, p99 {latency['p99']} ms")
+
+    def test_thresholds_fail_run(self):
+        """Test qu'un seuil dépassé fait échouer l'exécution"""
+        logger.info("Test : LoadTest - Seuils")
+        report = LoadTest(lambda index: time.sleep(0.02), rate=20, duration=0.5,
+                          thresholds={"p95_ms": 5, "error_rate": 0.5}).run()
+        self.assertFalse(report["passed"])
+        self.assertEqual(len(report["violations"]), 1)
+        self.assertIn("p95_ms", report["violations"][0])
+
+        with self.assertRaises(ValueError):
+            LoadTest(lambda index: None, thresholds={"p42_ms": 1})
+        logger.success("✓ Exécution en échec sur dépassement")
+
+    def test_errors_counted_by_type(self):
+        """Test le comptage des erreurs contre le serveur factice"""
+        logger.info("Test : LoadTest - Erreurs")
+        locations = [("Paris", "FR"), ("Atlantis", "FR")]
+        with StubServer(unknown_locations=("Atlantis",)) as server:
+            report = LoadTest(fetch_target(server.base_url, locations), rate=20, duration=0.5,
+                              thresholds={"error_rate": 0.1}).run()
+        self.assertEqual(report["requests"], 10)
+        self.assertEqual(report["errors"], 5)
+        self.assertEqual(report["error_rate"], 0.5)
+        self.assertEqual(len(report["errors_by_type"]), 1)
+        self.assertFalse(report["passed"])
+        logger.success(f"✓ Erreurs comptées : {report['errors_by_type']}")
+
+    def test_serve_path_faster_than_fetch(self):
+        """Test que le chemin servi par le cache est plus rapide que le chemin réseau"""
+        logger.info("Test : LoadTest - Chemin servi")
+        locations = [("Paris", "FR"), ("Lyon", "FR")]
+        with StubServer(latency=0.05) as server:
+            fetch = LoadTest(fetch_target(server.base_url, locations), rate=20, duration=0.5).run()
+            serve = LoadTest(serve_target(server.base_url, locations), rate=20, duration=0.5).run()
+            self.assertEqual(server.stats["requests"], 12)
+        self.assertEqual(fetch["errors"] + serve["errors"], 0)
+        self.assertLess(serve["latency_ms"]["p50"], fetch["latency_ms"]["p50"])
+        logger.success(f"✓ p50 servi {serve['latency_ms']['p50']} ms, p50 réseau {fetch['latency_ms']['p50']} ms")
+
+
+if __name__ == "__main__":
+    unittest.main()
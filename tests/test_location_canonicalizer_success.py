@@ -0,0 +1,128 @@
+"""
+Tests unitaires pour la classe LocationCanonicalizer
+Teste le repliement des accents et de la casse, les alias, la validation et la déduplication
+"""
+import unittest
+import sys
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+from loguru import logger
+from tests.logging_setup import configure_for
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from classes.LocationCanonicalizer import LocationCanonicalizer
+from classes.BatchRunner import BatchRunner
+from classes.StubServer import StubServer
+from classes.WeatherApp import WeatherApp
+
+
+class TestLocationCanonicalizer(unittest.TestCase):
+    """Tests unitaires pour la classe LocationCanonicalizer"""
+
+    def setUp(self):
+        """Initialisation avant chaque test"""
+        configure_for(Path(__file__).stem)
+        logger.info("🧪 Démarrage test LocationCanonicalizer")
+        self.canonicalizer = LocationCanonicalizer({"paname": "Paris", "nyc": "New York,US", "st etienne,FR": "Saint-Etienne"})
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """Nettoyage après chaque test"""
+        self.tmp_dir.cleanup()
+        logger.info("✅ Fin test LocationCanonicalizer\n")
+
+    def test_spelling_variants(self):
+        """Test que les variantes d'écriture donnent la même forme canonique"""
+        logger.info("Test : canonicalize() - Variantes")
+        for text in ["paris/fr", " Paris /FR", "PARIS/Fr", "paris, fr", "Paname,FR"]:
+            self.assertEqual(self.canonicalizer.canonicalize(text), ("Paris", "FR"))
+        self.assertEqual(self.canonicalizer.canonicalize("SAINT-ÉTIENNE", "fr"), ("Saint-Étienne", "FR"))
+        self.assertEqual(self.canonicalizer.canonicalize("saint-etienne", "FR"), ("Saint-Étienne", "FR"))     # Accented spelling kept
+        self.assertEqual(self.canonicalizer.canonicalize("St  Étienne", "FR"), ("Saint-Étienne", "FR"))
+        self.assertEqual(self.canonicalizer.canonicalize("nyc", "GB"), ("New York", "US"))
+        self.assertEqual(self.canonicalizer.location_id("Orléans", "FR"), self.canonicalizer.location_id("orleans", "fr"))
+        self.assertEqual(self.canonicalizer.location_id("New York", "US"), "new-york_us")
+        logger.success("✓ Variantes canonisées")
+
+    def test_name_independent_of_order(self):
+        """Test que la graphie retenue pour un lieu ne dépend pas de l'ordre des entrées"""
+        logger.info("Test : dedupe() - Ordre des graphies")
+        spellings = [("saint-etienne", "FR"), ("SAINT-ÉTIENNE", "fr"), ("Saint Etienne", "FR"), ("orleans", "FR"), ("ORLÉANS", "fr")]
+        results = []
+        for ordering in (spellings, spellings[::-1], spellings[1:] + spellings[:1]):
+            canonicalizer = LocationCanonicalizer()
+            unique, duplicates, _ = canonicalizer.dedupe(ordering)
+            results.append((sorted(unique), duplicates, canonicalizer.canonicalize("saint-etienne", "FR")))
+
+        self.assertEqual(results[0], (sorted([("Saint-Étienne", "FR"), ("Orléans", "FR")]), 3, ("Saint-Étienne", "FR")))
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(results[0], results[2])
+        logger.success("✓ Même graphie quel que soit l'ordre")
+
+    def test_non_ascii_cities(self):
+        """Test que les villes hors alphabet latin de base sont acceptées et gardent leurs lettres"""
+        logger.info("Test : canonicalize() - Villes non ASCII")
+        for location, country_code in [("Łódź", "PL"), ("wrocław", "pl"), ("TROMSØ", "NO"), ("Москва", "RU"), ("नई दिल्ली", "IN")]:
+            name, country = self.canonicalizer.canonicalize(location, country_code)
+            self.assertEqual(self.canonicalizer.fold(name), self.canonicalizer.fold(location))
+            self.assertEqual(country, country_code.upper())
+        self.assertEqual(self.canonicalizer.canonicalize("wrocław", "pl"), ("Wrocław", "PL"))
+        self.assertEqual(self.canonicalizer.location_id("Москва", "RU"), "москва_ru")
+        self.assertEqual(self.canonicalizer.location_id("łódź", "PL"), self.canonicalizer.location_id("Łódź", "PL"))
+
+        unique, duplicates, invalid = self.canonicalizer.dedupe([("Łódź", "PL"), ("ŁÓDŹ", "PL"), ("Москва", "RU"), ("Tromsø", "NO")])
+        self.assertEqual(unique, [("Łódź", "PL"), ("Москва", "RU"), ("Tromsø", "NO")])
+        self.assertEqual((duplicates, invalid), (1, []))
+        logger.success("✓ Villes non ASCII acceptées")
+
+    def test_validation(self):
+        """Test le rejet des entrées invalides"""
+        logger.info("Test : canonicalize() - Validation")
+        for location, country_code in [("", "FR"), ("Paris", ""), ("Paris", "FRA"), ("Paris", "F1"), ("<script>", "FR"),
+                                       ("Paris; DROP", "FR"), ("-Lyon", "FR"), ("Москва!", "RU")]:
+            with self.assertRaises(ValueError):
+                self.canonicalizer.canonicalize(location, country_code)
+        logger.success("✓ Entrées invalides rejetées")
+
+    def test_dedupe(self):
+        """Test la déduplication d'une liste de lieux"""
+        logger.info("Test : dedupe()")
+        unique, duplicates, invalid = self.canonicalizer.dedupe([
+            ("paris", "fr"), ("Lyon", "FR"), ("PARIS", "FR"), ("Paname", "fr"), ("lyon ", "fr"), ("Lyon", "XXX")
+        ])
+        self.assertEqual(unique, [("Paris", "FR"), ("Lyon", "FR")])
+        self.assertEqual(duplicates, 3)
+        self.assertEqual(len(invalid), 1)
+        logger.success("✓ Doublons supprimés")
+
+    def test_batch_fetches_each_location_once(self):
+        """Test que le batch ne récupère qu'une fois chaque lieu canonique"""
+        logger.info("Test : BatchRunner(canonicalizer=...)")
+        with StubServer() as server:
+            summary = BatchRunner([("paris", "fr"), ("PARIS", "FR"), ("Paris ", "Fr"), ("Lyon", "FR"), ("Lyon", "")], "stub_key",
+                                  checkpoint_path=f"{self.tmp_dir.name}/checkpoint.jsonl", output_dir=f"{self.tmp_dir.name}/json",
+                                  base_url=server.base_url, canonicalizer=self.canonicalizer).run()
+            requests_served = server.stats["requests"]
+
+        self.assertEqual(requests_served, 2)
+        self.assertEqual((summary["done"], summary["duplicates"], summary["failed"]), (2, 2, 1))
+        self.assertTrue(Path(f"{self.tmp_dir.name}/json/Paris_FR.json").exists())
+        logger.success("✓ Une requête par lieu canonique")
+
+    @patch('builtins.input')
+    def test_weather_app_canonical_input(self, mock_input):
+        """Test la canonisation des saisies de WeatherApp"""
+        logger.info("Test : WeatherApp - Saisie canonisée")
+        mock_input.side_effect = ["  paris ", "fr"]
+        app = WeatherApp()
+        with patch('classes.WeatherForecast.WeatherForecast.get_forecast', side_effect=RuntimeError("arrêt du test")):
+            with self.assertRaises(RuntimeError):
+                app.run()
+        self.assertEqual((app.location, app.country_code), ("Paris", "FR"))
+        logger.success("✓ Saisie canonisée")
+
+
+if __name__ == "__main__":
+    unittest.main()
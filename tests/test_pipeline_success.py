@@ -0,0 +1,174 @@
+"""
+Tests unitaires pour la classe Pipeline
+Teste l'enchaînement des étapes, la contre-pression et la gestion des erreurs
+"""
+import unittest
+import sys
+import time
+import threading
+from pathlib import Path
+from loguru import logger
+from tests.logging_setup import configure_for
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from classes.Pipeline import Pipeline, Stage
+
+
+class TestPipeline(unittest.TestCase):
+    """Tests unitaires pour la classe Pipeline"""
+
+    def setUp(self):
+        """Initialisation avant chaque test"""
+        configure_for(Path(__file__).stem)
+        logger.info("🧪 Démarrage test Pipeline")
+
+    def tearDown(self):
+        """Nettoyage après chaque test"""
+        logger.info("✅ Fin test Pipeline\n")
+
+    def test_items_flow_through_stages(self):
+        """Test que chaque élément traverse toutes les étapes"""
+        logger.info("Test : run() - Enchaînement")
+        results = []
+        lock = threading.Lock()
+
+        def collect(item):
+            with lock:
+                results.append(item)
+            return item
+
+        pipeline = Pipeline([
+            Stage("double", lambda x: x * 2, workers=4),
+            Stage("increment", lambda x: x + 1, workers=2),
+            Stage("collect", collect),
+        ])
+        stats = pipeline.run(range(100))
+
+        self.assertEqual(sorted(results), [x * 2 + 1 for x in range(100)])
+        self.assertEqual(stats["items_in"], 100)
+        self.assertEqual(stats["items_out"], 100)
+        self.assertGreater(stats["throughput_per_s"], 0)
+        self.assertEqual(stats["stages"]["double"]["workers"], 4)
+        logger.debug(f"Débit : {stats['throughput_per_s']} éléments/s")
+        logger.success("✓ Enchaînement validé")
+
+    def test_stages_overlap(self):
+        """Test que les étapes lentes se recouvrent au lieu de s'additionner"""
+        logger.info("Test : run() - Recouvrement des étapes")
+        lock = threading.Lock()
+        in_flight = {"fetch": 0, "write": 0}
+        observed = {"max_fetch": 0, "write_during_fetch": 0}
+
+        def step(stage, delay):
+            def run(item):
+                with lock:
+                    in_flight[stage] += 1
+                    observed["max_fetch"] = max(observed["max_fetch"], in_flight["fetch"])
+                    if stage == "write" and in_flight["fetch"]:
+                        observed["write_during_fetch"] += 1
+                time.sleep(delay)
+                with lock:
+                    in_flight[stage] -= 1
+                return item
+            return run
+
+        pipeline = Pipeline([
+            Stage("fetch", step("fetch", 0.02), workers=4),
+            Stage("write", step("write", 0.005)),
+        ])
+        stats = pipeline.run(range(20))
+
+        # Counters rather than elapsed time: fetches run side by side and writes start before fetching ends
+        self.assertEqual(stats["items_out"], 20)
+        self.assertGreater(observed["max_fetch"], 1)
+        self.assertGreater(observed["write_during_fetch"], 0)
+        logger.success(f"✓ Recouvrement validé ({observed['max_fetch']} requêtes simultanées)")
+
+    def test_backpressure_bounds_in_flight_items(self):
+        """Test que la file bornée limite les éléments en attente"""
+        logger.info("Test : run() - Contre-pression")
+        fetched = []
+        written = []
+
+        def fetch(item):
+            fetched.append(item)
+            return item
+
+        def write(item):
+            time.sleep(0.01)
+            # Items fetched but not yet written never exceed the queue bound plus workers in flight
+            self.assertLessEqual(len(fetched) - len(written), 2 + 2 + 1)
+            written.append(item)
+            return item
+
+        pipeline = Pipeline([Stage("fetch", fetch, queue_size=2), Stage("write", write, queue_size=2)])
+        stats = pipeline.run(range(30))
+
+        self.assertEqual(stats["items_out"], 30)
+        logger.success("✓ Contre-pression validée")
+
+    def test_errors_are_reported(self):
+        """Test que les erreurs d'une étape sont transmises au gestionnaire"""
+        logger.info("Test : run() - Erreurs")
+        errors = []
+
+        def fail_on_odd(item):
+            if item % 2:
+                raise ValueError(f"impair : {item}")
+            return item
+
+        pipeline = Pipeline([Stage("check", fail_on_odd)],
+                            on_error=lambda stage, item, e: errors.append((stage, item)))
+        stats = pipeline.run(range(10))
+
+        self.assertEqual(stats["items_out"], 5)
+        self.assertEqual(stats["stages"]["check"]["errors"], 5)
+        self.assertEqual(sorted(item for _, item in errors), [1, 3, 5, 7, 9])
+        logger.success("✓ Erreurs transmises")
+
+    def test_failing_error_handler_does_not_hang(self):
+        """Test qu'un gestionnaire d'erreurs qui échoue arrête le pipeline au lieu de le bloquer"""
+        logger.info("Test : run() - Gestionnaire en échec")
+        outcome = {}
+
+        def fail(item):
+            raise ValueError(f"refusé : {item}")
+
+        def handler(stage, item, e):
+            raise OSError("disque plein")       # E.g. the checkpoint cannot be written
+
+        def run():
+            pipeline = Pipeline([Stage("fetch", fail, workers=2), Stage("write", lambda item: item)], on_error=handler)
+            try:
+                pipeline.run(range(20))
+            except OSError as e:
+                outcome["error"] = e
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        thread.join(timeout=10)
+
+        self.assertFalse(thread.is_alive())
+        self.assertIsInstance(outcome.get("error"), OSError)
+        logger.success("✓ Erreur du gestionnaire remontée par run()")
+
+    def test_stop_halts_new_work(self):
+        """Test l'arrêt du pipeline en cours d'exécution"""
+        logger.info("Test : stop()")
+        pipeline = None
+
+        def fetch(item):
+            if item == 3:
+                pipeline.stop()
+            return item
+
+        pipeline = Pipeline([Stage("fetch", fetch, queue_size=1)])
+        stats = pipeline.run(range(1000))
+
+        self.assertLess(stats["items_out"], 1000)
+        logger.success("✓ Arrêt validé")
+
+
+if __name__ == "__main__":
+    unittest.main()
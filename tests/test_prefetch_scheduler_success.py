@@ -0,0 +1,126 @@
+"""
+Tests unitaires pour ForecastCache et PrefetchScheduler
+Teste l'expiration du cache, le rafraîchissement anticipé des lieux populaires et le budget d'appels
+"""
+import unittest
+import sys
+from pathlib import Path
+from loguru import logger
+from tests.logging_setup import configure_for
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from classes.ForecastCache import ForecastCache
+from classes.PrefetchScheduler import PrefetchScheduler
+from classes.StubServer import StubServer
+
+
+class FakeClock:
+    """Horloge contrôlée par le test"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestPrefetchScheduler(unittest.TestCase):
+    """Tests unitaires pour ForecastCache et PrefetchScheduler"""
+
+    def setUp(self):
+        """Initialisation avant chaque test"""
+        configure_for(Path(__file__).stem)
+        logger.info("🧪 Démarrage test PrefetchScheduler")
+        self.clock = FakeClock()
+        self.cache = ForecastCache(ttl=600, clock=self.clock)
+        self.server = StubServer().start_server()
+
+    def tearDown(self):
+        """Nettoyage après chaque test"""
+        self.server.stop()
+        logger.info("✅ Fin test PrefetchScheduler\n")
+
+    def scheduler(self, **options):
+        return PrefetchScheduler(self.cache, "stub_key", base_url=self.server.base_url, clock=self.clock, **options)
+
+    def test_cache_ttl(self):
+        """Test l'expiration des entrées du cache"""
+        logger.info("Test : ForecastCache - TTL")
+        self.cache.put("Paris,FR", {"list": []})
+        self.clock.now += 599
+        self.assertEqual(self.cache.get("Paris,FR"), {"list": []})
+        self.clock.now += 1
+        self.assertIsNone(self.cache.get("Paris,FR"))
+        stats = self.cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["expired"]), (1, 1, 1))
+        logger.success("✓ Expiration validée")
+
+    def test_warm_lookups(self):
+        """Test que les lookups répétés sont servis depuis le cache"""
+        logger.info("Test : forecast() - Cache chaud")
+        scheduler = self.scheduler()
+        first = scheduler.forecast("Paris", "FR")
+        self.clock.now += 120
+        second = scheduler.forecast("Paris", "FR")
+
+        self.assertFalse(first.from_cache)
+        self.assertTrue(second.from_cache)
+        self.assertEqual(second.process_forecast(), first.process_forecast())
+        self.assertEqual(self.server.stats["requests"], 1)
+        stats = scheduler.stats()
+        self.assertEqual(stats["hit_rate"], 0.5)
+        self.assertEqual(stats["max_staleness_s"], 120)
+        logger.success("✓ Lookups servis depuis le cache")
+
+    def test_refreshes_hot_before_expiry(self):
+        """Test le rafraîchissement anticipé des seuls lieux populaires"""
+        logger.info("Test : tick() - Lieux populaires")
+        scheduler = self.scheduler(top_n=1)
+        for _ in range(3):
+            scheduler.forecast("Paris", "FR")
+        scheduler.forecast("Lyon", "FR")
+        self.assertEqual(scheduler.hot(), ["Paris,FR"])
+
+        self.clock.now += 400      # Before the refresh window: nothing due
+        self.assertEqual(scheduler.tick(), [])
+        self.clock.now += 150      # 550 s: inside the last 20 % of the TTL
+        self.assertEqual(scheduler.tick(), ["Paris,FR"])
+        self.assertEqual(self.cache.age("Paris,FR"), 0)
+        self.assertEqual(self.cache.age("Lyon,FR"), 550)
+
+        self.clock.now += 100      # Lyon expired, Paris still warm
+        self.assertTrue(scheduler.forecast("Paris", "FR").from_cache)
+        self.assertFalse(scheduler.forecast("Lyon", "FR").from_cache)
+        logger.success("✓ Seul le lieu populaire est rafraîchi")
+
+    def test_refresh_ages_are_spread(self):
+        """Test l'étalement des rafraîchissements dans la fenêtre"""
+        logger.info("Test : refresh_age()")
+        scheduler = self.scheduler()
+        ages = [scheduler.refresh_age(f"Ville{index},FR") for index in range(20)]
+        self.assertTrue(all(480 <= age <= 540 for age in ages))
+        self.assertGreater(len(set(ages)), 10)
+        logger.success("✓ Rafraîchissements étalés")
+
+    def test_budget_defers_refreshes(self):
+        """Test que le budget d'appels reporte les rafraîchissements excédentaires"""
+        logger.info("Test : tick() - Budget")
+        scheduler = self.scheduler(top_n=5, calls_per_minute=6, burst=2)
+        for city in ("Paris", "Lyon", "Nice", "Lille"):
+            scheduler.forecast(city, "FR")
+        requests_before = self.server.stats["requests"]
+
+        self.clock.now += 590
+        self.assertEqual(len(scheduler.tick()), 2)
+        self.assertEqual(scheduler.stats()["deferred"], 2)
+        self.clock.now += 5        # Half a token: still deferred
+        self.assertEqual(scheduler.tick(), [])
+        self.clock.now += 5
+        self.assertEqual(len(scheduler.tick()), 1)
+        self.assertEqual(self.server.stats["requests"] - requests_before, 3)
+        logger.success("✓ Budget respecté")
+
+
+if __name__ == "__main__":
+    unittest.main()
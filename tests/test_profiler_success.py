@@ -0,0 +1,137 @@
+"""
+Tests unitaires pour la classe Profiler
+Teste l'attribution par étape et l'écriture du profil et du rapport
+"""
+import unittest
+import sys
+import time
+import pstats
+import tempfile
+import threading
+from pathlib import Path
+from loguru import logger
+from tests.logging_setup import configure_for
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from classes.Profiler import Profiler
+from classes.BatchRunner import BatchRunner
+from classes.StubServer import StubServer
+
+
+class TestProfiler(unittest.TestCase):
+    """Tests unitaires pour la classe Profiler"""
+
+    def setUp(self):
+        """Initialisation avant chaque test"""
+        configure_for(Path(__file__).stem)
+        logger.info("🧪 Démarrage test Profiler")
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """Nettoyage après chaque test"""
+        self.tmp_dir.cleanup()
+        logger.info("✅ Fin test Profiler\n")
+
+    def test_stage_attribution(self):
+        """Test l'attribution du temps et des allocations à une étape"""
+        logger.info("Test : stage()")
+        profiler = Profiler(self.tmp_dir.name).start()
+        with profiler.stage("sleep"):
+            time.sleep(0.05)
+        with profiler.stage("allocate"):
+            kept = [bytearray(1024) for _ in range(100)]
+        profiler.stop()
+
+        self.assertEqual(profiler.stages["sleep"]["calls"], 1)
+        self.assertGreaterEqual(profiler.stages["sleep"]["total_s"], 0.05)
+        self.assertGreater(profiler.stages["allocate"]["allocated_bytes"], 100 * 1024)
+        self.assertEqual(len(kept), 100)
+        logger.success("✓ Attribution par étape validée")
+
+    def test_concurrent_allocations_not_misattributed(self):
+        """Test que les allocations d'un autre thread ne sont pas attribuées à l'étape en cours"""
+        logger.info("Test : stage() - Étapes concurrentes")
+        profiler = Profiler(self.tmp_dir.name).start()
+        inside = threading.Event()
+        done = threading.Event()
+
+        def idle():
+            with profiler.stage("idle"):
+                inside.set()
+                done.wait(5)
+
+        thread = threading.Thread(target=idle)
+        thread.start()
+        inside.wait(5)
+        with profiler.stage("allocate"):
+            kept = [bytearray(1024) for _ in range(100)]
+        done.set()
+        thread.join()
+        with profiler.stage("alone"):
+            alone = [bytearray(1024) for _ in range(50)]
+        profiler.stop()
+
+        self.assertEqual(profiler.stages["idle"]["shared_calls"], 1)
+        self.assertEqual(profiler.stages["idle"]["allocated_bytes"], 0)
+        self.assertEqual(profiler.stages["allocate"]["shared_calls"], 1)
+        self.assertEqual(profiler.stages["alone"]["shared_calls"], 0)
+        self.assertGreater(profiler.stages["alone"]["allocated_bytes"], 50 * 1024)
+        self.assertIn("non attribuées", profiler.report())
+        self.assertEqual((len(kept), len(alone)), (100, 50))
+        logger.success("✓ Allocations concurrentes écartées")
+
+    def test_wrapped_stages_attributed_by_traceback(self):
+        """Test que la mémoire retenue par des étapes concurrentes est attribuée à chacune par pile d'appels"""
+        logger.info("Test : wrap() - Attribution par pile d'appels")
+        profiler = Profiler(self.tmp_dir.name).start()
+        barrier = threading.Barrier(2)
+        kept = []
+
+        def large():
+            barrier.wait(5)
+            kept.extend(bytearray(1024) for _ in range(200))
+
+        def small():
+            barrier.wait(5)
+            kept.extend(bytearray(1024) for _ in range(20))
+
+        threads = [threading.Thread(target=profiler.wrap(name, function)) for name, function in (("large", large), ("small", small))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        profiler.stop()
+
+        self.assertEqual(profiler.stages["large"]["shared_calls"], 1)
+        self.assertGreater(profiler.stages["large"]["retained_bytes"], 200 * 1024)
+        self.assertGreater(profiler.stages["small"]["retained_bytes"], 20 * 1024)
+        self.assertLess(profiler.stages["small"]["retained_bytes"], 100 * 1024)
+        self.assertIn("retenu (Kio)", profiler.report())
+        self.assertEqual(len(kept), 220)
+        logger.success("✓ Mémoire retenue attribuée malgré le recouvrement")
+
+    def test_batch_profile_written(self):
+        """Test le profil d'un batch et les fichiers produits"""
+        logger.info("Test : write() - Batch profilé")
+        profiler = Profiler(self.tmp_dir.name, top_n=5).start()
+        with StubServer() as server:
+            BatchRunner([("Paris", "FR"), ("Lyon", "FR")], "stub_key",
+                        checkpoint_path=f"{self.tmp_dir.name}/checkpoint.jsonl", output_dir=f"{self.tmp_dir.name}/json",
+                        base_url=server.base_url, profiler=profiler).run()
+        profiler.stop()
+        pstats_path, report_path = profiler.write()
+
+        for stage in ("fetch", "process_forecast", "save_forecast"):
+            self.assertEqual(profiler.stages[stage]["calls"], 2)
+        with open(report_path, "r", encoding="utf-8") as f:
+            report = f.read()
+        self.assertIn("process_forecast", report)
+        self.assertIn("Top 5 allocations", report)
+        self.assertGreater(pstats.Stats(pstats_path).total_calls, 0)
+        logger.debug(report)
+        logger.success("✓ Profil de batch écrit")
+
+
+if __name__ == "__main__":
+    unittest.main()
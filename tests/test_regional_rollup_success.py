@@ -0,0 +1,154 @@
+"""
+Tests unitaires pour la classe RegionalRollup
+Teste les cumuls par région, le classement des villes les plus touchées et l'intégration au batch
+"""
+import unittest
+import sys
+import json
+import tempfile
+from pathlib import Path
+from loguru import logger
+from tests.logging_setup import configure_for
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from classes.RegionalRollup import RegionalRollup
+from classes.LocationCanonicalizer import LocationCanonicalizer
+from classes.BatchRunner import BatchRunner
+from classes.BatchCheckpoint import BatchCheckpoint
+from classes.StubServer import StubServer
+
+
+def make_result(country_code, rain, snow=0, transitions=(0,)):
+    return {
+        "country_code": country_code,
+        "total_rain_period_mm": rain,
+        "total_snow_period_mm": snow,
+        "forecast_details": [{"major_transitions_count": count} for count in transitions]
+    }
+
+
+class RecordingConsumer:
+    """Consommateur sans restore() : ne reçoit que les résultats nouveaux"""
+
+    def __init__(self):
+        self.locations = []
+
+    def consume(self, location, country_code, result):
+        self.locations.append(location)
+
+
+class TestRegionalRollup(unittest.TestCase):
+    """Tests unitaires pour la classe RegionalRollup"""
+
+    def setUp(self):
+        """Initialisation avant chaque test"""
+        configure_for(Path(__file__).stem)
+        logger.info("🧪 Démarrage test RegionalRollup")
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """Nettoyage après chaque test"""
+        self.tmp_dir.cleanup()
+        logger.info("✅ Fin test RegionalRollup\n")
+
+    def test_country_totals_and_top_n(self):
+        """Test les cumuls par pays et le top N borné"""
+        logger.info("Test : consume() / summary()")
+        rollup = RegionalRollup(top_n=2)
+        rollup.consume("Paris", "FR", make_result("FR", 10.5, transitions=(1, 2)))
+        rollup.consume("Lyon", "FR", make_result("FR", 4.5, snow=1))
+        rollup.consume("London", "GB", make_result("GB", 20))
+        rollup.consume("Leeds", "GB", make_result("GB", 1))
+
+        summary = rollup.summary()
+        self.assertEqual(summary["locations"], 4)
+        self.assertEqual(summary["regions"]["FR"]["total_rain_mm"], 15)
+        self.assertEqual(summary["regions"]["FR"]["locations"], 2)
+        self.assertEqual([entry["location"] for entry in summary["top_rain"]], ["London,GB", "Paris,FR"])
+        self.assertEqual(summary["transition_distribution"], {"0": 3, "3": 1})
+        logger.success("✓ Cumuls et top N validés")
+
+    def test_region_map(self):
+        """Test le regroupement par carte de régions"""
+        logger.info("Test : region_map")
+        rollup = RegionalRollup({"FR": "Europe", "GB": "Europe", "Tokyo,JP": "Asie"})
+        rollup.consume("Paris", "FR", make_result("FR", 1))
+        rollup.consume("London", "GB", make_result("GB", 2))
+        rollup.consume("Tokyo", "JP", make_result("JP", 3))
+        rollup.consume("Lima", "PE", make_result("PE", 4))
+
+        regions = rollup.summary()["regions"]
+        self.assertEqual(sorted(regions), ["Asie", "Europe", "PE"])
+        self.assertEqual(regions["Europe"]["total_rain_mm"], 3)
+        logger.success("✓ Carte de régions validée")
+
+    def test_region_map_cities_are_canonicalized(self):
+        """Test que les villes de la carte de régions sont normalisées comme celles du batch"""
+        logger.info("Test : region_map - Villes canonisées")
+        canonicalizer = LocationCanonicalizer()
+        rollup = RegionalRollup({"saint-étienne,fr": "Loire", "fr": "France"}, canonicalizer=canonicalizer)
+        rollup.consume(*canonicalizer.canonicalize("Saint-Etienne", "FR"), make_result("FR", 2))
+        rollup.consume("Paris", "FR", make_result("FR", 1))
+
+        self.assertEqual(sorted(rollup.summary()["regions"]), ["France", "Loire"])
+        logger.success("✓ Ville rattachée à sa région")
+
+    def test_top_zero_keeps_no_ranking(self):
+        """Test qu'un classement de taille nulle est accepté et qu'une taille négative est refusée"""
+        logger.info("Test : top_n=0")
+        rollup = RegionalRollup(top_n=0)
+        rollup.consume("Paris", "FR", make_result("FR", 10))
+        summary = rollup.summary()
+        self.assertEqual((summary["locations"], summary["top_rain"], summary["top_snow"]), (1, [], []))
+        with self.assertRaises(ValueError):
+            RegionalRollup(top_n=-1)
+        logger.success("✓ Aucun classement demandé")
+
+    def test_batch_streams_results_to_rollup(self):
+        """Test la synthèse alimentée directement par le batch"""
+        logger.info("Test : Intégration BatchRunner")
+        rollup = RegionalRollup()
+        locations = [("Paris", "FR"), ("Lyon", "FR"), ("Tokyo", "JP")]
+        with StubServer() as server:
+            BatchRunner(locations, "stub_key", checkpoint_path=f"{self.tmp_dir.name}/checkpoint.jsonl",
+                        output_dir=f"{self.tmp_dir.name}/json", base_url=server.base_url, consumers=[rollup]).run()
+
+        path = f"{self.tmp_dir.name}/rollup.json"
+        rollup.write(path)
+        with open(path, "r") as f:
+            saved = json.load(f)
+
+        self.assertEqual(saved["locations"], 3)
+        self.assertEqual(saved["regions"]["FR"]["locations"], 2)
+        self.assertEqual(saved["regions"]["JP"]["locations"], 1)
+        logger.success("✓ Intégration BatchRunner validée")
+
+    def test_resumed_batch_rollup_stays_complete(self):
+        """Test qu'une reprise de batch inclut dans la synthèse les lieux déjà traités"""
+        logger.info("Test : Reprise et synthèse complète")
+        checkpoint_path = f"{self.tmp_dir.name}/checkpoint.jsonl"
+        output_dir = f"{self.tmp_dir.name}/json"
+        with StubServer() as server:
+            BatchRunner([("Paris", "FR"), ("Lyon", "FR")], "stub_key", checkpoint_path=checkpoint_path,
+                        output_dir=output_dir, base_url=server.base_url).run()
+            checkpoint = BatchCheckpoint(checkpoint_path)       # Interrupted run: Paris and Lyon were written
+            checkpoint.record("Paris,FR", "done")
+            checkpoint.record("Lyon,FR", "done")
+
+            rollup = RegionalRollup()
+            consumer = RecordingConsumer()
+            summary = BatchRunner([("Paris", "FR"), ("Lyon", "FR"), ("Tokyo", "JP")], "stub_key", checkpoint_path=checkpoint_path,
+                                  output_dir=output_dir, base_url=server.base_url, consumers=[rollup, consumer]).run()
+
+        self.assertEqual((summary["skipped"], summary["done"], summary["not_restored"]), (2, 1, 0))
+        document = rollup.summary()
+        self.assertEqual(document["locations"], 3)
+        self.assertEqual(document["regions"]["FR"]["locations"], 2)
+        self.assertFalse(document["partial"])
+        self.assertEqual(consumer.locations, ["Tokyo"])      # Consumers without restore() only see new results
+        logger.success("✓ Synthèse complète après reprise")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+"""
+Tests unitaires pour la classe ShardedBatch
+Teste le découpage stable, l'exécution multi-processus contre le serveur factice et la fusion des partitions
+"""
+import unittest
+import sys
+import os
+import json
+import pickle
+import tempfile
+import functools
+import multiprocessing
+from pathlib import Path
+from loguru import logger
+from tests.logging_setup import configure_for
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from classes.ShardedBatch import ShardedBatch
+from classes.BatchRunner import BatchRunner
+from classes.StubServer import StubServer
+from classes.LocationCanonicalizer import LocationCanonicalizer
+from classes.SharedForecastCache import SharedForecastCache
+
+
+CITIES = [(f"Ville{index}", "FR") for index in range(12)]
+
+
+def shard_cache(directory):
+    """Ressources construites dans chaque processus de partition : ici un cache partagé"""
+    return {"cache": SharedForecastCache(directory)}
+
+
+class TestShardedBatch(unittest.TestCase):
+    """Tests unitaires pour la classe ShardedBatch"""
+
+    def setUp(self):
+        """Initialisation avant chaque test"""
+        configure_for(Path(__file__).stem)
+        logger.info("🧪 Démarrage test ShardedBatch")
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmp_dir.name, "shards")
+        self.output_dir = os.path.join(self.tmp_dir.name, "json")
+
+    def tearDown(self):
+        """Nettoyage après chaque test"""
+        self.tmp_dir.cleanup()
+        logger.info("✅ Fin test ShardedBatch\n")
+
+    def test_partition_is_stable_and_complete(self):
+        """Test que chaque lieu appartient à une seule partition, quel que soit l'ordre de la liste"""
+        logger.info("Test : assigned()")
+        forward = [ShardedBatch(CITIES, 3, index, "stub_key").assigned() for index in range(3)]
+        backward = [ShardedBatch(list(reversed(CITIES)), 3, index, "stub_key").assigned() for index in range(3)]
+
+        self.assertEqual([set(shard) for shard in forward], [set(shard) for shard in backward])
+        self.assertEqual(sorted(location for shard in forward for location in shard), sorted(CITIES))
+        self.assertTrue(all(shard for shard in forward))
+        with self.assertRaises(ValueError):
+            ShardedBatch(CITIES, 3, 3, "stub_key")
+        logger.success("✓ Découpage stable")
+
+    def test_canonical_variants_share_a_shard(self):
+        """Test que les variantes d'écriture d'un lieu tombent dans la même partition"""
+        logger.info("Test : ShardedBatch(canonicalizer=...)")
+        shards = [ShardedBatch([("paris", "fr"), ("PARIS", "FR"), ("Lyon", "FR")], 4, index, "stub_key",
+                               canonicalizer=LocationCanonicalizer()).assigned() for index in range(4)]
+        self.assertEqual(sorted(location for shard in shards for location in shard), [("Lyon", "FR"), ("Paris", "FR")])
+        logger.success("✓ Variantes dans la même partition")
+
+    @unittest.skipUnless("fork" in multiprocessing.get_all_start_methods(), "fork indisponible")
+    def test_run_local_and_merge(self):
+        """Test l'exécution de trois partitions dans trois processus puis la fusion"""
+        logger.info("Test : run_local()")
+        with StubServer() as server:
+            merged = ShardedBatch.run_local(CITIES, 3, "stub_key", root=self.root, output_dir=self.output_dir,
+                                            base_url=server.base_url, fetch_workers=2)
+            served = server.stats["requests"]
+
+        self.assertEqual(served, len(CITIES))
+        self.assertTrue(merged["complete"])
+        self.assertEqual((merged["total"], merged["done"], merged["locations"]), (12, 12, 12))
+        self.assertEqual(sorted(os.listdir(self.output_dir)), sorted(f"{city}_FR.json" for city, _ in CITIES))
+        with open(os.path.join(self.root, "merged.json"), "r") as f:
+            self.assertEqual(json.load(f), merged)
+        logger.success(f"✓ {served} requêtes pour {len(CITIES)} lieux sur 3 processus")
+
+    @unittest.skipUnless("fork" in multiprocessing.get_all_start_methods(), "fork indisponible")
+    def test_merge_reports_duplicates_and_invalid(self):
+        """Test que la fusion compte les doublons et les entrées invalides comme un batch sans partition"""
+        logger.info("Test : merge() - Doublons et entrées invalides")
+        locations = [("Paris", "FR"), ("paris", "fr"), ("Lyon", "XXX"), ("", "FR"), ("Nice", "FR")]
+        with StubServer() as server:
+            merged = ShardedBatch.run_local(locations, 3, "stub_key", root=self.root, output_dir=self.output_dir,
+                                            base_url=server.base_url, canonicalizer=LocationCanonicalizer())
+            unsharded = BatchRunner(locations, "stub_key", checkpoint_path=os.path.join(self.tmp_dir.name, "checkpoint.jsonl"),
+                                    output_dir=os.path.join(self.tmp_dir.name, "unsharded"), base_url=server.base_url,
+                                    canonicalizer=LocationCanonicalizer()).run()
+
+        for field in ("total", "done", "failed", "duplicates", "errors"):
+            self.assertEqual(merged[field], unsharded[field], field)
+        self.assertEqual((merged["total"], merged["failed"], merged["duplicates"]), (4, 2, 1))
+        self.assertTrue(merged["complete"])
+        logger.success("✓ Résumé fusionné identique au batch sans partition")
+
+    @unittest.skipUnless("fork" in multiprocessing.get_all_start_methods(), "fork indisponible")
+    def test_run_local_builds_resources_per_process(self):
+        """Test que les ressources non transmissibles (cache, transport, clés) sont construites dans chaque processus"""
+        logger.info("Test : run_local(setup=...)")
+        cache_dir = os.path.join(self.tmp_dir.name, "cache")
+        setup = functools.partial(shard_cache, cache_dir)
+        options = {"fetch_workers": 2, "canonicalizer": LocationCanonicalizer()}
+        pickle.dumps((setup, options))      # Runs under spawn as well: nothing process-bound is sent
+        with StubServer() as server:
+            options["base_url"] = server.base_url
+            for _ in range(2):
+                merged = ShardedBatch.run_local(CITIES, 3, "stub_key", root=self.root, output_dir=self.output_dir,
+                                                setup=setup, **options)
+            served = server.stats["requests"]
+
+        self.assertEqual(served, len(CITIES))       # The second run is served by the cache the shards share
+        self.assertEqual((merged["done"], merged["unchanged"]), (0, len(CITIES)))
+        self.assertGreaterEqual(SharedForecastCache(cache_dir).stats()["entries"], len(CITIES))
+        logger.success("✓ Cache partagé par les processus de partition")
+
+    def test_merge_checks_partitions(self):
+        """Test le refus de fusionner des partitions manquantes ou incohérentes"""
+        logger.info("Test : merge() - Cohérence")
+        with StubServer() as server:
+            ShardedBatch(CITIES, 2, 0, "stub_key", root=self.root, base_url=server.base_url).run()
+            with self.assertRaises(FileNotFoundError):
+                ShardedBatch.merge(self.root, 2, self.output_dir)
+
+            ShardedBatch(CITIES[:-1], 2, 1, "stub_key", root=self.root, base_url=server.base_url).run()
+            with self.assertRaises(ValueError):
+                ShardedBatch.merge(self.root, 2, self.output_dir)
+
+            ShardedBatch(CITIES, 2, 1, "stub_key", root=self.root, base_url=server.base_url).run()
+        merged = ShardedBatch.merge(self.root, 2, self.output_dir)
+        self.assertEqual(merged["locations"], len(CITIES))
+        logger.success("✓ Partitions vérifiées avant fusion")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,172 @@
+"""
+Tests unitaires pour la classe SharedForecastCache
+Teste le partage entre processus, l'expiration, l'éviction et le partage des résultats traités
+"""
+import unittest
+import sys
+import tempfile
+import multiprocessing
+from pathlib import Path
+from loguru import logger
+from tests.logging_setup import configure_for
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from classes.SharedForecastCache import SharedForecastCache
+from classes.WeatherForecast import WeatherForecast
+from classes.StubServer import StubServer
+
+
+def worker(directory, base_url, cities, queue):
+    """Processus de travail : récupère et traite les villes via le cache partagé"""
+    cache = SharedForecastCache(directory)
+    for city in cities:
+        forecast = WeatherForecast(city, "FR", "stub_key", base_url=base_url, cache=cache)
+        forecast.get_forecast()
+        queue.put((city, forecast.process_forecast()["total_rain_period_mm"]))
+
+
+class TestSharedForecastCache(unittest.TestCase):
+    """Tests unitaires pour la classe SharedForecastCache"""
+
+    def setUp(self):
+        """Initialisation avant chaque test"""
+        configure_for(Path(__file__).stem)
+        logger.info("🧪 Démarrage test SharedForecastCache")
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """Nettoyage après chaque test"""
+        self.tmp_dir.cleanup()
+        logger.info("✅ Fin test SharedForecastCache\n")
+
+    def test_ttl_and_instances(self):
+        """Test qu'une entrée écrite par une instance est lue par une autre jusqu'à expiration"""
+        logger.info("Test : get()/put() - TTL")
+        now = [1000.0]
+        writer = SharedForecastCache(self.tmp_dir.name, ttl=60, clock=lambda: now[0])
+        reader = SharedForecastCache(self.tmp_dir.name, ttl=60, clock=lambda: now[0])
+        writer.put("Paris,FR", {"list": [1, 2]})
+        now[0] += 30
+        self.assertEqual(reader.get("Paris,FR"), {"list": [1, 2]})
+        self.assertEqual(reader.age("Paris,FR"), 30)
+        now[0] += 30
+        self.assertIsNone(reader.get("Paris,FR"))
+        self.assertEqual(len(reader), 0)
+        logger.success("✓ Entrée partagée puis expirée")
+
+    def test_eviction(self):
+        """Test l'éviction des entrées les plus anciennes, selon l'horloge du cache"""
+        logger.info("Test : put() - Éviction")
+        now = [1000.0]
+        cache = SharedForecastCache(self.tmp_dir.name, max_entries=5, clock=lambda: now[0])
+        for index in range(8):
+            cache.put(f"Ville{index},FR", {"index": index})
+            now[0] += 1
+        self.assertLessEqual(len(cache), 5)
+        self.assertEqual(cache.stats()["evictions"], 8 - len(cache))
+        self.assertIsNone(cache.get("Ville0,FR"))
+        self.assertEqual(cache.get("Ville7,FR"), {"index": 7})
+
+        now[0] += 600       # Everything else expired on the injected clock: the next eviction drops it all
+        cache.max_entries = len(cache)
+        cache.put("Ville8,FR", {"index": 8})
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.get("Ville8,FR"), {"index": 8})
+        logger.success("✓ Taille bornée")
+
+    def test_lock_files_removed(self):
+        """Test que les fichiers de verrou des lieux évincés, expirés ou invalidés sont supprimés"""
+        logger.info("Test : fetch_lock() - Fichiers de verrou")
+        now = [1000.0]
+        cache = SharedForecastCache(self.tmp_dir.name, ttl=60, max_entries=10, clock=lambda: now[0])
+        for index in range(50):
+            key = f"Ville{index},FR"
+            with cache.fetch_lock(key):
+                cache.put(key, {"index": index})
+        locks = Path(self.tmp_dir.name, "locks")
+        held = [path for path in locks.iterdir() if not path.name.startswith("evict-")]
+        self.assertLessEqual(len(held), 10)
+
+        with cache.fetch_lock("Ville49,FR"):
+            cache._remove_lock(cache._name("Ville49,FR"))     # Held: kept
+            self.assertTrue(Path(cache._lock_path(cache._name("Ville49,FR"))).exists())
+        cache.invalidate("Ville49,FR")
+        self.assertFalse(Path(cache._lock_path(cache._name("Ville49,FR"))).exists())
+        now[0] += 60
+        for index in range(49):
+            cache.get(f"Ville{index},FR")       # Every remaining entry has expired
+        self.assertEqual([path.name for path in locks.iterdir() if not path.name.startswith("evict-")], [])
+        logger.success("✓ Verrous supprimés avec leurs entrées")
+
+    def test_eviction_is_amortized(self):
+        """Test que le dossier n'est pas relu à chaque écriture"""
+        logger.info("Test : put() - Éviction amortie")
+        cache = SharedForecastCache(self.tmp_dir.name, max_entries=100)
+        for index in range(1000):
+            cache.put(f"Ville{index},FR", {"index": index})
+        stats = cache.stats()
+
+        self.assertLessEqual(len(cache), 100)
+        self.assertLess(stats["scans"], 1000 // 5)
+        logger.success(f"✓ {stats['scans']} lectures du dossier pour 1000 écritures")
+
+    def test_results_do_not_evict_payloads(self):
+        """Test que les résultats traités sont bornés à part et ne chassent pas les réponses"""
+        logger.info("Test : put() - Partitions")
+        cache = SharedForecastCache(self.tmp_dir.name, max_entries=3, max_results=5)
+        for city in ("Paris", "Lyon", "Nice"):
+            cache.put(f"{city},FR", {"list": [city]})
+        for index in range(20):
+            cache.put(f"result:Paris,FR:{index}:metric", {"index": index})
+
+        for city in ("Paris", "Lyon", "Nice"):
+            self.assertEqual(cache.get(f"{city},FR"), {"list": [city]})
+        self.assertEqual(cache.get("result:Paris,FR:19:metric"), {"index": 19})
+        self.assertLessEqual(len(cache), 3 + 5)
+        logger.success("✓ Réponses conservées")
+
+    def test_processed_results_shared(self):
+        """Test que les résultats traités sont partagés entre instances"""
+        logger.info("Test : process_forecast() - Résultat partagé")
+        cache = SharedForecastCache(self.tmp_dir.name)
+        with StubServer() as server:
+            first = WeatherForecast("Paris", "FR", "stub_key", base_url=server.base_url, cache=cache)
+            first.get_forecast()
+            expected = first.process_forecast(units="imperial")
+            second = WeatherForecast("Paris", "FR", "stub_key", base_url=server.base_url, cache=SharedForecastCache(self.tmp_dir.name))
+            second.get_forecast()
+            stores = cache.stats()["stores"]
+
+            self.assertTrue(second.from_cache)
+            self.assertEqual(second.process_forecast(units="imperial"), expected)
+            self.assertEqual(server.stats["requests"], 1)
+            self.assertEqual(second.cache.stats()["hits"], 2)
+            self.assertEqual(stores, 3)     # Payload, metric result, imperial result
+        logger.success("✓ Résultats traités réutilisés")
+
+    @unittest.skipUnless("fork" in multiprocessing.get_all_start_methods(), "fork indisponible")
+    def test_one_upstream_call_per_city_across_processes(self):
+        """Test qu'un seul appel par ville est fait pour plusieurs processus"""
+        logger.info("Test : fetch_lock() - Processus concurrents")
+        context = multiprocessing.get_context("fork")
+        queue = context.Queue()
+        cities = ["Paris", "Lyon", "Nice"]
+        with StubServer(latency=0.05) as server:
+            processes = [context.Process(target=worker, args=(self.tmp_dir.name, server.base_url, cities, queue))
+                         for _ in range(4)]
+            for process in processes:
+                process.start()
+            results = [queue.get(timeout=30) for _ in range(len(processes) * len(cities))]
+            for process in processes:
+                process.join()
+            served = server.stats["requests"]
+
+        self.assertEqual(served, len(cities))
+        for city in cities:
+            self.assertEqual(len({value for name, value in results if name == city}), 1)
+        logger.success(f"✓ {served} appels pour {len(processes)} processus")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+"""
+Tests unitaires pour le serveur factice et l'abstraction de transport
+Teste WeatherForecast hors ligne contre StubServer
+"""
+import unittest
+import sys
+import time
+from pathlib import Path
+import requests
+from loguru import logger
+from tests.logging_setup import configure_for
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from classes.WeatherForecast import WeatherForecast
+from classes.StubServer import StubServer
+from classes.Transport import Transport
+
+
+class TestStubServer(unittest.TestCase):
+    """Tests unitaires pour StubServer et Transport"""
+
+    def setUp(self):
+        """Initialisation avant chaque test"""
+        configure_for(Path(__file__).stem)
+        logger.info("🧪 Démarrage test StubServer")
+
+    def tearDown(self):
+        """Nettoyage après chaque test"""
+        logger.info("✅ Fin test StubServer\n")
+
+    def test_forecast_against_stub(self):
+        """Test get_forecast() et process_forecast() contre le serveur factice"""
+        logger.info("Test : get_forecast() - Serveur factice")
+        with StubServer() as server:
+            forecast = WeatherForecast("Paris", "FR", "stub_key", base_url=server.base_url)
+            forecast.get_forecast()
+            data = forecast.process_forecast()
+
+        self.assertEqual(len(forecast.forecast_data["list"]), 40)
+        self.assertEqual(data["forecast_location_name"], "Paris")
+        self.assertGreater(len(data["forecast_details"]), 0)
+        self.assertEqual(server.stats["ok"], 1)
+        logger.success("✓ Prévisions servies par le serveur factice")
+
+    def test_synthetic_forecast_is_deterministic(self):
+        """Test que les données synthétiques sont reproductibles"""
+        logger.info("Test : synthetic_forecast()")
+        first = StubServer.synthetic_forecast("Paris", "FR")
+        second = StubServer.synthetic_forecast("Paris", "FR")
+        other = StubServer.synthetic_forecast("Lyon", "FR")
+
+        self.assertEqual(first, second)
+        self.assertNotEqual(first["list"], other["list"])
+        logger.success("✓ Données synthétiques reproductibles")
+
+    def test_rate_limited_response(self):
+        """Test la réponse 429 du serveur factice"""
+        logger.info("Test : get_forecast() - 429")
+        with StubServer(rate_limit_rate=1.0) as server:
+            forecast = WeatherForecast("Paris", "FR", "stub_key", base_url=server.base_url)
+            with self.assertRaises(requests.exceptions.HTTPError) as context:
+                forecast.get_forecast()
+
+        self.assertEqual(context.exception.response.status_code, 429)
+        self.assertEqual(server.stats["rate_limited"], 1)
+        logger.success("✓ 429 correctement propagé")
+
+    def test_unknown_location(self):
+        """Test une ville inconnue du serveur factice"""
+        logger.info("Test : get_forecast() - Ville inconnue")
+        with StubServer(unknown_locations=["Atlantis"]) as server:
+            forecast = WeatherForecast("Atlantis", "XX", "stub_key", base_url=server.base_url)
+            with self.assertRaises(Exception):
+                forecast.get_forecast()
+        logger.success("✓ Ville inconnue rejetée")
+
+    def test_configured_latency(self):
+        """Test la latence configurée du serveur factice"""
+        logger.info("Test : Latence configurée")
+        with StubServer(latency=0.2) as server:
+            forecast = WeatherForecast("Paris", "FR", "stub_key", base_url=server.base_url)
+            started = time.perf_counter()
+            forecast.get_forecast()
+            elapsed = time.perf_counter() - started
+
+        self.assertGreaterEqual(elapsed, 0.2)
+        logger.debug(f"Latence mesurée : {elapsed:.3f}s")
+        logger.success("✓ Latence appliquée")
+
+    def test_custom_transport(self):
+        """Test un transport personnalisé sans réseau"""
+        logger.info("Test : Transport personnalisé")
+
+        class FakeResponse:
+            status_code = 200
+            headers = {}
+
+            def raise_for_status(self):
+                pass
+
+            def json(self):
+                return StubServer.synthetic_forecast("Paris", "FR", entries=8)
+
+        class FakeTransport(Transport):
+            def __init__(self):
+                self.calls = []
+
+            def get(self, url, params=None, headers=None):
+                self.calls.append(params)
+                return FakeResponse()
+
+        transport = FakeTransport()
+        forecast = WeatherForecast("Paris", "FR", "stub_key", transport=transport)
+        forecast.get_forecast()
+
+        self.assertEqual(transport.calls[0]["q"], "Paris,FR")
+        self.assertEqual(transport.calls[0]["units"], "metric")
+        self.assertEqual(len(forecast.forecast_data["list"]), 8)
+        logger.success("✓ Transport personnalisé utilisé")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,167 @@
+"""
+Tests unitaires pour le transport HTTP compressé
+Teste la négociation gzip, le décodage et l'archivage des réponses brutes
+"""
+import unittest
+import sys
+import gzip
+import zlib
+import time
+import socket
+import tempfile
+import threading
+import socketserver
+from pathlib import Path
+import requests
+from loguru import logger
+from tests.logging_setup import configure_for
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from classes.Transport import RequestsTransport, decode_body
+from classes.WeatherForecast import WeatherForecast
+from classes.BatchRunner import BatchRunner
+from classes.StubServer import StubServer
+from classes.BatchCheckpoint import BatchCheckpoint
+
+
+class BrokenBodyServer(socketserver.ThreadingTCPServer):
+    """Serveur qui annonce 1000 octets puis coupe la connexion (truncate) ou se tait (stall) au milieu du corps"""
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, mode):
+        self.mode = mode
+        self.release = threading.Event()
+        super().__init__(("127.0.0.1", 0), BrokenBodyHandler)
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/data/2.5/forecast"
+
+    def close(self):
+        self.release.set()
+        self.shutdown()
+        self.server_close()
+
+
+class BrokenBodyHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        self.request.recv(65536)
+        self.request.sendall(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: 1000\r\n\r\n{\"cod\": \"200\"")
+        if self.server.mode == "stall":
+            self.server.release.wait(5)
+        self.request.shutdown(socket.SHUT_RDWR)
+
+
+class TestTransport(unittest.TestCase):
+    """Tests unitaires pour RequestsTransport et l'archive brute"""
+
+    def setUp(self):
+        """Initialisation avant chaque test"""
+        configure_for(Path(__file__).stem)
+        logger.info("🧪 Démarrage test Transport")
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """Nettoyage après chaque test"""
+        self.tmp_dir.cleanup()
+        logger.info("✅ Fin test Transport\n")
+
+    def test_decode_body(self):
+        """Test le décodage gzip, deflate et identity"""
+        logger.info("Test : decode_body()")
+        body = b'{"cod": "200"}'
+        self.assertEqual(decode_body(gzip.compress(body), "gzip"), body)
+        self.assertEqual(decode_body(zlib.compress(body), "deflate"), body)
+        raw_deflate = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+        self.assertEqual(decode_body(raw_deflate.compress(body) + raw_deflate.flush(), "deflate"), body)
+        self.assertEqual(decode_body(body, None), body)
+        logger.success("✓ Encodages décodés")
+
+    def test_gzip_negotiated(self):
+        """Test que la réponse est compressée sur le réseau et décodée à l'identique"""
+        logger.info("Test : RequestsTransport - gzip")
+        transport = RequestsTransport()
+        with StubServer() as server:
+            forecast = WeatherForecast("Paris", "FR", "stub_key", transport=transport, base_url=server.base_url)
+            forecast.get_forecast()
+            wire_bytes = server.stats["wire_bytes"]
+
+        stats = transport.stats()
+        self.assertEqual(forecast.forecast_data, StubServer.synthetic_forecast("Paris", "FR"))
+        self.assertEqual(stats["requests"], 1)
+        self.assertEqual(stats["wire_bytes"], wire_bytes)
+        self.assertLess(stats["wire_bytes"], stats["decoded_bytes"])
+        self.assertGreater(stats["compression_ratio"], 1)
+        logger.success(f"✓ Compression négociée (ratio {stats['compression_ratio']})")
+
+    def test_identity_when_disabled(self):
+        """Test que la compression peut être désactivée"""
+        logger.info("Test : RequestsTransport(compression=False)")
+        transport = RequestsTransport(compression=False)
+        with StubServer() as server:
+            forecast = WeatherForecast("Paris", "FR", "stub_key", transport=transport, base_url=server.base_url)
+            forecast.get_forecast()
+
+        stats = transport.stats()
+        self.assertEqual(stats["wire_bytes"], stats["decoded_bytes"])
+        self.assertEqual(forecast.forecast_data, StubServer.synthetic_forecast("Paris", "FR"))
+        logger.success("✓ Transfert non compressé")
+
+    def test_raw_archive_replay(self):
+        """Test l'archivage brut et le rejeu sans réseau"""
+        logger.info("Test : replay_forecast()")
+        with StubServer() as server:
+            forecast = WeatherForecast("Paris", "FR", "stub_key", transport=RequestsTransport(),
+                                       base_url=server.base_url, raw_archive_dir=self.tmp_dir.name)
+            forecast.get_forecast()
+
+        replayed = WeatherForecast("Paris", "FR", "stub_key", raw_archive_dir=self.tmp_dir.name)
+        replayed.replay_forecast()
+        self.assertTrue(Path(forecast.raw_path()).exists())
+        self.assertEqual(replayed.forecast_data, forecast.forecast_data)
+        self.assertEqual(replayed.process_forecast(), forecast.process_forecast())
+        logger.success("✓ Réponse rejouée à l'identique")
+
+    def test_batch_transfer_summary(self):
+        """Test les compteurs de transfert dans le résumé du batch"""
+        logger.info("Test : BatchRunner - transfert")
+        with StubServer() as server:
+            summary = BatchRunner([("Paris", "FR"), ("Lyon", "FR")], "stub_key",
+                                  checkpoint_path=f"{self.tmp_dir.name}/checkpoint.jsonl",
+                                  output_dir=f"{self.tmp_dir.name}/json", base_url=server.base_url,
+                                  raw_archive_dir=f"{self.tmp_dir.name}/raw").run()
+
+        self.assertEqual(summary["done"], 2)
+        self.assertEqual(summary["transfer"]["requests"], 2)
+        self.assertLess(summary["transfer"]["wire_bytes"], summary["transfer"]["decoded_bytes"])
+        self.assertEqual(len(list(Path(f"{self.tmp_dir.name}/raw").glob("*.json.gz"))), 2)
+        logger.success("✓ Compteurs de transfert présents")
+
+    def test_broken_body_raises_requests_errors(self):
+        """Test qu'un corps tronqué ou bloqué lève une exception requests, retentée au lot suivant"""
+        logger.info("Test : RequestsTransport - Corps tronqué")
+        for mode, expected in (("truncate", requests.exceptions.ChunkedEncodingError),
+                               ("stall", requests.exceptions.ConnectionError)):
+            with self.subTest(mode=mode):
+                server = BrokenBodyServer(mode)
+                try:
+                    transport = RequestsTransport(timeout=0.3)
+                    with self.assertRaises(expected):
+                        transport.get(server.base_url, params={"q": "Paris,FR"})
+
+                    checkpoint_path = f"{self.tmp_dir.name}/checkpoint_{mode}.jsonl"
+                    summary = BatchRunner([("Paris", "FR")], "stub_key", checkpoint_path=checkpoint_path,
+                                          output_dir=f"{self.tmp_dir.name}/json", base_url=server.base_url,
+                                          transport=transport).run()
+                finally:
+                    server.close()
+                self.assertEqual((summary["failed"], summary["remaining"]), (1, 1))
+                self.assertNotIn("Paris,FR", BatchCheckpoint(checkpoint_path).load())     # Transient: retried on resume
+        logger.success("✓ Erreurs de lecture converties")
+
+
+if __name__ == "__main__":
+    unittest.main()
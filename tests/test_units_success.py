@@ -0,0 +1,126 @@
+"""
+Tests unitaires pour les systèmes d'unités dérivés localement
+Teste la conversion des résultats, le seuil de transition et le cache par variante d'unités
+"""
+import unittest
+import sys
+import json
+import tempfile
+from pathlib import Path
+from loguru import logger
+from tests.logging_setup import configure_for
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from classes.Units import UNITS, unit_system, convert_payload
+from classes.Accumulators import ForecastStats, TransitionCount
+from classes.Transport import RequestsTransport
+from classes.WeatherForecast import WeatherForecast
+from classes.BatchRunner import BatchRunner
+from classes.StubServer import StubServer
+
+
+class TestUnits(unittest.TestCase):
+    """Tests unitaires pour Units et process_forecast(units=...)"""
+
+    def setUp(self):
+        """Initialisation avant chaque test"""
+        configure_for(Path(__file__).stem)
+        logger.info("🧪 Démarrage test Units")
+        self.payload = StubServer.synthetic_forecast("Paris", "FR")
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """Nettoyage après chaque test"""
+        self.tmp_dir.cleanup()
+        logger.info("✅ Fin test Units\n")
+
+    def test_conversions(self):
+        """Test les conversions de base"""
+        logger.info("Test : UnitSystem.convert()")
+        self.assertEqual(UNITS["imperial"].convert("temperature", 100), 212)
+        self.assertEqual(UNITS["standard"].convert("temperature", 0), 273.15)
+        with self.assertRaises(ValueError):
+            UNITS["imperial"].convert("distance", 3)
+        self.assertEqual(UNITS["imperial"].convert("speed", 10), 22.37)
+        self.assertIsNone(UNITS["imperial"].convert("temperature", None))
+        with self.assertRaises(ValueError):
+            unit_system("kelvin")
+        logger.success("✓ Conversions validées")
+
+    def test_matches_converted_payload(self):
+        """Test que le résultat converti égale le calcul sur les données converties avec le seuil converti"""
+        logger.info("Test : process_forecast(units='imperial')")
+        forecast = WeatherForecast("Paris", "FR", "stub_key")
+        forecast.forecast_data = self.payload
+        metrics = ["transitions", "temp_min", "temp_max", "temp_mean", "wind_max", "rain"]
+        result = forecast.process_forecast(metrics, units="imperial")
+
+        imperial = convert_payload(self.payload, "imperial")
+        stats = ForecastStats(["temp_min", "temp_max", "wind_max", "rain"]).update_all(imperial["list"])
+        imperial_units = UNITS["imperial"]       # A difference scales like the temperatures: 3 °C apart is 5.4 °F apart
+        threshold = imperial_units.temperature(TransitionCount().threshold) - imperial_units.temperature(0)
+        transitions, previous = {}, None
+        for entry in imperial["list"]:
+            transitions.setdefault(entry["dt_txt"][:10], TransitionCount(threshold)).update(entry, previous)
+            previous = entry
+
+        self.assertEqual(result["units"], "imperial")
+        self.assertAlmostEqual(result["max_temp_period"], stats.period_results()["max_temp_period"], delta=0.02)
+        self.assertAlmostEqual(result["max_wind_speed_period"], stats.period_results()["max_wind_speed_period"], delta=0.02)
+        self.assertEqual(result["total_rain_period_mm"], stats.period_results()["total_rain_period_mm"])
+        for detail, expected in zip(result["forecast_details"], stats.day_results()):
+            self.assertEqual(detail["major_transitions_count"], transitions[detail["date_local"]].result())
+            self.assertAlmostEqual(detail["min_temp"], expected["min_temp"], delta=0.02)
+        logger.success("✓ Résultats impériaux cohérents")
+
+    def test_single_fetch_for_all_units(self):
+        """Test qu'une seule requête sert toutes les variantes, avec résultats mis en cache"""
+        logger.info("Test : Cache par variante d'unités")
+        transport = RequestsTransport()
+        with StubServer() as server:
+            forecast = WeatherForecast("Paris", "FR", "stub_key", transport=transport, base_url=server.base_url)
+            forecast.get_forecast()
+
+        results = {units: forecast.process_forecast(units=units) for units in UNITS}
+        self.assertEqual(transport.stats()["requests"], 1)
+        self.assertIs(forecast.process_forecast(units="imperial"), results["imperial"])
+        metric, standard = results["metric"], results["standard"]
+        self.assertEqual(standard["min_temp_period"], round(metric["min_temp_period"] + 273.15, 2))
+        self.assertEqual(standard["total_rain_period_mm"], metric["total_rain_period_mm"])
+        self.assertEqual(forecast.forecast_data_in("standard")["list"][0]["main"]["temp"],
+                         round(forecast.forecast_data["list"][0]["main"]["temp"] + 273.15, 2))
+        logger.success("✓ Une requête pour trois systèmes d'unités")
+
+    def test_iter_forecast_units(self):
+        """Test l'itérateur et l'écriture en flux dans un autre système d'unités"""
+        logger.info("Test : stream_forecast(units='imperial')")
+        forecast = WeatherForecast("Paris", "FR", "stub_key")
+        forecast.forecast_data = self.payload
+        expected = forecast.process_forecast(units="imperial")
+        forecast.stream_forecast("paris.json", directory=self.tmp_dir.name, units="imperial")
+
+        with open(f"{self.tmp_dir.name}/paris.json", "r") as f:
+            self.assertEqual(json.load(f), expected)
+        logger.success("✓ Flux converti identique")
+
+    def test_batch_writes_each_unit(self):
+        """Test l'écriture d'un fichier par système d'unités dans le batch"""
+        logger.info("Test : BatchRunner(units=...)")
+        output_dir = Path(self.tmp_dir.name) / "json"
+        with StubServer() as server:
+            summary = BatchRunner([("Paris", "FR")], "stub_key", checkpoint_path=f"{self.tmp_dir.name}/checkpoint.jsonl",
+                                  output_dir=str(output_dir), base_url=server.base_url,
+                                  units=("metric", "imperial")).run()
+            requests_served = server.stats["requests"]
+
+        self.assertEqual(summary["done"], 1)
+        self.assertEqual(requests_served, 1)
+        with open(output_dir / "Paris_FR_imperial.json", "r") as f:
+            self.assertEqual(json.load(f)["units"], "imperial")
+        self.assertTrue((output_dir / "Paris_FR.json").exists())
+        logger.success("✓ Fichiers par système d'unités")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,6 +4,8 @@ Teste la coordination entre les différents composants
 """
 import unittest
 import sys
+import os
+import tempfile
 from pathlib import Path
 from unittest.mock import patch
 from loguru import logger
@@ -13,19 +15,34 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from classes.WeatherApp import WeatherApp
 from classes.APIKey import APIKey
+from classes.StubServer import StubServer
 
 
 class TestWeatherApp(unittest.TestCase):
     """Tests unitaires pour la classe WeatherApp"""
 
+    @classmethod
+    def setUpClass(cls):
+        """Serveur factice partagé : les tests ne dépendent pas de l'API réelle"""
+        cls.server = StubServer(seed=42).start_server()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
     def setUp(self):
         """Initialisation avant chaque test"""
         configure_for(Path(__file__).stem)
         logger.info("🧪 Démarrage test WeatherApp")
-        self.app = WeatherApp()
+        self.app = WeatherApp(base_url=self.server.base_url)
+        self.cwd = os.getcwd()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp_dir.name)     # json/ and archive/ are written relative to the working directory
 
     def tearDown(self):
         """Nettoyage après chaque test"""
+        os.chdir(self.cwd)
+        self.tmp_dir.cleanup()
         logger.info("✅ Fin test WeatherApp\n")
 
     def test_init(self):
@@ -69,7 +86,7 @@ class TestWeatherApp(unittest.TestCase):
         
         for city, country in test_cases:
             logger.debug(f"Test : {city}, {country}")
-            app = WeatherApp()
+            app = WeatherApp(base_url=self.server.base_url)
             mock_input.side_effect = [city, country]
             
             try:
@@ -6,6 +6,7 @@ import unittest
 import sys
 from pathlib import Path
 from unittest.mock import patch, MagicMock
+import requests
 from loguru import logger
 from tests.logging_setup import configure_for
 
@@ -13,11 +14,21 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from classes.WeatherForecast import WeatherForecast
 from classes.APIKey import APIKey
+from classes.StubServer import StubServer
 
 
 class TestWeatherForecastErrors(unittest.TestCase):
     """Tests pour les erreurs de WeatherForecast"""
 
+    @classmethod
+    def setUpClass(cls):
+        """Serveur factice : ville inconnue (404) et clé refusée (401) sans appel à l'API réelle"""
+        cls.server = StubServer(unknown_locations=["CityDoesNotExistXYZ123456"], invalid_keys=["invalid_api_key_12345"]).start_server()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
     def setUp(self):
         """Initialisation avant chaque test"""
         configure_for(Path(__file__).stem)
@@ -31,25 +42,25 @@ class TestWeatherForecastErrors(unittest.TestCase):
     def test_get_forecast_invalid_city(self):
         """Test get_forecast avec une ville inexistante"""
         logger.info("Test : get_forecast() - Ville inexistante")
-        forecast = WeatherForecast("CityDoesNotExistXYZ123456", "XX", self.api_key)
+        forecast = WeatherForecast("CityDoesNotExistXYZ123456", "XX", self.api_key, base_url=self.server.base_url)
         
-        with self.assertRaises(Exception) as context:
+        with self.assertRaises(requests.exceptions.HTTPError) as context:
             forecast.get_forecast()
         
         logger.error(f"❌ Exception levée (attendue) : {context.exception}")
-        self.assertIn("Erreur API", str(context.exception))
+        self.assertEqual(context.exception.response.status_code, 404)
         logger.success("✓ Exception correctement levée pour ville invalide")
 
     def test_get_forecast_invalid_api_key(self):
         """Test get_forecast avec une clé API invalide"""
         logger.info("Test : get_forecast() - Clé API invalide")
-        forecast = WeatherForecast("Paris", "FR", "invalid_api_key_12345")
+        forecast = WeatherForecast("Paris", "FR", "invalid_api_key_12345", base_url=self.server.base_url)
         
-        with self.assertRaises(Exception) as context:
+        with self.assertRaises(requests.exceptions.HTTPError) as context:
             forecast.get_forecast()
         
         logger.error(f"❌ Exception levée (attendue) : {context.exception}")
-        self.assertIn("Erreur API", str(context.exception))
+        self.assertEqual(context.exception.response.status_code, 401)
         logger.success("✓ Exception correctement levée pour clé API invalide")
 
     @patch('requests.get')
@@ -77,6 +88,26 @@ class TestWeatherForecastErrors(unittest.TestCase):
         logger.error("❌ Exception levée pour absence de données")
         logger.success("✓ Exception correctement levée")
 
+    def test_process_forecast_after_release(self):
+        """Test process_forecast après iter_forecast(release=True) : données libérées, pas de résultat vide"""
+        logger.info("Test : process_forecast() - Après libération")
+        forecast = WeatherForecast("Paris", "FR", self.api_key, base_url=self.server.base_url)
+        forecast.get_forecast()
+        days = list(forecast.iter_forecast(release=True))
+
+        self.assertGreater(len(days), 0)
+        self.assertIsNone(forecast.fingerprint)
+        with self.assertRaises(Exception) as context:
+            forecast.process_forecast()
+        self.assertIn("libérées", str(context.exception))
+        with self.assertRaises(Exception):
+            forecast.iter_forecast()
+
+        forecast.get_forecast()     # A new payload makes the instance usable again
+        self.assertEqual(len(forecast.process_forecast()["forecast_details"]), len(days))
+        logger.error(f"❌ Exception levée (attendue) : {context.exception}")
+        logger.success("✓ Réutilisation après libération refusée")
+
     @patch('builtins.open', side_effect=IOError("Permission denied"))
     def test_save_forecast_permission_error(self, mock_open):
         """Test save_forecast avec erreur de permission"""
@@ -13,11 +13,21 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from classes.WeatherForecast import WeatherForecast
 from classes.APIKey import APIKey
+from classes.StubServer import StubServer
 
 
 class TestWeatherForecast(unittest.TestCase):
     """Tests unitaires pour la classe WeatherForecast"""
 
+    @classmethod
+    def setUpClass(cls):
+        """Serveur factice partagé : les tests ne dépendent pas de l'API réelle"""
+        cls.server = StubServer(unknown_locations=["InvalidCityXYZ123"], seed=42).start_server()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
     def setUp(self):
         """Initialisation avant chaque test"""
         configure_for(Path(__file__).stem)
@@ -25,7 +35,7 @@ class TestWeatherForecast(unittest.TestCase):
         self.location = "Paris"
         self.country_code = "FR"
         self.api_key = APIKey.key
-        self.forecast = WeatherForecast(self.location, self.country_code, self.api_key)
+        self.forecast = WeatherForecast(self.location, self.country_code, self.api_key, base_url=self.server.base_url)
 
     def tearDown(self):
         """Nettoyage après chaque test"""
@@ -56,7 +66,7 @@ class TestWeatherForecast(unittest.TestCase):
     def test_get_forecast_invalid_location(self):
         """Test get_forecast avec un lieu invalide"""
         logger.info("Test : get_forecast() - Lieu invalide")
-        invalid_forecast = WeatherForecast("InvalidCityXYZ123", "XX", self.api_key)
+        invalid_forecast = WeatherForecast("InvalidCityXYZ123", "XX", self.api_key, base_url=self.server.base_url)
         
         with self.assertRaises(Exception) as context:
             invalid_forecast.get_forecast()
@@ -0,0 +1,116 @@
+"""
+Tests unitaires pour la classe WeatherSession
+Teste la boucle interactive, les recherches simultanées et l'état conservé entre recherches
+"""
+import unittest
+import sys
+import io
+import threading
+from pathlib import Path
+from unittest.mock import patch
+from loguru import logger
+from tests.logging_setup import configure_for
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from classes.WeatherSession import WeatherSession
+from classes.StubServer import StubServer
+from classes.Transport import Transport, RequestsTransport
+
+
+class OverlapTransport(Transport):
+    """Transport qui ne laisse partir les requêtes qu'une fois toutes en cours ensemble"""
+
+    def __init__(self, parties):
+        self.transport = RequestsTransport()
+        self.barrier = threading.Barrier(parties, timeout=5)     # Broken if the requests are made one after the other
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def get(self, url, params=None, headers=None):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            self.barrier.wait()
+            return self.transport.get(url, params=params, headers=headers)
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+class TestWeatherSession(unittest.TestCase):
+    """Tests unitaires pour la classe WeatherSession"""
+
+    def setUp(self):
+        """Initialisation avant chaque test"""
+        configure_for(Path(__file__).stem)
+        logger.info("🧪 Démarrage test WeatherSession")
+
+    def tearDown(self):
+        """Nettoyage après chaque test"""
+        logger.info("✅ Fin test WeatherSession\n")
+
+    def test_parse_line(self):
+        """Test la lecture de plusieurs villes sur une ligne"""
+        logger.info("Test : parse_line()")
+        session = WeatherSession("stub_key", prefetch=False)
+        parsed = session.parse_line("Paris,FR; lyon/fr ;PARIS/Fr; Nice,FRA;")
+        self.assertEqual(parsed[:2], [("Paris", "FR"), ("Lyon", "FR")])
+        self.assertEqual(len(parsed), 3)
+        self.assertIsInstance(parsed[2], ValueError)
+        logger.success("✓ Ligne analysée")
+
+    @patch('builtins.input')
+    def test_session_keeps_cache_warm(self, mock_input):
+        """Test que la session réutilise le cache entre les recherches"""
+        logger.info("Test : run() - Cache chaud")
+        mock_input.side_effect = ["Paris,FR; lyon/fr", "paris,fr", "stats", "q"]
+        captured_output = io.StringIO()
+        with StubServer() as server:
+            session = WeatherSession("stub_key", base_url=server.base_url, prefetch=False)
+            with patch('sys.stdout', captured_output):
+                session.run()
+            served = server.stats["requests"]
+
+        output = captured_output.getvalue()
+        self.assertEqual(served, 2)
+        self.assertEqual(output.count("cache froid"), 2)
+        self.assertEqual(output.count("cache chaud"), 1)
+        self.assertEqual(output.count("Prévisions météorologiques"), 3)
+        self.assertIn("servies depuis le cache : 1", output)
+        logger.success("✓ Deuxième recherche servie depuis le cache")
+
+    def test_lookups_are_concurrent(self):
+        """Test que plusieurs villes sont récupérées simultanément"""
+        logger.info("Test : lookup_many()")
+        cities = [("Paris", "FR"), ("Lyon", "FR"), ("Nice", "FR"), ("Lille", "FR")]
+        transport = OverlapTransport(len(cities))
+        with StubServer() as server:
+            session = WeatherSession("stub_key", base_url=server.base_url, transport=transport, prefetch=False, max_workers=4)
+            lookups = session.lookup_many(cities)
+
+        self.assertEqual([(lookup["location"], lookup["country_code"]) for lookup in lookups], cities)
+        self.assertTrue(all(lookup["cache"] == "froid" for lookup in lookups))
+        self.assertFalse(transport.barrier.broken)
+        self.assertEqual(transport.max_in_flight, len(cities))
+        logger.success(f"✓ {transport.max_in_flight} requêtes simultanées")
+
+    def test_error_does_not_end_session(self):
+        """Test qu'une erreur sur une ville n'interrompt pas la session"""
+        logger.info("Test : handle() - Erreur")
+        captured_output = io.StringIO()
+        with StubServer(unknown_locations=["Atlantis"]) as server:
+            session = WeatherSession("stub_key", base_url=server.base_url, prefetch=False)
+            with patch('sys.stdout', captured_output):
+                self.assertTrue(session.handle("Atlantis,FR; Paris,FR"))
+
+        output = captured_output.getvalue()
+        self.assertIn("✗ Atlantis (FR)", output)
+        self.assertIn("Paris (FR)", output)
+        logger.success("✓ Session poursuivie après une erreur")
+
+
+if __name__ == "__main__":
+    unittest.main()